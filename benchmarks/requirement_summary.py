@@ -0,0 +1,80 @@
+"""
+Benchmark hashing and comparing of requirement summaries.
+
+Compares the repr based RequirementSummary used before against the
+current one by diffing two sets of a few thousand constraints, like
+Resolver._resolve_one_round does for every round.
+
+Usage: PYTHONPATH=. python benchmarks/requirement_summary.py [COUNT]
+"""
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import sys
+import timeit
+
+from prequ._pip_compat import install_req_from_line
+from prequ.resolver import RequirementSummary
+from prequ.utils import key_from_ireq
+
+
+class ReprRequirementSummary(object):
+    """
+    The RequirementSummary implementation before using __slots__.
+    """
+    def __init__(self, ireq):
+        self.req = ireq.req
+        self.key = key_from_ireq(ireq)
+        self.extras = str(sorted(ireq.extras))
+        self.specifier = str(ireq.specifier)
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __str__(self):
+        return repr([self.key, self.specifier, self.extras])
+
+
+def make_constraints(count):
+    return [
+        install_req_from_line(
+            'package-{}[extra{}]>={}.0,<{}.0'.format(n, n % 3, n % 7, n % 7 + 2))
+        for n in range(count)]
+
+
+def diff_rounds(summary_class, old_ireqs, new_ireqs):
+    old = {summary_class(ireq) for ireq in old_ireqs}
+    new = {summary_class(ireq) for ireq in new_ireqs}
+    return (new - old, old - new)
+
+
+def main(argv=sys.argv):
+    count = int(argv[1]) if len(argv) > 1 else 3000
+    old_ireqs = make_constraints(count)
+    new_ireqs = old_ireqs[:count // 2] + make_constraints(count)[count // 2:]
+    print('Diffing two rounds of {} constraints'.format(count))  # noqa: T001
+    for summary_class in [ReprRequirementSummary, RequirementSummary]:
+        diff = diff_rounds(summary_class, old_ireqs, new_ireqs)
+        assert diff == (set(), set())
+        summaries = [summary_class(ireq) for ireq in old_ireqs]
+        times = {
+            'construct + diff': min(timeit.repeat(
+                lambda: diff_rounds(summary_class, old_ireqs, new_ireqs),
+                number=5, repeat=3)) / 5,
+            'hash': min(timeit.repeat(
+                lambda: [hash(x) for x in summaries],
+                number=5, repeat=3)) / 5,
+            'compare': min(timeit.repeat(
+                lambda: [x == x for x in summaries],
+                number=5, repeat=3)) / 5,
+        }
+        print('  {:25} {}'.format(summary_class.__name__, ', '.join(  # noqa: T001
+            '{} {:.2f} ms'.format(name, 1000 * times[name])
+            for name in sorted(times))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark matching the versions of a project against specifier sets.
+
+Compares the VersionIndex matching with and without the NumPy
+vectorized VersionArray, and plain SpecifierSet.filter, for a project
+with a release history like botocore, i.e. a few thousand versions.
+The matches are not memoized between the runs.
+
+Usage: PYTHONPATH=. python benchmarks/version_filter.py [COUNT]
+"""
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import sys
+import timeit
+
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.version import parse
+
+from prequ.repositories import version_array
+from prequ.repositories.version_index import VersionIndex
+
+SPECIFIERS = [
+    '', '>=1.12.0', '>=1.5.0,<1.20.0', '~=1.12.100', '==1.10.*',
+    '>=1.0,!=1.7.3,!=1.8.*,<2', '<1.3',
+]
+
+
+class FakeCandidate(object):
+    def __init__(self, version):
+        self.version = version
+
+
+def make_versions(count):
+    versions = []
+    (minor, patch) = (0, 0)
+    while len(versions) < count:
+        versions.append('1.{}.{}'.format(minor, patch))
+        if patch % 50 == 49:
+            versions.append('1.{}.0rc1'.format(minor + 1))
+        (minor, patch) = (minor + 1, 0) if patch == 199 else (minor, patch + 1)
+    return [parse(x) for x in versions[:count]]
+
+
+def main(argv=sys.argv):
+    count = int(argv[1]) if len(argv) > 1 else 3000
+    candidates = [FakeCandidate(x) for x in make_versions(count)]
+    specifiers = [SpecifierSet(x) for x in SPECIFIERS]
+    print('Matching {} versions against {} specifier sets'.format(  # noqa: T001
+        count, len(specifiers)))
+    indexes = [('bisect', VersionIndex(candidates, vectorize=False))]
+    if version_array.is_available():
+        indexes.append(('numpy', VersionIndex(candidates, vectorize=True)))
+    versions = indexes[0][1].versions
+    times = {'SpecifierSet.filter': min(timeit.repeat(
+        lambda: [list(s.filter(versions)) for s in specifiers],
+        number=3, repeat=3)) / 3}
+    for (name, index) in indexes:
+        assert all(list(index._filter(s, None)) == list(s.filter(versions))
+                   for s in specifiers)
+        times[name] = min(timeit.repeat(
+            lambda: [list(index._filter(s, None)) for s in specifiers],
+            number=3, repeat=3)) / 3
+    times['numpy construct'] = min(timeit.repeat(
+        lambda: version_array.VersionArray(versions),
+        number=3, repeat=3)) / 3 if len(indexes) > 1 else None
+    for name in sorted(times):
+        if times[name] is not None:
+            print('  {:25} {:.2f} ms'.format(name, 1000 * times[name]))  # noqa: T001
+
+
+if __name__ == '__main__':
+    main()
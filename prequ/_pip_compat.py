@@ -43,6 +43,7 @@ if PIP_10_OR_NEWER:
     from pip._internal.req.req_set import RequirementSet
     from pip._internal.utils.appdirs import user_cache_dir
     from pip._internal.utils.hashes import FAVORITE_HASH
+    from pip._internal import download as pip_download
     from pip._internal.download import is_file_url, path_to_url, url_to_path
     from pip._internal.index import FormatControl, PackageFinder
     from pip._internal.wheel import Wheel
@@ -55,6 +56,7 @@ else:
     from pip.req.req_set import RequirementSet
     from pip.utils.appdirs import user_cache_dir
     from pip.utils.hashes import FAVORITE_HASH
+    from pip import download as pip_download
     from pip.download import is_file_url, path_to_url, url_to_path
     from pip.index import FormatControl, PackageFinder
     from pip.wheel import Wheel, WheelCache
@@ -74,6 +76,24 @@ else:
     Resolver = None
 
 
+try:
+    from pip._internal.models.target_python import TargetPython
+except ImportError:
+    TargetPython = None
+
+
+try:
+    from inspect import getfullargspec as _getargspec
+except ImportError:  # pragma: py2 only
+    from inspect import getargspec as _getargspec
+
+#: Whether RequirementSet can be told to accept wheels which are not
+#: supported by the running interpreter, for preparing the wheels of
+#: another environment
+CAN_SKIP_WHEEL_CHECK = (
+    'check_supported_wheels' in _getargspec(RequirementSet.__init__).args)
+
+
 if PIP_18_OR_NEWER:
     from pip._internal.req.req_tracker import RequirementTracker
 else:
@@ -122,6 +142,7 @@ else:
 
 
 __all__ = [
+    'CAN_SKIP_WHEEL_CHECK',
     'Command',
     'DEV_PKGS',
     'FAVORITE_HASH',
@@ -138,6 +159,7 @@ __all__ = [
     'RequirementSet',
     'RequirementTracker',
     'Resolver',
+    'TargetPython',
     'Wheel',
     'WheelCache',
     'cmdoptions',
@@ -148,6 +170,7 @@ __all__ = [
     'is_file_url',
     'parse_requirements',
     'path_to_url',
+    'pip_download',
     'stdlib_pkgs',
     'url_to_path',
     'user_cache_dir',
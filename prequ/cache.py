@@ -6,10 +6,10 @@ import json
 import os
 import sys
 
-from ._pip_compat import Requirement
 from .exceptions import PrequError
+from .file_replacer import FileReplacer
 from .locations import CACHE_DIR
-from .utils import as_tuple, key_from_req, lookup_table, name_from_ireq
+from .utils import as_tuple, lookup_table, name_from_ireq, parse_dependency
 
 
 class CorruptCacheError(PrequError):
@@ -25,7 +25,7 @@ class CorruptCacheError(PrequError):
         return os.linesep.join(lines)
 
 
-def read_cache_file(cache_file_path):
+def read_cache_file(cache_file_path, contents_key='dependencies'):
     with open(cache_file_path, 'r') as cache_file:
         try:
             doc = json.load(cache_file)
@@ -34,27 +34,45 @@ def read_cache_file(cache_file_path):
 
         # Check version and load the contents
         assert doc['__format__'] == 1, 'Unknown cache file format'
-        return doc['dependencies']
+        return doc[contents_key]
 
 
-class DependencyCache(object):
+def _get_python_tag():
+    return 'py' + '.'.join(str(digit) for digit in sys.version_info[:2])
+
+
+class JSONCache(object):
     """
-    Creates a new persistent dependency cache for the current Python version.
-    The cache file is written to the appropriate user cache dir for the
-    current platform, i.e.
+    Base class for the persistent caches stored as JSON files.
 
-        ~/.cache/prequ/depcache-pyX.Y.json
+    The cache file is written to the user cache dir and named by the
+    file name prefix of the cache and the Python version, i.e.
+
+        ~/.cache/prequ/{prefix}-pyX.Y.json
 
-    Where X.Y indicates the Python version.
+    When resolving for another environment than the running
+    interpreter, the file is named by the cache tag of the target
+    environment instead of pyX.Y.  The file has a format version tag
+    and the contents of the cache under the contents key.
     """
-    def __init__(self, cache_dir=None):
+    #: Prefix of the cache file name
+    filename_prefix = None
+
+    #: Key of the cache contents in the cache file
+    contents_key = None
+
+    def __init__(self, cache_dir=None, environment_tag=None):
         if cache_dir is None:
             cache_dir = CACHE_DIR
         if not os.path.isdir(cache_dir):
             os.makedirs(cache_dir)
-        py_version = '.'.join(str(digit) for digit in sys.version_info[:2])
-        cache_filename = 'depcache-py{}.json'.format(py_version)
+        cache_filename = '{}-{}.json'.format(
+            self.filename_prefix, environment_tag or _get_python_tag())
 
+        #: Directory and environment tag of the cache file, for opening
+        #: the same cache in another process
+        self.cache_dir = cache_dir
+        self.environment_tag = environment_tag
         self._cache_file = os.path.join(cache_dir, cache_filename)
         self._cache = None
 
@@ -68,6 +86,50 @@ class DependencyCache(object):
             self.read_cache()
         return self._cache
 
+    def read_cache(self):
+        """Reads the cached contents into memory."""
+        if os.path.exists(self._cache_file):
+            self._cache = read_cache_file(self._cache_file, self.contents_key)
+        else:
+            self._cache = {}
+
+    def write_cache(self):
+        """
+        Writes the cache to disk as JSON.
+
+        The file is replaced atomically, so that other processes using
+        the same cache never read a partially written file.
+        """
+        doc = {
+            '__format__': 1,
+            self.contents_key: self._get_persistent_contents(),
+        }
+        with FileReplacer(self._cache_file) as f:
+            f.write(json.dumps(doc, sort_keys=True).encode('utf-8'))
+
+    def _get_persistent_contents(self):
+        return self._cache
+
+    def clear(self):
+        self._cache = {}
+        self.write_cache()
+
+
+class DependencyCache(JSONCache):
+    """
+    Creates a new persistent dependency cache for the current Python version.
+    The cache file is written to the appropriate user cache dir for the
+    current platform, i.e.
+
+        ~/.cache/prequ/depcache-pyX.Y.json
+
+    Where X.Y indicates the Python version.  When resolving for another
+    environment than the running interpreter, the file is named by the
+    cache tag of the target environment instead of pyX.Y.
+    """
+    filename_prefix = 'depcache'
+    contents_key = 'dependencies'
+
     def as_cache_key(self, ireq):
         """
         Given a requirement, return its cache key. This behavior is a little weird in order to allow backwards
@@ -97,25 +159,8 @@ class DependencyCache(object):
             extras_string += ':EDITABLE:{}'.format(ireq.link)
         return name, "{}{}".format(version, extras_string)
 
-    def read_cache(self):
-        """Reads the cached contents into memory."""
-        if os.path.exists(self._cache_file):
-            self._cache = read_cache_file(self._cache_file)
-        else:
-            self._cache = {}
-
-    def write_cache(self):
-        """Writes the cache to disk as JSON."""
-        doc = {
-            '__format__': 1,
-            'dependencies': self._strip_unpinned_and_editables(self._cache),
-        }
-        with open(self._cache_file, 'w') as f:
-            json.dump(doc, f, sort_keys=True)
-
-    def clear(self):
-        self._cache = {}
-        self.write_cache()
+    def _get_persistent_contents(self):
+        return self._strip_unpinned_and_editables(self._cache)
 
     def __contains__(self, ireq):
         pkgname, pkgversion_and_extras = self.as_cache_key(ireq)
@@ -170,7 +215,7 @@ class DependencyCache(object):
         # First, collect all the dependencies into a sequence of (parent, child) tuples, like [('flake8', 'pep8'),
         # ('flake8', 'mccabe'), ...]
         return lookup_table(
-            (key_from_req(Requirement.parse(dep_name)), req_name)
+            (parse_dependency(dep_name).key, req_name)
             for (cache_key, req_name) in cache_key_names.items()
             for dep_name in self.cache[cache_key[0]][cache_key[1]])
 
@@ -187,3 +232,53 @@ class DependencyCache(object):
                     stripped_dep_map[version] = deps
             stripped[name] = stripped_dep_map
         return stripped
+
+
+class ClosureCache(JSONCache):
+    """
+    Persistent cache of the transitive closures of pinned requirements.
+
+    The closure of a pinned requirement is the list of the pinned
+    packages it requires directly or indirectly, recorded from a resolve
+    in which no other requirements or limiting constraints applied to
+    those packages.  The cache file is written per Python version, like
+    the dependency cache, since the environment markers of the
+    dependencies are evaluated for the running interpreter, i.e.
+
+        ~/.cache/prequ/closures-pyX.Y.json
+    """
+    filename_prefix = 'closures'
+    contents_key = 'closures'
+
+    @classmethod
+    def as_cache_key(cls, ireq):
+        """
+        Get the cache key of a pinned requirement, e.g.
+
+            ipython[nbconvert,notebook]==2.1.0
+        """
+        name, version, extras = as_tuple(ireq)
+        extras_string = '[{}]'.format(','.join(extras)) if extras else ''
+        return '{}{}=={}'.format(name, extras_string, version)
+
+    def get(self, ireq, default=None):
+        """
+        Get the closure of a pinned requirement.
+
+        :return: The pinned requirement lines of the closure, e.g.
+          ['jinja2==2.7.3', 'markupsafe==0.23']
+        :rtype: list[str]
+        """
+        return self.cache.get(self.as_cache_key(ireq), default)
+
+    def update(self, closures):
+        """
+        Store closures of several pinned requirements.
+
+        :type closures: dict[InstallRequirement,list[str]]
+        """
+        if not closures:
+            return
+        for (ireq, lines) in closures.items():
+            self.cache[self.as_cache_key(ireq)] = lines
+        self.write_cache()
@@ -0,0 +1,99 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import hashlib
+import json
+import os
+
+from .file_replacer import FileReplacer
+from .locations import CACHE_DIR
+
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, 'checkpoints')
+
+
+def get_input_digest(constraints, existing_pins=None, **options):
+    """
+    Get digest of the inputs of a resolve.
+
+    :param constraints: The requirements to resolve
+    :type constraints: Iterable[InstallRequirement]
+    :param existing_pins: Existing pins by requirement key
+    :type existing_pins: dict[str,InstallRequirement]|None
+    :param options:
+      Other inputs affecting the result, like the resolver name, the
+      prereleases flag or the index URLs.  Must be JSON serializable.
+    :rtype: str
+    """
+    doc = {
+        'constraints': sorted(_format_input(ireq) for ireq in constraints),
+        'existing_pins': sorted(
+            str(ireq.req) for ireq in (existing_pins or {}).values()),
+        'options': options,
+    }
+    data = json.dumps(doc, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def _format_input(ireq):
+    if ireq.editable or not ireq.req:
+        line = '-e {}'.format(ireq.link) if ireq.editable else str(ireq.link)
+    else:
+        line = str(ireq.req)
+    return '-c {}'.format(line) if ireq.constraint else line
+
+
+class ResolverCheckpoint(object):
+    """
+    Checkpoint of the resolver state stored to a file.
+
+    The file is named by the digest of the resolver inputs, so that
+    a resolve of the same inputs can be resumed from the state of the
+    last finished round, and the state of other inputs is never used.
+    """
+    def __init__(self, digest, checkpoint_dir=None):
+        if checkpoint_dir is None:
+            checkpoint_dir = CHECKPOINT_DIR
+        self.digest = digest
+        self.path = os.path.join(
+            checkpoint_dir, 'checkpoint-{}.json'.format(digest))
+
+    def load(self):
+        """
+        Load the saved state, if any.
+
+        A file which cannot be read is ignored, since the checkpoint
+        only saves work and the resolve can always be started over.
+
+        :return: The saved state, see save, or None
+        :rtype: dict|None
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as fp:
+                doc = json.loads(fp.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+        if doc.get('__format__') != 1 or doc.get('digest') != self.digest:
+            return None
+        return doc['state']
+
+    def save(self, state):
+        """
+        Save the state atomically.
+
+        :param state: The state to save, e.g. {'round': 3,
+          'constraints': ['jinja2>=2.4', ...], 'unsafe': ['setuptools']}
+        :type state: dict
+        """
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        doc = {'__format__': 1, 'digest': self.digest, 'state': state}
+        with FileReplacer(self.path) as fp:
+            fp.write(json.dumps(doc, sort_keys=True).encode('utf-8'))
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -65,6 +65,54 @@ class NoCandidateFound(PrequError):
         return '\n'.join(lines)
 
 
+class ConflictingConstraints(NoCandidateFound):
+    def __init__(self, ireq):
+        """
+        Initialize "conflicting constraints" error.
+
+        Raised without looking up the candidates, when the combined
+        version constraints of a requirement cannot match any version.
+
+        :type ireq: pip.req.InstallRequirement
+        """
+        super(ConflictingConstraints, self).__init__(ireq, [], None)
+
+    def __str__(self):
+        return '\n'.join([
+            'Could not find a version that matches {}'.format(self.ireq),
+            'The version constraints are conflicting.',
+        ])
+
+
+class OscillatingConstraints(PrequError):
+    def __init__(self, first_round, repeat_round, constraints):
+        """
+        Initialize "oscillating constraints" error.
+
+        :param first_round: The round after which the state was seen first
+        :param repeat_round: The round after which the state repeated
+        :param constraints:
+          The constraints of the oscillating packages in each round of
+          the cycle by package key
+        :type constraints: dict[str,list[str]]
+        """
+        self.first_round = first_round
+        self.repeat_round = repeat_round
+        self.constraints = constraints
+
+    def __str__(self):
+        lines = [
+            'Resolving the requirements does not converge: the constraints '
+            'after round {} are the same as after round {}.'.format(
+                self.repeat_round, self.first_round),
+            'The constraints of these packages oscillate:',
+        ]
+        for key in sorted(self.constraints):
+            lines.append('  {}: {}'.format(
+                key, ' -> '.join(self.constraints[key])))
+        return '\n'.join(lines)
+
+
 class UnsupportedConstraint(PrequError):
     def __init__(self, message, constraint):
         """
@@ -103,3 +151,19 @@ class FileOutdated(PrequError):
 
 class WheelMissing(PrequError):
     pass
+
+
+class UnsupportedTargetEnvironment(PrequError):
+    def __init__(self, target, reason):
+        """
+        Initialize "unsupported target environment" error.
+
+        :type target: prequ.target.TargetEnvironment
+        :type reason: str
+        """
+        self.target = target
+        self.reason = reason
+
+    def __str__(self):
+        return 'Cannot resolve for {}: {}'.format(
+            self.target.cache_tag, self.reason)
@@ -0,0 +1,110 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+from .utils import get_ireq_version, key_from_ireq, name_from_ireq
+
+
+class DependencyGraph(object):
+    """
+    Graph of the dependencies seen by a resolver.
+
+    The packages are interned to integer ids by their key.  The forward
+    edges are stored per package version, since the dependencies of
+    a package may change when the resolver picks another version of it,
+    and the reverse edges per package.  Editable requirements are
+    included as well, with their link as the version.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._keys = []
+        #: Dependency ids of each package id by package version
+        self._forward = []
+        #: Ids of the packages depending on each package id
+        self._reverse = []
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def get_id(self, key):
+        """
+        Get the id of a package key, interning the key if needed.
+
+        :rtype: int
+        """
+        package_id = self._ids.get(key)
+        if package_id is None:
+            package_id = len(self._keys)
+            self._ids[key] = package_id
+            self._keys.append(key)
+            self._forward.append({})
+            self._reverse.append(set())
+        return package_id
+
+    def set_dependencies(self, ireq, dependency_keys):
+        """
+        Record the dependencies of a pinned or editable requirement.
+
+        :type ireq: InstallRequirement
+        :type dependency_keys: Iterable[str]
+        """
+        parent_id = self.get_id(key_from_ireq(ireq))
+        children = frozenset(self.get_id(key) for key in dependency_keys)
+        self._forward[parent_id][_get_node_version(ireq)] = children
+        for child_id in children:
+            self._reverse[child_id].add(parent_id)
+
+    def get_dependencies(self, ireq):
+        """
+        Get keys of the dependencies of a pinned or editable requirement.
+
+        :rtype: set[str]
+        """
+        package_id = self._ids.get(key_from_ireq(ireq))
+        if package_id is None:
+            return set()
+        children = self._forward[package_id].get(_get_node_version(ireq))
+        return {self._keys[child_id] for child_id in children or ()}
+
+    def get_dependents(self, key):
+        """
+        Get keys of the packages which depend on a package.
+
+        Contains the packages which depended on the package in any of
+        their versions seen by the resolver.
+
+        :rtype: set[str]
+        """
+        package_id = self._ids.get(key)
+        if package_id is None:
+            return set()
+        return {self._keys[parent_id] for parent_id in self._reverse[package_id]}
+
+    def reverse_dependencies(self, ireqs):
+        """
+        Get a lookup table of reverse dependencies of the given ireqs.
+
+        Only the edges of the given versions of the packages are
+        followed.  The result is compatible with the one returned by
+        DependencyCache.reverse_dependencies, e.g.
+
+            {'pep8': {'flake8'}, 'mccabe': {'flake8'}}
+
+        :type ireqs: Iterable[InstallRequirement]
+        :rtype: dict[str,set[str]]
+        """
+        result = {}
+        for ireq in ireqs:
+            package_id = self._ids.get(key_from_ireq(ireq))
+            if package_id is None:
+                continue
+            children = self._forward[package_id].get(_get_node_version(ireq))
+            name = name_from_ireq(ireq)
+            for child_id in children or ():
+                result.setdefault(self._keys[child_id], set()).add(name)
+        return result
+
+
+def _get_node_version(ireq):
+    version = str(ireq.link) if ireq.editable else get_ireq_version(ireq)
+    return (version, tuple(sorted(ireq.extras)))
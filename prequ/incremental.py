@@ -0,0 +1,233 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import os
+from itertools import chain
+
+from .logging import log
+from .resolver import RequirementSummary, Resolver, magenta
+from .trace import tracer
+from .utils import (
+    UNSAFE_PACKAGES, as_tuple, first, format_requirement, get_ireq_version,
+    key_from_ireq, lookup_table, make_install_requirement)
+
+
+class IncrementalResolver(Resolver):
+    """
+    Resolver which re-evaluates only the packages whose constraints
+    have changed.
+
+    Instead of recomputing every constraint in rounds, this keeps a
+    worklist of package keys.  A package is evaluated by combining the
+    constraints given to it by the user and by the current best matches
+    of the packages depending on it.  If the combined constraint has
+    changed, a new best match is looked up and, if that changed too,
+    the dependencies of the package are updated and the dependent
+    packages whose constraints changed are put to the worklist.  The
+    resolving is done when the worklist is empty.
+    """
+    def __init__(self, *args, **kwargs):
+        super(IncrementalResolver, self).__init__(*args, **kwargs)
+        self._reset_state()
+
+    def _reset_state(self):
+        super(IncrementalResolver, self)._reset_state()
+        #: Constraints by package key and the key of the package which
+        #: gave them (None for our constraints)
+        self._sources = {
+            key: {None: ireqs}
+            for (key, ireqs) in lookup_table(
+                self.our_constraints, key=key_from_ireq,
+                use_lists=True).items()}
+        #: Dependency constraints of the best matches by parent key and
+        #: child key
+        self._dependencies = {}
+        #: Summary of the combined constraint by package key
+        self._combined = {}
+        self._best_matches = {}
+        self._unsafe = {}
+        self._worklist = set(self._sources)
+        self._evaluations = {}
+
+    def warm_start(self, pins, dependents):
+        """
+        Seed the best matches from the pins of a previous resolve.
+
+        The pins reachable from our constraints, whose dependencies are
+        in the cache, are taken as the best matches of their packages
+        and their dependencies as the constraints of the others.  Only
+        the packages whose combined constraint is not satisfied by their
+        pin are put to the worklist, so e.g. upgrading a package
+        evaluates just the packages whose constraints it changes,
+        without looking up the other packages from the repository.
+
+        See Resolver.warm_start for the parameters.
+        """
+        if self.clear_caches:
+            return
+        seeded = {}
+        for key in sorted(self._get_reachable_keys(dependents)):
+            pin = pins.get(key)
+            if pin is None:
+                continue
+            (name, version, extras) = as_tuple(pin)
+            best_match = make_install_requirement(pin.name, version, extras)
+            if best_match in self.dependency_cache:
+                seeded[key] = best_match
+        for (key, best_match) in seeded.items():
+            self._best_matches[key] = best_match
+            self._set_dependencies(key, lookup_table(
+                self._iter_dependencies(best_match),
+                key=key_from_ireq, use_lists=True))
+
+        self._worklist = set()
+        for key in set(self._sources) | set(seeded):
+            combined = self._get_combined_constraint(key)
+            best_match = seeded.get(key)
+            if (best_match is None or combined is None or
+                    combined.constraint or
+                    combined.extras != tuple(sorted(best_match.extras)) or
+                    not (self.allow_unsafe or
+                         combined.name not in UNSAFE_PACKAGES) or
+                    get_ireq_version(best_match) not in combined.specifier):
+                self._worklist.add(key)
+            else:
+                self._combined[key] = RequirementSummary(combined)
+        self._warm_started = True
+        log.debug('Warm start from {} pins, {} packages to evaluate'.format(
+            len(seeded), len(self._worklist)))
+
+    def resume(self, checkpoint):
+        """
+        Resuming is not supported, since there are no rounds to save.
+        """
+        return False
+
+    def resolve(self, max_rounds=10):
+        """
+        Finds concrete package versions for all the given InstallRequirements
+        and their recursive dependencies.
+
+        Evaluates packages from the worklist until it is empty.  Protects
+        against infinite loops by allowing each package to be evaluated
+        at most max_rounds times.
+        """
+        if self.clear_caches:
+            self.dependency_cache.clear()
+            self.repository.clear_caches()
+
+        self.check_constraints(self.our_constraints)
+
+        log.debug('Limiting constraints:')
+        for constraint in sorted(self.limiters, key=key_from_ireq):
+            log.debug('  {}'.format(constraint))
+
+        # Ignore existing packages
+        os.environ[str('PIP_EXISTS_ACTION')] = str('i')  # NOTE: str() wrapping necessary for Python 2/3 compat
+        self._evaluate_worklist(max_rounds)
+        best_matches = set(self._best_matches.values())
+        if self._warm_started and not self._are_all_required(best_matches):
+            log.debug('')
+            log.debug('Warm start left packages which are no longer required, '
+                      'resolving from scratch')
+            self._reset_state()
+            self._evaluate_worklist(max_rounds)
+            best_matches = set(self._best_matches.values())
+        del os.environ['PIP_EXISTS_ACTION']
+
+        self.unsafe_constraints = [
+            self._unsafe[key].to_ireq() for key in sorted(self._unsafe)]
+        return best_matches
+
+    def _evaluate_worklist(self, max_rounds):
+        log.debug('')
+        log.debug(magenta('{:^60}'.format('WORKLIST')))
+        while self._worklist:
+            key = min(self._worklist)
+            self._worklist.remove(key)
+            self._evaluations[key] = self._evaluations.get(key, 0) + 1
+            if self._evaluations[key] > max_rounds:
+                raise RuntimeError(
+                    'No stable configuration of concrete packages '
+                    'could be found for the given constraints after '
+                    'evaluating {} {} times.\n'
+                    'This is likely a bug.'.format(key, max_rounds))
+            with tracer.span('evaluate', 'resolver', package=key):
+                self._evaluate(key)
+        log.debug('-' * 60)
+        log.debug('Resolved with {} evaluations of {} packages'.format(
+            sum(self._evaluations.values()), len(self._evaluations)))
+
+    def _get_combined_constraint(self, key):
+        sources = chain.from_iterable(self._sources.get(key, {}).values())
+        return first(self._group_constraints(
+            chain(sources, self.limiters_by_key.get(key, []))))
+
+    def _evaluate(self, key):
+        """
+        Evaluate the combined constraint of a package and update its best
+        match and dependencies, if needed.
+        """
+        combined = self._get_combined_constraint(key)
+        if combined is None or combined.constraint:
+            log.debug('  {} is not required anymore'.format(key))
+            self._unsafe.pop(key, None)
+            self._forget(key)
+            return
+
+        if not self.allow_unsafe and combined.name in UNSAFE_PACKAGES:
+            combined = combined.with_specifier(type(combined.specifier)())
+            log.debug('  remembering unsafe {}'.format(combined))
+            self._unsafe[key] = combined
+            self._forget(key)
+            return
+
+        summary = RequirementSummary(combined)
+        if self._combined.get(key) == summary:
+            return
+        self._combined[key] = summary
+
+        best_match = self.get_best_match(combined.to_ireq())
+        old_best_match = self._best_matches.get(key)
+        self._best_matches[key] = best_match
+        if old_best_match is not None:
+            if RequirementSummary(old_best_match) == RequirementSummary(best_match):
+                return
+            # A different version of the package will be built, see
+            # the comment about build caches in Resolver.resolve
+            self.repository.freshen_build_caches()
+        self._set_dependencies(key, lookup_table(
+            self._iter_dependencies(best_match),
+            key=key_from_ireq, use_lists=True))
+
+    def _forget(self, key):
+        self._combined.pop(key, None)
+        self._best_matches.pop(key, None)
+        self._set_dependencies(key, {})
+
+    def _set_dependencies(self, parent_key, dependencies):
+        """
+        Replace the dependency constraints given by a package.
+
+        Puts the dependencies whose constraints changed to the worklist.
+
+        :type dependencies: dict[str,list[InstallRequirement]]
+        """
+        old_dependencies = self._dependencies.pop(parent_key, {})
+        if dependencies:
+            self._dependencies[parent_key] = dependencies
+        for child_key in set(old_dependencies) | set(dependencies):
+            old = {RequirementSummary(x) for x in old_dependencies.get(child_key, [])}
+            new = {RequirementSummary(x) for x in dependencies.get(child_key, [])}
+            sources = self._sources.setdefault(child_key, {})
+            if child_key in dependencies:
+                sources[parent_key] = dependencies[child_key]
+            else:
+                sources.pop(parent_key, None)
+            if old != new:
+                log.debug('  {} changes constraints of {}'.format(
+                    format_requirement(self._best_matches[parent_key])
+                    if parent_key in self._best_matches else parent_key,
+                    child_key))
+                self._worklist.add(child_key)
@@ -0,0 +1,365 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+from bisect import bisect_left, bisect_right
+
+from pip._vendor.packaging.specifiers import Specifier
+from pip._vendor.packaging.version import InvalidVersion, Version
+
+LOWER_OPERATORS = ('>=', '>')
+UPPER_OPERATORS = ('<=', '<')
+
+
+class VersionInterval(object):
+    """
+    Interval of versions which may match a specifier set.
+
+    Every version outside of the interval fails to match at least one of
+    the specifiers of the set, even if pre-releases are allowed.  The
+    versions inside the interval still have to be checked against the
+    specifier set, since e.g. != specifiers and the special rules of the
+    < and > operators for pre-releases, post-releases and local versions
+    are not represented in the interval.
+
+    The bounds are Versions, or None for an unbounded side.  An upper
+    bound with upper_locals set covers also the local versions of the
+    bound, like the == operator does.
+    """
+    __slots__ = (
+        'lower', 'lower_inclusive', 'upper', 'upper_inclusive', 'upper_locals')
+
+    def __init__(self, lower=None, lower_inclusive=True,
+                 upper=None, upper_inclusive=True, upper_locals=False):
+        self.lower = lower
+        self.lower_inclusive = lower_inclusive
+        self.upper = upper
+        self.upper_inclusive = upper_inclusive
+        self.upper_locals = upper_locals
+
+    @classmethod
+    def from_specifier(cls, specifier):
+        """
+        Get the interval of a specifier set.
+
+        :type specifier: packaging.specifiers.SpecifierSet
+        :rtype: VersionInterval
+        """
+        interval = cls()
+        for spec in specifier._specs:
+            interval = interval.intersect(cls.from_spec(spec))
+        return interval
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Get the interval of a single specifier.
+
+        :type spec: packaging.specifiers.Specifier
+        :rtype: VersionInterval
+        """
+        (op, version) = spec._spec
+        if not isinstance(spec, Specifier) or op in ('!=', '==='):
+            return cls()
+        if version.endswith('.*'):
+            bounds = get_prefix_bounds(version[:-2])
+            if not bounds:
+                return cls()
+            return cls(bounds[0], True, bounds[1], False)
+        parsed = Version(version)
+        if op in LOWER_OPERATORS:
+            return cls(lower=parsed, lower_inclusive=(op == '>='))
+        elif op in UPPER_OPERATORS:
+            return cls(upper=parsed, upper_inclusive=(op == '<='))
+        elif op == '==':
+            return cls(parsed, True, parsed, True, parsed.local is None)
+        assert op == '~='
+        bounds = get_prefix_bounds(
+            '.'.join(str(x) for x in parsed.release[:-1]),
+            epoch=parsed.epoch)
+        return cls(parsed, True, bounds[1] if bounds else None, False)
+
+    def intersect(self, other):
+        """
+        Get the intersection of two intervals.
+
+        :type other: VersionInterval
+        :rtype: VersionInterval
+        """
+        if other.lower is None or (
+                self.lower is not None and
+                (self.lower, not self.lower_inclusive) >
+                (other.lower, not other.lower_inclusive)):
+            (lower, lower_inclusive) = (self.lower, self.lower_inclusive)
+        else:
+            (lower, lower_inclusive) = (other.lower, other.lower_inclusive)
+        if other.upper is None or (
+                self.upper is not None and
+                (self.upper, self.upper_inclusive, self.upper_locals) <
+                (other.upper, other.upper_inclusive, other.upper_locals)):
+            upper = (self.upper, self.upper_inclusive, self.upper_locals)
+        else:
+            upper = (other.upper, other.upper_inclusive, other.upper_locals)
+        return type(self)(lower, lower_inclusive, *upper)
+
+    def is_empty(self):
+        """
+        Check if the interval contains no versions at all.
+
+        Since the interval covers all the versions which may match the
+        specifier set, an empty interval means that the specifiers of
+        the set are conflicting.
+        """
+        if self.lower is None or self.upper is None:
+            return False
+        if self.upper_locals and (
+                Version(self.lower.public) == self.upper):
+            return False
+        if self.lower == self.upper:
+            return not (self.lower_inclusive and self.upper_inclusive)
+        return self.lower > self.upper
+
+    def get_range(self, versions):
+        """
+        Get the range of the sorted versions inside the interval.
+
+        Uses bisect, so takes O(log n) time for n versions, except for
+        the local versions of an upper bound with upper_locals.
+
+        :type versions: list[Version]
+        :rtype: (int, int)
+        """
+        start = 0
+        if self.lower is not None:
+            bisect = bisect_left if self.lower_inclusive else bisect_right
+            start = bisect(versions, self.lower)
+        end = len(versions)
+        if self.upper is not None:
+            bisect = bisect_right if self.upper_inclusive else bisect_left
+            end = bisect(versions, self.upper)
+            if self.upper_locals:
+                while (end < len(versions) and
+                       isinstance(versions[end], Version) and
+                       Version(versions[end].public) == self.upper):
+                    end += 1
+        return (start, end)
+
+
+_intervals = {}
+
+
+def get_interval(specifier):
+    """
+    Get the interval of a specifier set, memoized by the specifier set.
+
+    :type specifier: packaging.specifiers.SpecifierSet
+    :rtype: VersionInterval
+    """
+    memo_key = str(specifier)
+    interval = _intervals.get(memo_key)
+    if interval is None:
+        interval = VersionInterval.from_specifier(specifier)
+        _intervals[memo_key] = interval
+    return interval
+
+
+_simplified_specifiers = {}
+
+
+def simplify_specifier(specifier):
+    """
+    Simplify a specifier set to a canonical minimal form.
+
+    Drops the lower and upper bounds which are implied by another
+    specifier of the set and the != specifiers of versions which the
+    bounds exclude anyway.  For example:
+
+        >=1.0,>=1.2,<3,<2.5,!=0.9,!=2.1 => >=1.2,<2.5,!=2.1
+
+    The bounds are compared so that the special rules of the < and
+    > operators are respected, and the simplified set matches the same
+    versions as the original one.  The results are memoized.
+
+    :type specifier: packaging.specifiers.SpecifierSet
+    :rtype: packaging.specifiers.SpecifierSet
+    """
+    memo_key = (str(specifier), specifier._prereleases)
+    simplified = _simplified_specifiers.get(memo_key)
+    if simplified is None:
+        simplified = _simplify_specifier(specifier)
+        _simplified_specifiers[memo_key] = simplified
+    return simplified
+
+
+def _simplify_specifier(specifier):
+    specs = specifier._specs
+    if len(specs) <= 1 or not all(isinstance(x, Specifier) for x in specs):
+        return specifier
+
+    # Check the tightest specifiers first, so that from the specifiers
+    # which imply each other only the first one is kept
+    kept = []
+    for spec in sorted(specs, key=_get_tightness):
+        (op, version) = spec._spec
+        if op in LOWER_OPERATORS:
+            redundant = any(_is_lower_subset(x, spec) for x in kept)
+        elif op in UPPER_OPERATORS:
+            redundant = any(_is_upper_subset(x, spec) for x in kept)
+        else:
+            redundant = False
+        if not redundant:
+            kept.append(spec)
+
+    bounds = [x for x in kept if x._spec[0] in LOWER_OPERATORS + UPPER_OPERATORS]
+    kept = [x for x in kept if not (
+        x._spec[0] == '!=' and _is_excluded_by_any(x._spec[1], bounds))]
+
+    if len(kept) == len(specs):
+        return specifier
+    simplified = type(specifier)(
+        ','.join(str(x) for x in kept), prereleases=specifier._prereleases)
+    if simplified.prereleases != specifier.prereleases:
+        # Dropping a bound with a pre-release version would change the
+        # default handling of pre-releases, so keep the original set
+        return specifier
+    return simplified
+
+
+def _get_tightness(spec):
+    (op, version) = spec._spec
+    if op in LOWER_OPERATORS:
+        return (1, _Reversed(Version(version)), op != '>')
+    elif op in UPPER_OPERATORS:
+        return (2, Version(version), op != '<')
+    return (0, str(spec))
+
+
+def _is_lower_subset(spec, lower_spec):
+    """
+    Check if the versions matching a specifier match a lower bound.
+
+    :type spec: Specifier
+    :param lower_spec: A specifier with the >= or > operator
+    :type lower_spec: Specifier
+    """
+    (op, version) = spec._spec
+    if spec == lower_spec or op in UPPER_OPERATORS:
+        return False
+    if op in LOWER_OPERATORS:
+        lower = Version(version)
+    else:
+        lower = VersionInterval.from_spec(spec).lower
+        if lower is None:
+            return False
+    (bound_op, bound_version) = lower_spec._spec
+    bound = Version(bound_version)
+    if bound_op == '>=':
+        return lower >= bound
+    # The > operator excludes also the post-releases and the local
+    # versions of the bound, which the base version check covers
+    return Version(lower.base_version) > Version(bound.base_version)
+
+
+def _is_upper_subset(spec, upper_spec):
+    """
+    Check if the versions matching a specifier match an upper bound.
+
+    :type spec: Specifier
+    :param upper_spec: A specifier with the <= or < operator
+    :type upper_spec: Specifier
+    """
+    (op, version) = spec._spec
+    if spec == upper_spec:
+        return False
+    if op in UPPER_OPERATORS:
+        upper = Version(version)
+        max_base = Version(upper.base_version)
+    elif op == '~=' or (op == '==' and version.endswith('.*')):
+        # The exclusive upper bound of a prefix is the first development
+        # release of the next release, so the matching versions have
+        # a smaller base version
+        upper = VersionInterval.from_spec(spec).upper
+        if upper is None:
+            return False
+        max_base = None
+    else:
+        return False
+    (bound_op, bound_version) = upper_spec._spec
+    bound = Version(bound_version)
+    if bound_op == '<=':
+        return upper <= bound
+    # The < operator excludes also the pre-releases of the bound, which
+    # the base version check covers
+    if max_base is None:
+        return upper <= bound
+    return max_base < Version(bound.base_version)
+
+
+def _is_excluded_by_any(version, bounds):
+    """
+    Check if a version and its local versions are excluded by a bound.
+
+    :type version: str
+    :type bounds: list[Specifier]
+    """
+    if version.endswith('.*'):
+        return False
+    try:
+        parsed = Version(version)
+    except InvalidVersion:
+        return False
+    return any(_is_excluded_by(parsed, x) for x in bounds)
+
+
+def _is_excluded_by(version, bound):
+    if bound.contains(version, prereleases=True):
+        return False
+    if version.local is not None:
+        return True
+    # The local versions of the version sort between it and the next
+    # public version, so only a bound with the same public version may
+    # match them, unless it is strict
+    (op, bound_version) = bound._spec
+    return (op in ('<', '>') or
+            Version(Version(bound_version).public) != version)
+
+
+class _Reversed(object):
+    """
+    Wrapper for sorting values in descending order.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+
+def get_prefix_bounds(prefix, epoch=None):
+    """
+    Get the bounds of the versions starting with a version prefix.
+
+    The upper bound is exclusive.  Returns None, if the prefix is not
+    a plain release number.
+
+    :rtype: (Version, Version)|None
+    """
+    try:
+        parsed = Version(prefix)
+    except InvalidVersion:
+        return None
+    if (parsed.pre is not None or parsed.post is not None or
+            parsed.dev is not None or parsed.local or not parsed.release):
+        return None
+    epoch = parsed.epoch if epoch is None else epoch
+    release = parsed.release
+    next_release = release[:-1] + (release[-1] + 1,)
+    return (
+        Version('{}!{}.dev0'.format(epoch, '.'.join(str(x) for x in release))),
+        Version('{}!{}.dev0'.format(
+            epoch, '.'.join(str(x) for x in next_release))))
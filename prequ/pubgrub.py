@@ -0,0 +1,326 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import os
+from itertools import chain
+
+from .exceptions import NoCandidateFound
+from .logging import log
+from .resolver import Resolver, magenta
+from .trace import tracer
+from .utils import (
+    UNSAFE_PACKAGES, first, format_requirement, get_pinned_version,
+    is_pinned_requirement, is_vcs_link, key_from_ireq,
+    make_install_requirement)
+
+
+class Decision(object):
+    """
+    Decision of the version of a package.
+
+    The identity of a decision is a (key, version) tuple, where version
+    is None for editable and VCS requirements.
+    """
+    def __init__(self, key, ireq):
+        self.key = key
+        self.ireq = ireq
+        self.version = get_pinned_version(ireq)
+        self.id = (key, self.version)
+        self.base_extras = frozenset(ireq.extras)
+        #: Extras requested from the package by the current decisions
+        #: and the decisions which requested them
+        self.extras = self.base_extras
+        self.extra_causes = frozenset()
+        #: Parsed dependencies by sorted extras tuple
+        self.dependencies = {}
+
+    def reset(self):
+        self.extras = self.base_extras
+        self.extra_causes = frozenset()
+
+    def get_ireq(self):
+        if self.version is None or self.extras == self.base_extras:
+            return self.ireq
+        return make_install_requirement(
+            self.ireq.name, self.version, self.extras,
+            constraint=self.ireq.constraint)
+
+    def __str__(self):
+        return format_requirement(self.get_ireq())
+
+
+class PubGrubResolver(Resolver):
+    """
+    Resolver which backtracks on conflicts and learns from them.
+
+    Package versions are decided one package at a time, the most
+    constrained packages first.  Dependencies of a decided version are
+    added as requirements of the later decisions.  When no version of
+    a package satisfies its requirements, or a new requirement does not
+    match an already decided version, the decisions which caused the
+    conflict are learned as an incompatibility: a set of decisions which
+    cannot be made together.  The resolver then jumps back to the point
+    where the incompatibility excludes the latest of those decisions and
+    continues from there.  Versions excluded by the learned
+    incompatibilities are never tried again.
+    """
+    def __init__(self, *args, **kwargs):
+        super(PubGrubResolver, self).__init__(*args, **kwargs)
+        self._decisions = []
+        #: Current decisions by package key
+        self._decided = {}
+        #: Index of the current decisions by decision id
+        self._levels = {}
+        #: Requirements and the decisions causing them by package key
+        self._requirements = {}
+        #: Learned incompatibilities, i.e. sets of decision ids
+        self._incompatibilities = []
+        self._incompatibilities_by_key = {}
+        self._decision_count = 0
+        self._conflict_count = 0
+        self._metadata_fetch_count = 0
+
+    def warm_start(self, pins, dependents):
+        """
+        Warm start is not supported, since the decisions are made
+        from our constraints only.
+        """
+
+    def resume(self, checkpoint):
+        """
+        Resuming is not supported, since there are no rounds to save.
+        """
+        return False
+
+    def resolve(self, max_rounds=10):
+        """
+        Finds concrete package versions for all the given InstallRequirements
+        and their recursive dependencies.
+
+        Every learned incompatibility is a new one, so the search always
+        terminates and max_rounds is only accepted for compatibility
+        with the other resolvers.  Raises NoCandidateFound, if the
+        given constraints cannot be satisfied.
+        """
+        if self.clear_caches:
+            self.dependency_cache.clear()
+            self.repository.clear_caches()
+
+        self.check_constraints(self.our_constraints)
+
+        log.debug('Limiting constraints:')
+        for constraint in sorted(self.limiters, key=key_from_ireq):
+            log.debug('  {}'.format(constraint))
+
+        # Ignore existing packages
+        os.environ[str('PIP_EXISTS_ACTION')] = str('i')  # NOTE: str() wrapping necessary for Python 2/3 compat
+        log.debug('')
+        log.debug(magenta('{:^60}'.format('DECISIONS')))
+        self._rebuild()
+        while True:
+            key = self._get_next_key()
+            if key is None:
+                break
+            with tracer.span('decide', 'resolver', package=key):
+                incompatibility = self._decide(key)
+            if incompatibility is not None:
+                with tracer.span('backjump', 'resolver', package=key):
+                    self._backjump(incompatibility)
+        log.debug('-' * 60)
+        log.debug(
+            'Resolved with {} decisions, {} conflicts and {} metadata '
+            'fetches'.format(
+                self._decision_count, self._conflict_count,
+                self._metadata_fetch_count))
+        del os.environ['PIP_EXISTS_ACTION']
+
+        self.unsafe_constraints = []
+        if not self.allow_unsafe:
+            for key in sorted(self._requirements):
+                if key in UNSAFE_PACKAGES and self._is_required(key):
+                    unsafe = first(self._group_constraints(
+                        ireq for (ireq, _) in self._requirements[key]))
+                    self.unsafe_constraints.append(unsafe.with_specifier(
+                        type(unsafe.specifier)()).to_ireq())
+        return {decision.get_ireq() for decision in self._decisions}
+
+    def _rebuild(self):
+        """
+        Rebuild the requirements from our constraints and the decisions.
+        """
+        decisions = self._decisions
+        self._decisions = []
+        self._decided = {}
+        self._levels = {}
+        self._requirements = {}
+        for ireq in self.our_constraints:
+            self._get_requirements(key_from_ireq(ireq)).append(
+                (ireq, frozenset()))
+        for decision in decisions:
+            decision.reset()
+            incompatibility = self._add_decision(decision)
+            assert incompatibility is None
+
+    def _get_requirements(self, key):
+        """
+        Get the requirements of a package for adding more to them.
+
+        The limiting constraints of a package are added to its
+        requirements only when the package is first required, so that
+        the unused limiters don't slow down the decisions.
+        """
+        requirements = self._requirements.get(key)
+        if requirements is None:
+            requirements = [
+                (ireq, frozenset())
+                for ireq in self.limiters_by_key.get(key, [])]
+            self._requirements[key] = requirements
+        return requirements
+
+    def _is_required(self, key):
+        return any(not ireq.constraint for (ireq, _) in self._requirements[key])
+
+    def _get_next_key(self):
+        """
+        Get the key of the next package to decide, or None if done.
+
+        Prefers packages which have only one possible version, i.e.
+        editable, VCS and pinned requirements.
+        """
+        undecided = [
+            key for key in self._requirements
+            if key not in self._decided and self._is_required(key) and
+            (self.allow_unsafe or key not in UNSAFE_PACKAGES)]
+        if not undecided:
+            return None
+        return min(undecided, key=lambda key: (
+            not any(ireq.editable or is_vcs_link(ireq) or
+                    is_pinned_requirement(ireq)
+                    for (ireq, _) in self._requirements[key]),
+            key))
+
+    def _decide(self, key):
+        """
+        Decide the version of a package.
+
+        Returns the incompatibility causing a conflict, or None.
+        """
+        requirements = self._requirements[key]
+        causes = frozenset(chain.from_iterable(
+            cause for (_, cause) in requirements))
+        combined = first(self._group_constraints(
+            ireq for (ireq, _) in requirements))
+        excluded = self._get_excluded_versions(key)
+        for excluding in excluded.values():
+            causes |= excluding
+        if combined.editable or is_vcs_link(combined):
+            if None in excluded:
+                self._conflict_count += 1
+                log.debug('  {} is excluded'.format(combined))
+                return causes
+            best_match = self.get_best_match(combined.to_ireq())
+        else:
+            if excluded:
+                combined = combined.with_specifier(
+                    combined.specifier & type(combined.specifier)(','.join(
+                        '!=' + version for version in sorted(excluded))))
+            try:
+                best_match = self.get_best_match(combined.to_ireq())
+            except NoCandidateFound:
+                self._conflict_count += 1
+                log.debug('  no candidate for {}'.format(combined))
+                if not causes:
+                    raise
+                return causes
+        decision = Decision(key, best_match)
+        log.debug('  deciding {}'.format(decision))
+        self._decision_count += 1
+        return self._add_decision(decision)
+
+    def _get_excluded_versions(self, key):
+        """
+        Get versions of a package excluded by the current decisions.
+
+        :return: Decisions excluding the version by the version
+        :rtype: dict[str|None,frozenset]
+        """
+        excluded = {}
+        for incompatibility in self._incompatibilities_by_key.get(key, []):
+            others = frozenset(x for x in incompatibility if x[0] != key)
+            if all(self._is_decided(x) for x in others):
+                for (_, version) in incompatibility - others:
+                    excluded[version] = excluded.get(version, frozenset()) | others
+        return excluded
+
+    def _is_decided(self, decision_id):
+        decision = self._decided.get(decision_id[0])
+        return decision is not None and decision.id == decision_id
+
+    def _add_decision(self, decision):
+        """
+        Add a decision and the requirements of its dependencies.
+
+        Returns the incompatibility causing a conflict, or None.
+        """
+        self._levels[decision.id] = len(self._decisions)
+        self._decisions.append(decision)
+        self._decided[decision.key] = decision
+        pending = [decision]
+        while pending:
+            parent = pending.pop(0)
+            causes = frozenset([parent.id]) | parent.extra_causes
+            for dependency in self._get_dependencies(parent):
+                incompatibility = self._add_requirement(
+                    dependency, causes, pending)
+                if incompatibility is not None:
+                    return incompatibility
+        return None
+
+    def _add_requirement(self, ireq, causes, pending):
+        key = key_from_ireq(ireq)
+        self._get_requirements(key).append((ireq, causes))
+        decision = self._decided.get(key)
+        if decision is None or decision.version is None:
+            return None
+        if not ireq.specifier.contains(decision.version, prereleases=True):
+            self._conflict_count += 1
+            log.debug('  {} conflicts with {}'.format(ireq, decision))
+            return causes | frozenset([decision.id])
+        if not decision.extras.issuperset(ireq.extras):
+            decision.extras |= frozenset(ireq.extras)
+            decision.extra_causes |= causes
+            pending.append(decision)
+        return None
+
+    def _get_dependencies(self, decision):
+        extras = tuple(sorted(decision.extras))
+        if extras not in decision.dependencies:
+            ireq = decision.get_ireq()
+            if ireq not in self.dependency_cache:
+                self._metadata_fetch_count += 1
+            decision.dependencies[extras] = list(self._iter_dependencies(ireq))
+        return decision.dependencies[extras]
+
+    def _backjump(self, incompatibility):
+        """
+        Learn an incompatibility and jump back to the latest decision
+        which it does not exclude.
+        """
+        log.debug('  learned incompatibility: {}'.format(', '.join(
+            '{}=={}'.format(*x) if x[1] else x[0]
+            for x in sorted(incompatibility, key=str))))
+        self._incompatibilities.append(incompatibility)
+        for key in {key for (key, _) in incompatibility}:
+            self._incompatibilities_by_key.setdefault(key, []).append(
+                incompatibility)
+        levels = sorted(self._levels[x] for x in incompatibility)
+        level = levels[-2] if len(levels) > 1 else -1
+        log.debug('  jumping back to {}'.format(
+            self._decisions[level] if level >= 0 else 'start'))
+        del self._decisions[level + 1:]
+
+        # A different version of the dropped packages may be built, see
+        # the comment about build caches in Resolver.resolve
+        self.repository.freshen_build_caches()
+        self._rebuild()
@@ -21,6 +21,59 @@ class BaseRepository(ABC):
     def freshen_build_caches(self):
         """Should start with fresh build/source caches."""
 
+    def close(self):
+        """Should release the resources, like worker processes, in use."""
+
+    def prefetch_candidates(self, ireqs):
+        """
+        Should look up the candidates of the given InstallRequirements
+        ahead of time, so that the following find_best_match calls can
+        be answered without waiting for the index.
+        """
+
+    def iter_prefetch_candidates(self, ireqs):
+        """
+        Like prefetch_candidates, but yields each of the given
+        InstallRequirements in order as soon as its candidates are
+        available, so that the caller can go on with it while the
+        candidates of the others are looked up.
+        """
+        ireqs = list(ireqs)
+        self.prefetch_candidates(ireqs)
+        return iter(ireqs)
+
+    def start_getting_dependencies(self, ireqs):
+        """
+        Should start getting the dependencies of the given pinned
+        InstallRequirements in the background, since they will be asked
+        for soon with get_dependencies or get_many_dependencies.
+        """
+
+    def get_likely_match(self, ireq, prereleases=None):
+        """
+        Should return the likely best match for the given
+        InstallRequirement, if it can be found without waiting for the
+        index, or None.
+        """
+        return None
+
+    def prefetch_dependencies(self, ireqs):
+        """
+        Should start getting the dependencies of the given pinned
+        InstallRequirements in the background, so that the following
+        get_dependencies calls can be answered without waiting for the
+        preparation.  The requirements are speculative and may never be
+        asked for.
+        """
+
+    def pop_prefetched_dependencies(self):
+        """
+        Should return the dependencies got by prefetch_dependencies
+        which are ready, as (InstallRequirement, dependencies) pairs.
+        Each pair is returned only once.
+        """
+        return []
+
     @abstractmethod
     def find_best_match(self, ireq):
         """
@@ -38,6 +91,16 @@ class BaseRepository(ABC):
             raise TypeError('Expected pinned or editable InstallRequirement, got {}'.format(ireq))
         return self._get_dependencies(ireq)
 
+    def get_many_dependencies(self, ireqs):
+        """
+        Given a list of pinned or editable InstallRequirements, returns
+        a list of their dependency sets in the same order.
+
+        Implementations may prepare the requirements concurrently.  See
+        get_dependencies.
+        """
+        return [self.get_dependencies(ireq) for ireq in ireqs]
+
     def prepare_ireq(self, ireq):
         """
         Prepare install requirement for requirement analysis.
@@ -48,10 +48,36 @@ class LocalRequirementsRepository(BaseRepository):
     def freshen_build_caches(self):
         self.repository.freshen_build_caches()
 
-    def find_best_match(self, ireq, prereleases=None):
-        key = key_from_ireq(ireq)
-        existing_pin = self.existing_pins.get(key)
+    def close(self):
+        self.repository.close()
+
+    def prefetch_candidates(self, ireqs):
+        self.repository.prefetch_candidates(
+            ireq for ireq in ireqs
+            if not self._get_satisfying_pin(ireq))
+
+    def iter_prefetch_candidates(self, ireqs):
+        ireqs = list(ireqs)
+        lookups = self.repository.iter_prefetch_candidates(
+            ireq for ireq in ireqs
+            if not self._get_satisfying_pin(ireq))
+        for ireq in ireqs:
+            if not self._get_satisfying_pin(ireq):
+                next(lookups)
+            yield ireq
+
+    def start_getting_dependencies(self, ireqs):
+        self.repository.start_getting_dependencies(ireqs)
+
+    def _get_satisfying_pin(self, ireq):
+        existing_pin = self.existing_pins.get(key_from_ireq(ireq))
         if existing_pin and ireq_satisfied_by_existing_pin(ireq, existing_pin):
+            return existing_pin
+        return None
+
+    def find_best_match(self, ireq, prereleases=None):
+        existing_pin = self._get_satisfying_pin(ireq)
+        if existing_pin:
             version = as_tuple(existing_pin)[1]
             return make_install_requirement(
                 existing_pin.name, version,
@@ -59,6 +85,20 @@ class LocalRequirementsRepository(BaseRepository):
         else:
             return self.repository.find_best_match(ireq, prereleases)
 
+    def get_likely_match(self, ireq, prereleases=None):
+        if self._get_satisfying_pin(ireq):
+            return self.find_best_match(ireq, prereleases)
+        return self.repository.get_likely_match(ireq, prereleases)
+
+    def prefetch_dependencies(self, ireqs):
+        self.repository.prefetch_dependencies(ireqs)
+
+    def pop_prefetched_dependencies(self):
+        return self.repository.pop_prefetched_dependencies()
+
+    def get_many_dependencies(self, ireqs):
+        return self.repository.get_many_dependencies(ireqs)
+
     def _get_dependencies(self, ireq):
         return self.repository._get_dependencies(ireq)
 
@@ -0,0 +1,157 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import sys
+from email.parser import FeedParser
+
+from pip._vendor import pkg_resources
+from pip._vendor.packaging.specifiers import InvalidSpecifier, SpecifierSet
+
+from .._pip_compat import install_req_from_line
+from ..exceptions import DependencyResolutionFailed
+from ..utils import get_pinned_version, key_from_ireq
+
+#: Metadata files needed for the dependencies by distribution format
+METADATA_FILES = {
+    'dist-info': ('METADATA',),
+    'egg-info': ('PKG-INFO', 'requires.txt', 'depends.txt'),
+}
+
+
+class MetadataStore(object):
+    """
+    Store of the environment independent metadata of prepared packages.
+
+    The repositories of several target environments may share a store,
+    so that each package version is downloaded and prepared only once.
+    The metadata files are stored as is, and the environment markers of
+    the dependencies are evaluated from them for each target, like pip
+    does when preparing the package.
+
+    The metadata is assumed to be the same for all the files of
+    a package version, like pip assumes when installing.
+    """
+    def __init__(self):
+        self._snapshots = {}
+
+    def __contains__(self, ireq):
+        return self._get_key(ireq) in self._snapshots
+
+    def add(self, ireq, dist):
+        """
+        Store the metadata of a prepared pinned requirement.
+
+        :type ireq: InstallRequirement
+        :type dist: pkg_resources.Distribution
+        """
+        kind = (
+            'dist-info' if isinstance(dist, pkg_resources.DistInfoDistribution)
+            else 'egg-info')
+        files = {name: dist.get_metadata(name)
+                 for name in METADATA_FILES[kind] if dist.has_metadata(name)}
+        self.add_snapshot({
+            'key': self._get_key(ireq),
+            'kind': kind,
+            'project_name': dist.project_name,
+            'version': dist.version,
+            'files': files,
+        })
+
+    def add_snapshot(self, snapshot):
+        """
+        Store metadata snapshot got with get_snapshot, e.g. from another
+        process.
+
+        :type snapshot: dict
+        """
+        self._snapshots[tuple(snapshot['key'])] = snapshot
+
+    def get_snapshot(self, ireq):
+        """
+        Get the stored metadata of a pinned requirement as a picklable
+        dict, or None.
+        """
+        return self._snapshots.get(self._get_key(ireq))
+
+    def get_dependencies(self, ireq, target=None):
+        """
+        Get dependencies of a pinned requirement from the stored metadata.
+
+        :param target:
+          The environment to evaluate the markers and the Python version
+          requirement for, or None for the running interpreter
+        :type target: prequ.target.TargetEnvironment|None
+        :return: The dependencies, or None if the metadata is not stored
+        :rtype: set[InstallRequirement]|None
+        """
+        snapshot = self.get_snapshot(ireq)
+        if snapshot is None:
+            return None
+        if target is None:
+            return _get_dependencies(ireq, snapshot, sys.version_info[:3])
+        with target.patched_markers():
+            return _get_dependencies(
+                ireq, snapshot,
+                target.py_version_info or sys.version_info[:3])
+
+    @staticmethod
+    def _get_key(ireq):
+        return (key_from_ireq(ireq), get_pinned_version(ireq))
+
+
+def _get_dependencies(ireq, snapshot, py_version_info):
+    metadata = _SnapshotMetadata(snapshot['files'])
+    dist_cls = (
+        pkg_resources.DistInfoDistribution if snapshot['kind'] == 'dist-info'
+        else pkg_resources.Distribution)
+    dist = dist_cls(
+        project_name=snapshot['project_name'], version=snapshot['version'],
+        metadata=metadata)
+    _check_requires_python(ireq, metadata, py_version_info)
+
+    extras = sorted(set(dist.extras) & set(ireq.extras))
+    dependencies = set()
+    for requirement in dist.requires(extras):
+        dependency = install_req_from_line(
+            str(requirement), constraint=ireq.constraint)
+        if dependency.match_markers(extras):
+            dependencies.add(dependency)
+    return dependencies
+
+
+def _check_requires_python(ireq, metadata, py_version_info):
+    requires_python = None
+    for name in ('METADATA', 'PKG-INFO'):
+        if metadata.has_metadata(name):
+            parser = FeedParser()
+            parser.feed(metadata.get_metadata(name))
+            requires_python = parser.close().get('Requires-Python')
+            break
+    try:
+        specifier = SpecifierSet(requires_python or '')
+    except InvalidSpecifier:
+        return
+    version = '.'.join(str(x) for x in py_version_info)
+    if not specifier.contains(version, prereleases=True):
+        raise DependencyResolutionFailed(ireq, (
+            'Package {} requires a different Python: '
+            "{} not in '{}'").format(
+                ireq.name, version, str(specifier)))
+
+
+class _SnapshotMetadata(pkg_resources.EmptyProvider):
+    """
+    Metadata provider of pkg_resources serving the stored files.
+    """
+    def __init__(self, files):
+        self._files = files
+
+    def has_metadata(self, name):
+        return name in self._files
+
+    def get_metadata(self, name):
+        return self._files[name]
+
+    def get_metadata_lines(self, name):
+        return pkg_resources.yield_lines(self.get_metadata(name))
@@ -3,8 +3,11 @@ from __future__ import (
     absolute_import, division, print_function, unicode_literals)
 
 import hashlib
+import multiprocessing
 import os
+import pickle
 from contextlib import contextmanager
+from multiprocessing.pool import MaybeEncodingError, ThreadPool
 from shutil import rmtree
 
 import pip
@@ -13,15 +16,21 @@ import pkg_resources
 from .._compat import TemporaryDirectory
 from .._log_utils import collect_logs
 from .._pip_compat import (
-    FAVORITE_HASH, InstallationError, PackageFinder, PyPI, RequirementPreparer,
-    RequirementSet, RequirementTracker, Resolver, WheelCache,
-    create_package_finder, is_file_url, url_to_path)
+    CAN_SKIP_WHEEL_CHECK, FAVORITE_HASH, PIP_192_OR_NEWER, InstallationError,
+    PackageFinder, PyPI, RequirementPreparer, RequirementSet,
+    RequirementTracker, Resolver, WheelCache, create_package_finder,
+    install_req_from_line, is_file_url, pip_download, url_to_path)
 from ..cache import CACHE_DIR
-from ..exceptions import DependencyResolutionFailed, NoCandidateFound
+from ..exceptions import (
+    DependencyResolutionFailed, NoCandidateFound, PrequError)
+from ..logging import log
+from ..trace import tracer
 from ..utils import (
-    check_is_hashable, fs_str, is_vcs_link, lookup_table,
-    make_install_requirement)
+    check_is_hashable, dedup, fs_str, get_pinned_version,
+    is_pinned_requirement, is_vcs_link, make_install_requirement)
 from .base import BaseRepository
+from .metadata import MetadataStore
+from .version_index import VersionIndex
 
 
 class PyPIRepository(BaseRepository):
@@ -32,10 +41,27 @@ class PyPIRepository(BaseRepository):
     packages.  Typically, it looks up packages on PyPI (the default implicit
     config), but any other PyPI mirror can be used if index_urls is
     changed/configured on the Finder.
+
+    Candidate lookups of several projects can be done concurrently with
+    prefetch_candidates by using more than one job.  Likewise,
+    get_many_dependencies then prepares the requirements in a pool of
+    worker processes, and prefetch_dependencies prepares at most
+    prefetch_budget speculative requirements in the background.
+
+    With a target environment, the candidates are found and their
+    dependencies evaluated for the target instead of the running
+    interpreter, see prequ.target.TargetEnvironment.  The repositories
+    of several targets may share a MetadataStore, so that each package
+    version is prepared only once for all of them.
     """
-    def __init__(self, pip_options, session):
+    def __init__(self, pip_options, session, jobs=1, prefetch_budget=0,
+                 target=None, metadata_store=None):
         self.session = session
         self.pip_options = pip_options
+        self.jobs = jobs
+        self.prefetch_budget = prefetch_budget
+        self.target = target
+        self.metadata_store = metadata_store
 
         index_urls = [pip_options.index_url] + pip_options.extra_index_urls
         if pip_options.no_index:
@@ -53,6 +79,10 @@ class PyPIRepository(BaseRepository):
         if pkg_resources.parse_version(pip.__version__) < pkg_resources.parse_version('19.0'):
             finder_kwargs["process_dependency_links"] = pip_options.process_dependency_links
 
+        if target is not None:
+            target.check_support()
+            finder_kwargs.update(target.get_finder_kwargs())
+
         self.finder = create_package_finder(**finder_kwargs)
         assert isinstance(self.finder, PackageFinder)
 
@@ -62,11 +92,31 @@ class PyPIRepository(BaseRepository):
         # project
         self._available_candidates_cache = {}
 
+        # stores project_name => VersionIndex mappings for matching the
+        # candidate versions against specifiers
+        self._version_indexes = {}
+
+        # the index URLs and find links of the finder with which the
+        # candidates in the caches above were found
+        self._candidate_urls = self._get_finder_urls()
+
         # stores InstallRequirement => list(InstallRequirement) mappings
         # of all secondary dependencies for the given requirement, so we
         # only have to go to disk once for each requirement
         self._dependencies_cache = {}
 
+        # Pool of worker processes for get_many_dependencies, created
+        # when first needed
+        self._dependency_workers = None
+
+        # stores requirement line => AsyncResult mappings of the
+        # dependencies being prepared by prefetch_dependencies
+        self._prefetched = {}
+
+        # AsyncResults of the prefetches dropped before they were asked
+        # for, which close has to cancel, if they are still running
+        self._dropped_prefetches = []
+
         # Setup file paths
         self.freshen_build_caches()
         self._download_dir = fs_str(os.path.join(CACHE_DIR, 'pkgs'))
@@ -92,12 +142,118 @@ class PyPIRepository(BaseRepository):
         rmtree(self._download_dir, ignore_errors=True)
         rmtree(self._wheel_download_dir, ignore_errors=True)
 
+    def close(self):
+        """
+        Stop the worker processes preparing dependencies, if any.
+
+        The dependencies prefetched but not asked for are dropped, and
+        the preparations still running for them are cancelled.  The
+        workers are started again, if the repository is used after
+        closing.
+        """
+        workers = self._dependency_workers
+        prefetched = (
+            list(self._prefetched.values()) + self._dropped_prefetches)
+        self._dependency_workers = None
+        self._prefetched = {}
+        self._dropped_prefetches = []
+        if workers is None:
+            return
+        if any(not result.ready() for result in prefetched):
+            # The prefetches are speculative, so don't wait for them
+            workers.terminate()
+        else:
+            workers.close()
+        workers.join()
+
+    def _get_finder_urls(self):
+        return (tuple(self.finder.index_urls), tuple(self.finder.find_links))
+
+    def _check_finder_urls(self):
+        """
+        Clear the candidate caches if the finder URLs have changed.
+
+        The index URLs and find links of the finder may change between
+        the resolves of a shared session, e.g. by requirement files, and
+        then the candidates found earlier are not valid anymore.  The
+        dependencies being prefetched for the likely matches of those
+        candidates are dropped too.
+        """
+        urls = self._get_finder_urls()
+        if urls != self._candidate_urls:
+            self._candidate_urls = urls
+            self._available_candidates_cache = {}
+            self._version_indexes = {}
+            self._dropped_prefetches.extend(self._prefetched.values())
+            self._prefetched = {}
+
     def find_all_candidates(self, req_name):
+        self._check_finder_urls()
         if req_name not in self._available_candidates_cache:
-            candidates = self.finder.find_all_candidates(req_name)
+            candidates = self._find_all_candidates_from_index(req_name)
             self._available_candidates_cache[req_name] = candidates
         return self._available_candidates_cache[req_name]
 
+    def get_version_index(self, req_name):
+        """
+        Get the sorted version index of the candidates of a project.
+
+        :rtype: VersionIndex
+        """
+        self._check_finder_urls()
+        if req_name not in self._version_indexes:
+            self._version_indexes[req_name] = VersionIndex(
+                self.find_all_candidates(req_name))
+        return self._version_indexes[req_name]
+
+    def _find_all_candidates_from_index(self, req_name):
+        with tracer.span('find_all_candidates', 'index', package=req_name):
+            return self.finder.find_all_candidates(req_name)
+
+    def prefetch_candidates(self, ireqs):
+        """
+        Find candidates of the given InstallRequirements concurrently.
+
+        Uses a pool of at most self.jobs threads.  The results are
+        stored to the candidate cache in the order of the given
+        requirements, so that the end result is identical to looking
+        them up one by one.
+        """
+        for _ireq in self.iter_prefetch_candidates(ireqs):
+            pass
+
+    def iter_prefetch_candidates(self, ireqs):
+        """
+        Find candidates of the given InstallRequirements concurrently.
+
+        Yields each requirement in order as soon as its candidates are
+        in the candidate cache.  See prefetch_candidates.
+        """
+        self._check_finder_urls()
+        ireqs = list(ireqs)
+        req_names = [
+            req_name for req_name in dedup(
+                ireq.name for ireq in ireqs
+                if not (ireq.editable or is_vcs_link(ireq)))
+            if req_name not in self._available_candidates_cache]
+        if self.jobs <= 1 or len(req_names) <= 1:
+            for ireq in ireqs:
+                yield ireq
+            return
+        pool = ThreadPool(min(self.jobs, len(req_names)))
+        try:
+            lookups = zip(req_names, pool.imap(
+                self._find_all_candidates_from_index, req_names))
+            for ireq in ireqs:
+                while (not (ireq.editable or is_vcs_link(ireq)) and
+                       ireq.name not in self._available_candidates_cache):
+                    (req_name, candidates) = next(lookups)
+                    self._available_candidates_cache[req_name] = candidates
+                yield ireq
+        finally:
+            pool.close()
+            pool.join()
+
     def find_best_match(self, ireq, prereleases=None):
         """
         Returns a Version object that indicates the best match for the given
@@ -106,15 +262,13 @@ class PyPIRepository(BaseRepository):
         if ireq.editable or is_vcs_link(ireq):
             return ireq  # return itself as the best match
 
-        all_candidates = self.find_all_candidates(ireq.name)
-        candidates_by_version = lookup_table(all_candidates, key=lambda c: c.version, unique=True)
-        matching_versions = ireq.specifier.filter((candidate.version for candidate in all_candidates),
-                                                  prereleases=prereleases)
+        version_index = self.get_version_index(ireq.name)
+        matching_candidates = version_index.get_matching_candidates(
+            ireq.specifier, prereleases=prereleases)
+        if not matching_candidates:
+            raise NoCandidateFound(ireq, version_index.candidates, self.finder)
 
         # Reuses pip's internal candidate sort key to sort
-        matching_candidates = [candidates_by_version[ver] for ver in matching_versions]
-        if not matching_candidates:
-            raise NoCandidateFound(ireq, all_candidates, self.finder)
 
         # pip <= 19.0.3
         if hasattr(self.finder, "_candidate_sort_key"):
@@ -135,7 +289,165 @@ class PyPIRepository(BaseRepository):
             best_candidate.project, best_candidate.version, ireq.extras, constraint=ireq.constraint
         )
 
+    def get_likely_match(self, ireq, prereleases=None):
+        """
+        Get the best match for the given InstallRequirement, if the
+        candidates of its project have been found already.
+        """
+        self._check_finder_urls()
+        if (ireq.editable or is_vcs_link(ireq) or
+                ireq.name not in self._available_candidates_cache):
+            return None
+        try:
+            return self.find_best_match(ireq, prereleases)
+        except NoCandidateFound:
+            return None
+
+    def prefetch_dependencies(self, ireqs):
+        """
+        Start preparing the given pinned requirements in the background.
+
+        The requirements are prepared in the pool of worker processes
+        used by get_many_dependencies, so nothing is prefetched with
+        a single job.  At most prefetch_budget requirements are
+        prepared in total.
+        """
+        if self.jobs <= 1:
+            return
+        for ireq in ireqs:
+            if self.prefetch_budget <= 0:
+                break
+            if self._start_preparing(ireq):
+                self.prefetch_budget -= 1
+
+    def start_getting_dependencies(self, ireqs):
+        """
+        Start preparing the given pinned requirements in the background.
+
+        The requirements are prepared in the pool of worker processes
+        used by get_many_dependencies, if there is more than one job.
+        """
+        if self.jobs <= 1:
+            return
+        for ireq in ireqs:
+            self._start_preparing(ireq)
+
+    def _start_preparing(self, ireq):
+        line = str(ireq.req)
+        if (ireq.editable or ireq.link or line in self._prefetched or
+                not is_pinned_requirement(ireq) or
+                self._is_in_metadata_store(ireq)):
+            return False
+        self._prefetched[line] = self._get_dependency_workers().apply_async(
+            _get_dependency_lines, self._get_worker_args(line))
+        return True
+
+    def _get_worker_args(self, line):
+        # The index URLs and find links of the finder may have been
+        # changed by requirement files after the workers were started
+        return (line, list(self.finder.index_urls),
+                list(self.finder.find_links))
+
+    def pop_prefetched_dependencies(self):
+        """
+        Get the dependencies prepared in the background so far.
+
+        Failed preparations are dropped, so that their errors are
+        reported by get_dependencies, if the requirement is needed.
+
+        :rtype: list[(InstallRequirement,set[InstallRequirement])]
+        """
+        result = []
+        for line in [x for (x, r) in self._prefetched.items() if r.ready()]:
+            dependency_lines = _get_result_lines(
+                line, self._prefetched.pop(line), self.metadata_store)
+            if dependency_lines is not None:
+                result.append((install_req_from_line(line), {
+                    install_req_from_line(x) for x in dependency_lines}))
+        return result
+
+    def _pop_prefetched_lines(self, ireq):
+        if ireq.editable or ireq.link:
+            return None
+        line = str(ireq.req)
+        async_result = self._prefetched.pop(line, None)
+        return (_get_result_lines(line, async_result, self.metadata_store)
+                if async_result else None)
+
+    def _get_dependency_workers(self):
+        if self._dependency_workers is None:
+            self._dependency_workers = multiprocessing.Pool(
+                self.jobs,
+                initializer=_init_dependency_worker,
+                initargs=(self.pip_options, tracer.enabled, self.target,
+                          self.metadata_store is not None))
+        return self._dependency_workers
+
+    def get_many_dependencies(self, ireqs):
+        """
+        Get dependencies of several requirements concurrently.
+
+        Pinned requirements which are not links are prepared in a pool
+        of self.jobs worker processes, each having its own build and
+        source directories.  Other requirements, and the requirements
+        whose preparation fails in a worker, are handled in this
+        process, so that errors are reported like in get_dependencies.
+        """
+        ireqs = list(ireqs)
+        poolable = [
+            ireq for ireq in ireqs
+            if not ireq.editable and not ireq.link
+            and is_pinned_requirement(ireq)]
+        if self.jobs <= 1 or len(poolable) <= 1:
+            return super(PyPIRepository, self).get_many_dependencies(ireqs)
+
+        workers = self._get_dependency_workers()
+        async_results = {
+            id(ireq): (
+                self._prefetched.pop(str(ireq.req), None) or
+                workers.apply_async(
+                    _get_dependency_lines, self._get_worker_args(str(ireq.req))))
+            for ireq in poolable
+            if not self._is_in_metadata_store(ireq)
+        }
+
+        result = []
+        for ireq in ireqs:
+            async_result = async_results.get(id(ireq))
+            dependency_lines = (
+                _get_result_lines(
+                    str(ireq.req), async_result, self.metadata_store)
+                if async_result else None)
+            if dependency_lines is None:
+                result.append(self.get_dependencies(ireq))
+            else:
+                result.append({
+                    install_req_from_line(line, constraint=ireq.constraint)
+                    for line in dependency_lines})
+        return result
+
+    def _is_in_metadata_store(self, ireq):
+        return (self.metadata_store is not None and not ireq.editable and
+                not ireq.link and is_pinned_requirement(ireq) and
+                ireq in self.metadata_store)
+
     def _get_dependencies(self, ireq):
+        dependency_lines = (
+            self._pop_prefetched_lines(ireq) if self._prefetched else None)
+        if dependency_lines is not None:
+            return {install_req_from_line(line, constraint=ireq.constraint)
+                    for line in dependency_lines}
+        if self._is_in_metadata_store(ireq):
+            return self.metadata_store.get_dependencies(ireq, self.target)
+        with tracer.span('get_dependencies', 'metadata',
+                         package=ireq.name, version=get_pinned_version(ireq)):
+            with trace_preparation(ireq):
+                if self.target is None:
+                    return self._get_dependencies_with_logs(ireq)
+                with self.target.patched_markers():
+                    return self._get_dependencies_with_logs(ireq)
+
+    def _get_dependencies_with_logs(self, ireq):
         wheel_cache = WheelCache(CACHE_DIR, self.pip_options.format_control)
         with collect_logs() as log_collector:
             try:
@@ -210,7 +522,8 @@ class PyPIRepository(BaseRepository):
                 if req_tracker:
                     preparer_kwargs['req_tracker'] = req_tracker
                 preparer = RequirementPreparer(**preparer_kwargs)
-                reqset = RequirementSet()
+                (reqset_kwargs, resolver_kwargs) = self._get_target_kwargs()
+                reqset = RequirementSet(**reqset_kwargs)
                 ireq.is_direct = True
                 reqset.add_requirement(ireq)
                 self.resolver = Resolver(
@@ -225,14 +538,37 @@ class PyPIRepository(BaseRepository):
                     isolated=False,
                     wheel_cache=wheel_cache,
                     use_user_site=False,
+                    **resolver_kwargs
                 )
                 self.resolver.require_hashes = False
+                if self.metadata_store is not None:
+                    _store_metadata_of(ireq, self.resolver, self.metadata_store)
                 deps = self.resolver._resolve_one(reqset, ireq)
             assert ireq.link.url
             self._dependencies_cache[ireq.link.url] = deps
             reqset.cleanup_files()
         return set(deps)
 
+    def _get_target_kwargs(self):
+        """
+        Get keyword arguments of pip's RequirementSet and Resolver.
+
+        :rtype: (dict, dict)
+        """
+        if self.target is None:
+            return ({}, {})
+        # Wheels of the target platform cannot be installed here, but
+        # their metadata can still be read.  Pip versions without the
+        # option are used only for targets matching the running
+        # interpreter, see TargetEnvironment.check_support.
+        reqset_kwargs = {}
+        if CAN_SKIP_WHEEL_CHECK:
+            reqset_kwargs['check_supported_wheels'] = False
+        resolver_kwargs = {}
+        if PIP_192_OR_NEWER:
+            resolver_kwargs['py_version_info'] = self.target.py_version_info
+        return (reqset_kwargs, resolver_kwargs)
+
     def get_hashes(self, ireq):
         """
         Given an InstallRequirement, return a set of hashes that represent all
@@ -244,17 +580,23 @@ class PyPIRepository(BaseRepository):
 
         check_is_hashable(ireq)
 
+        with tracer.span('get_hashes', 'hash', package=ireq.name,
+                         version=get_pinned_version(ireq)):
+            return self._get_hashes(ireq)
+
+    def _get_hashes(self, ireq):
+
         if ireq.link and ireq.link.is_artifact:
             return {self._get_file_hash(ireq.link)}
 
         # We need to get all of the candidates that match our current version
         # pin, these will represent all of the files that could possibly
         # satisfy this constraint.
-        all_candidates = self.find_all_candidates(ireq.name)
-        candidates_by_version = lookup_table(all_candidates, key=lambda c: c.version)
-        matching_versions = list(
-            ireq.specifier.filter((candidate.version for candidate in all_candidates)))
-        matching_candidates = candidates_by_version[matching_versions[0]]
+        version_index = self.get_version_index(ireq.name)
+        matching_version = version_index.get_first_version(
+            version_index.filter(ireq.specifier))
+        matching_candidates = (
+            version_index.candidates_by_version[matching_version])
 
         def get_candidate_link(candidate):
             if hasattr(candidate, "link"):
@@ -267,13 +609,160 @@ class PyPIRepository(BaseRepository):
         }
 
     def _get_file_hash(self, location):
-        h = hashlib.new(FAVORITE_HASH)
-        with open_local_or_remote_file(location, self.session) as fp:
-            for chunk in iter(lambda: fp.read(8096), b""):
-                h.update(chunk)
+        with tracer.span('get_file_hash', 'hash', file=location.filename):
+            h = hashlib.new(FAVORITE_HASH)
+            with open_local_or_remote_file(location, self.session) as fp:
+                for chunk in iter(lambda: fp.read(8096), b""):
+                    h.update(chunk)
         return ":".join([FAVORITE_HASH, h.hexdigest()])
 
 
+@contextmanager
+def trace_preparation(ireq):
+    """
+    Trace the download, unpack and metadata steps of preparing a requirement.
+
+    Wraps the functions of pip doing the steps while preparing the
+    requirement, if tracing is enabled.
+
+    :type ireq: pip.req.InstallRequirement
+    """
+    if not tracer.enabled:
+        yield
+        return
+
+    tags = {'package': ireq.name, 'version': get_pinned_version(ireq)}
+    wrapped = [
+        (pip_download, '_download_http_url', 'download'),
+        (pip_download, 'unpack_file', 'unpack'),
+        (ireq, 'prepare_metadata', 'metadata'),
+        (ireq, 'run_egg_info', 'metadata'),
+    ]
+    originals = []
+    for (obj, attribute, step) in wrapped:
+        func = getattr(obj, attribute, None)
+        if func is not None:
+            originals.append((obj, attribute, obj.__dict__.get(attribute)))
+            setattr(obj, attribute, _traced(func, step, tags))
+    try:
+        yield
+    finally:
+        for (obj, attribute, original) in originals:
+            if original is None:
+                delattr(obj, attribute)
+            else:
+                setattr(obj, attribute, original)
+
+
+def _traced(func, step, tags):
+    def traced_func(*args, **kwargs):
+        with tracer.span(step, 'metadata', **tags):
+            return func(*args, **kwargs)
+    return traced_func
+
+
+#: PyPIRepository of a dependency worker process
+_worker_repository = None
+
+
+def _init_dependency_worker(pip_options, trace=False, target=None,
+                            store_metadata=False):
+    from ..scripts._repo import get_pip_command
+
+    global _worker_repository
+    os.environ[str('PIP_EXISTS_ACTION')] = str('i')
+    if trace:
+        tracer.start()
+    session = get_pip_command()._build_session(pip_options)
+    _worker_repository = PyPIRepository(
+        pip_options, session, target=target,
+        metadata_store=MetadataStore() if store_metadata else None)
+
+
+def _get_dependency_lines(line, index_urls=None, find_links=None):
+    """
+    Get dependencies of a pinned requirement in a worker process.
+
+    Returns the dependencies, the trace events recorded while getting
+    them and the snapshot of the package metadata, if the repository
+    stores it.
+
+    :type line: str
+    :param index_urls: Index URLs of the finder of the main process
+    :type index_urls: list[str]|None
+    :param find_links: Find links of the finder of the main process
+    :type find_links: list[str]|None
+    :rtype: (list[str], list[dict], dict|None)
+    """
+    finder = _worker_repository.finder
+    if index_urls is not None:
+        finder.index_urls[:] = index_urls
+    if find_links is not None:
+        finder.find_links[:] = find_links
+    # Different versions of the same package may be prepared by the
+    # same worker, so start with fresh build directories every time
+    _worker_repository.freshen_build_caches()
+    tracer.events = []
+    ireq = install_req_from_line(line)
+    dependencies = _worker_repository.get_dependencies(ireq)
+    metadata_store = _worker_repository.metadata_store
+    return (sorted(str(dependency.req) for dependency in dependencies),
+            tracer.events,
+            metadata_store.get_snapshot(ireq) if metadata_store else None)
+
+
+def _get_result_lines(line, async_result, metadata_store=None):
+    """
+    Get the dependency lines of a worker process result.
+
+    Adds the trace events of the worker to the tracer and the metadata
+    snapshot to the metadata store, if any.  Returns None, if preparing
+    the requirement failed in the worker or the result could not be
+    passed from it, so that the requirement is prepared again in this
+    process, which reports the possible error.
+
+    :param line: The requirement line given to the worker
+    :rtype: list[str]|None
+    """
+    try:
+        (dependency_lines, trace_events, snapshot) = async_result.get()
+    except (PrequError, InstallationError) as error:
+        log.debug('Preparing {} in a worker process failed: {}'.format(
+            line, error))
+        return None
+    except (MaybeEncodingError, pickle.PicklingError) as error:
+        log.warning(
+            'Could not get the dependencies of {} from a worker '
+            'process, preparing it again: {}'.format(line, error))
+        return None
+    tracer.events.extend(trace_events)
+    if metadata_store is not None and snapshot is not None:
+        metadata_store.add_snapshot(snapshot)
+    return dependency_lines
+
+
+def _store_metadata_of(ireq, resolver, metadata_store):
+    """
+    Make a pip resolver store the metadata of a requirement it prepares.
+
+    The metadata has to be read when the requirement is prepared, since
+    the prepared files are removed afterwards.
+    """
+    if (ireq.editable or ireq.link or not is_pinned_requirement(ireq) or
+            not hasattr(resolver, '_get_abstract_dist_for')):
+        return
+    get_abstract_dist = resolver._get_abstract_dist_for
+
+    def get_abstract_dist_for(req):
+        abstract_dist = get_abstract_dist(req)
+        if req is ireq:
+            metadata_store.add(
+                ireq, abstract_dist.get_pkg_resources_distribution())
+        return abstract_dist
+
+    resolver._get_abstract_dist_for = get_abstract_dist_for
+
+
 @contextmanager
 def open_local_or_remote_file(link, session):
     """
@@ -0,0 +1,250 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import itertools
+import re
+from bisect import bisect_left, bisect_right
+
+from pip._vendor.packaging.specifiers import Specifier, _version_split
+from pip._vendor.packaging.version import Version
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: Pre-release phases of the normalized versions in the order of
+#: precedence
+PRE_PHASES = ('a', 'b', 'rc')
+
+_CANONICAL_PREFIX_RX = re.compile(r'^(0|[1-9]\d*)(\.(0|[1-9]\d*))*$')
+
+
+def is_available():
+    """
+    Check if NumPy is installed for using VersionArray.
+
+    :rtype: bool
+    """
+    return numpy is not None
+
+
+class VersionArray(object):
+    """
+    Versions of a project encoded into a NumPy structured array.
+
+    Each row has the epoch, the release tuple padded with zeros and its
+    length, the pre-release phase and number, the post-release and the
+    development release numbers, and flags for local and legacy
+    versions.  Missing pre, post and dev parts are encoded as -1.
+
+    A specifier set is evaluated against all the versions at once as
+    a boolean mask.  The ordering operators are evaluated by the
+    positions of the versions in the sorted list and the rest by the
+    encoded fields.  Specifiers which cannot be evaluated from the
+    fields, like === or the legacy specifiers, are checked version by
+    version.  The results are the same as with SpecifierSet.filter.
+    """
+    def __init__(self, versions):
+        """
+        Initialize version array.
+
+        :param versions: Distinct versions in ascending order
+        :type versions: list[packaging.version.Version]
+        :raises ImportError: if NumPy is not installed
+        :raises OverflowError:
+          if some part of a version does not fit into 64 bits
+        """
+        if numpy is None:
+            raise ImportError('VersionArray requires NumPy')
+        self.versions = versions
+        width = max([len(v.release) for v in versions
+                     if isinstance(v, Version)] or [1])
+        fields = [
+            ('legacy', numpy.bool_),
+            ('epoch', numpy.int64),
+            ('release', numpy.int64, (width,)),
+            ('release_length', numpy.int64),
+            ('pre_phase', numpy.int8),
+            ('pre', numpy.int64),
+            ('post', numpy.int64),
+            ('dev', numpy.int64),
+            ('local', numpy.bool_),
+        ]
+        # Field names must be native strings for NumPy on Python 2
+        dtype = numpy.dtype([(str(field[0]),) + field[1:] for field in fields])
+        self.array = numpy.array(
+            [_encode(version, width) for version in versions], dtype=dtype)
+        self.width = width
+        self.positions = numpy.arange(len(versions))
+        self.is_pep440 = ~self.array['legacy']
+        self.is_prerelease = (
+            (self.array['pre_phase'] >= 0) | (self.array['dev'] >= 0))
+        self.is_postrelease = self.array['post'] >= 0
+
+    def filter(self, specifier, prereleases=None):
+        """
+        Get the versions matching a specifier set in ascending order.
+
+        :type specifier: packaging.specifiers.SpecifierSet
+        :type prereleases: bool|None
+        :rtype: list
+        """
+        mask = self.get_mask(specifier, prereleases)
+        return [self.versions[i] for i in numpy.flatnonzero(mask)]
+
+    def get_mask(self, specifier, prereleases=None):
+        """
+        Get mask of the versions matching a specifier set.
+
+        :type specifier: packaging.specifiers.SpecifierSet
+        :type prereleases: bool|None
+        :rtype: numpy.ndarray
+        """
+        if prereleases is None:
+            prereleases = specifier.prereleases
+        if not specifier._specs:
+            mask = self.is_pep440.copy()
+            if not prereleases:
+                final_releases = mask & ~self.is_prerelease
+                # Fall back to the pre-releases if there are no final
+                # releases and the pre-releases are not disallowed
+                if final_releases.any() or prereleases is not None:
+                    mask = final_releases
+            return mask
+        mask = numpy.ones(len(self.versions), dtype=bool)
+        for spec in specifier._specs:
+            mask &= self._get_spec_mask(spec, bool(prereleases))
+        return mask
+
+    def _get_spec_mask(self, spec, prereleases):
+        mask = self._compare(spec)
+        if mask is None:
+            return numpy.array([
+                spec.contains(version, prereleases=prereleases)
+                for version in self.versions], dtype=bool)
+        if not prereleases:
+            mask &= ~self.is_prerelease
+        return mask
+
+    def _compare(self, spec):
+        (op, version) = spec._spec
+        if not isinstance(spec, Specifier) or op == '===':
+            return None
+        if version.endswith('.*'):
+            mask = self._get_prefix_mask(version[:-2])
+            if mask is None or op == '==':
+                return mask
+            return self.is_pep440 & ~mask
+        parsed = Version(version)
+        if op == '==':
+            return self._get_equal_mask(parsed)
+        elif op == '!=':
+            return self.is_pep440 & ~self._get_equal_mask(parsed)
+        elif op == '~=':
+            mask = self._get_prefix_mask(_get_compatible_prefix(version))
+            if mask is None:
+                return None
+            return mask & self._get_ordering_mask('>=', parsed)
+        return self._get_ordering_mask(op, parsed)
+
+    def _get_ordering_mask(self, op, parsed):
+        if op in ('<', '>='):
+            position = bisect_left(self.versions, parsed)
+        else:
+            position = bisect_right(self.versions, parsed)
+        if op in ('<', '<='):
+            mask = self.is_pep440 & (self.positions < position)
+        else:
+            mask = self.is_pep440 & (self.positions >= position)
+        # The special rules of the exclusive operators for the releases
+        # of the same base version as the specifier
+        if op == '<' and not parsed.is_prerelease:
+            mask &= ~(self.is_prerelease & self._get_base_mask(parsed))
+        elif op == '>':
+            same_base = self._get_base_mask(parsed)
+            if not parsed.is_postrelease:
+                mask &= ~(self.is_postrelease & same_base)
+            mask &= ~(self.array['local'] & same_base)
+        return mask
+
+    def _get_equal_mask(self, parsed):
+        if parsed.local is not None:
+            start = bisect_left(self.versions, parsed)
+            end = bisect_right(self.versions, parsed)
+            return (self.positions >= start) & (self.positions < end)
+        (pre_phase, pre) = _encode_pre(parsed.pre)
+        post = parsed.post if parsed.post is not None else -1
+        dev = parsed.dev if parsed.dev is not None else -1
+        return (
+            self._get_base_mask(parsed) &
+            (self.array['pre_phase'] == pre_phase) &
+            (self.array['pre'] == pre) &
+            (self.array['post'] == post) &
+            (self.array['dev'] == dev))
+
+    def _get_base_mask(self, parsed):
+        release = self._pad_release(parsed.release)
+        if release is None:
+            return numpy.zeros(len(self.versions), dtype=bool)
+        return (
+            self.is_pep440 &
+            (self.array['epoch'] == parsed.epoch) &
+            (self.array['release'] == release).all(axis=1))
+
+    def _get_prefix_mask(self, prefix):
+        # Prefixes with an epoch or other than release numbers are
+        # matched by their string segments, so leave them to packaging
+        if not _CANONICAL_PREFIX_RX.match(prefix):
+            return None
+        release = tuple(int(x) for x in prefix.split('.'))
+        padded = self._pad_release(release)
+        if padded is None:
+            return numpy.zeros(len(self.versions), dtype=bool)
+        length = min(len(release), self.width)
+        # A version with a shorter release tuple matches only if the
+        # padding zeros are not followed by pre, post or dev segments
+        return (
+            self.is_pep440 &
+            (self.array['epoch'] == 0) &
+            (self.array['release'][:, :length] == padded[:length]).all(
+                axis=1) &
+            ((self.array['release_length'] >= len(release)) |
+             ~(self.is_prerelease | self.is_postrelease)))
+
+    def _pad_release(self, release):
+        if any(release[self.width:]):
+            return None
+        return (tuple(release) + (0,) * self.width)[:self.width]
+
+
+def _encode(version, width):
+    if not isinstance(version, Version):
+        return (True, 0, (0,) * width, 0, -1, -1, -1, -1, False)
+    (pre_phase, pre) = _encode_pre(version.pre)
+    return (
+        False,
+        version.epoch,
+        (tuple(version.release) + (0,) * width)[:width],
+        len(version.release),
+        pre_phase,
+        pre,
+        version.post if version.post is not None else -1,
+        version.dev if version.dev is not None else -1,
+        version.local is not None,
+    )
+
+
+def _encode_pre(pre):
+    if pre is None:
+        return (-1, -1)
+    return (PRE_PHASES.index(pre[0]), pre[1])
+
+
+def _get_compatible_prefix(version):
+    # The same prefix as Specifier._compare_compatible uses
+    segments = itertools.takewhile(
+        lambda x: not x.startswith('post') and not x.startswith('dev'),
+        _version_split(version))
+    return '.'.join(list(segments)[:-1])
@@ -0,0 +1,117 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+from ..intervals import get_interval
+from ..utils import lookup_table
+from . import version_array
+
+#: Minimum number of versions of a project for matching them with
+#: a VersionArray, if NumPy is installed.  With fewer versions the
+#: overhead of the NumPy calls is bigger than the savings.
+MIN_VECTORIZED_VERSIONS = 10
+
+
+class VersionIndex(object):
+    """
+    Sorted index of the candidate versions of a project.
+
+    The versions of the candidates are sorted once, so that matching
+    them against a specifier set is done by narrowing the versions to
+    the VersionInterval of the specifier set with bisect and checking
+    only the versions in that range.  The matches are memoized by the
+    specifier set and the prereleases flag.
+
+    For projects with many versions the matching is vectorized with
+    a VersionArray when NumPy is installed, so that the whole specifier
+    set is evaluated as a boolean mask over all the versions instead.
+
+    The matching gives the same results as filtering all the candidate
+    versions with SpecifierSet.filter, including its fallback to
+    pre-releases when no final releases match.
+    """
+    def __init__(self, candidates, vectorize=None):
+        """
+        Initialize version index.
+
+        :type candidates: list[pip.index.InstallationCandidate]
+        :param vectorize:
+          Whether to match the versions with a VersionArray, which
+          requires NumPy.  By default it is used when NumPy is installed
+          and there are at least MIN_VECTORIZED_VERSIONS versions.
+        :type vectorize: bool|None
+        """
+        self.candidates = candidates
+        self.versions = sorted(set(c.version for c in candidates))
+        #: The last candidate of each version
+        self.best_candidates = lookup_table(
+            candidates, key=lambda c: c.version, unique=True)
+        self.candidates_by_version = lookup_table(
+            candidates, key=lambda c: c.version)
+        self._first_positions = {}
+        for (position, candidate) in enumerate(candidates):
+            self._first_positions.setdefault(candidate.version, position)
+        self._matches = {}
+        if vectorize is None:
+            vectorize = (version_array.is_available() and
+                         len(self.versions) >= MIN_VECTORIZED_VERSIONS)
+        self._array = None
+        if vectorize:
+            try:
+                self._array = version_array.VersionArray(self.versions)
+            except OverflowError:
+                # Some release number is too big for the array, so keep
+                # matching with packaging
+                pass
+
+    def filter(self, specifier, prereleases=None):
+        """
+        Get the versions matching a specifier set in ascending order.
+
+        :type specifier: packaging.specifiers.SpecifierSet
+        :type prereleases: bool|None
+        :rtype: tuple
+        """
+        key = (str(specifier), specifier.prereleases, prereleases)
+        matches = self._matches.get(key)
+        if matches is None:
+            matches = tuple(self._filter(specifier, prereleases))
+            self._matches[key] = matches
+        return matches
+
+    def get_matching_candidates(self, specifier, prereleases=None):
+        """
+        Get the last candidate of each version matching a specifier set.
+
+        :rtype: list[pip.index.InstallationCandidate]
+        """
+        return [self.best_candidates[version]
+                for version in self.filter(specifier, prereleases)]
+
+    def get_first_version(self, versions):
+        """
+        Get the version listed first in the candidates.
+        """
+        return min(versions, key=self._first_positions.__getitem__)
+
+    def _filter(self, specifier, prereleases):
+        if self._array is not None:
+            return self._array.filter(specifier, prereleases)
+        (start, end) = get_interval(specifier).get_range(self.versions)
+        if start >= end:
+            return []
+        if (start, end) == (0, len(self.versions)):
+            return specifier.filter(self.versions, prereleases=prereleases)
+
+        matches = list(specifier.filter(
+            self.versions[start:end], prereleases=prereleases))
+        allow_prereleases = (
+            prereleases if prereleases is not None
+            else specifier.prereleases)
+        if allow_prereleases or (
+                matches and not any(x.is_prerelease for x in matches)):
+            return matches
+
+        # The versions outside of the range may affect whether the
+        # filter falls back to pre-releases, so check them all
+        return specifier.filter(self.versions, prereleases=prereleases)
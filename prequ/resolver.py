@@ -6,15 +6,21 @@ import copy
 import os
 from functools import partial
 from itertools import chain, count
+from operator import attrgetter
 
 import click
 
-from ._pip_compat import install_req_from_line
 from .cache import DependencyCache
+from .exceptions import ConflictingConstraints, OscillatingConstraints
+from .graph import DependencyGraph
+from .intervals import get_interval, simplify_specifier
 from .logging import log
+from .trace import tracer
 from .utils import (
-    UNSAFE_PACKAGES, first, format_requirement, format_specifier, full_groupby,
-    get_pinned_version, is_pinned_requirement, is_vcs_link, key_from_ireq)
+    UNSAFE_PACKAGES, first, format_requirement, format_requirement_line,
+    format_specifier, get_specifier_version, is_pinned_requirement,
+    is_vcs_link, key_from_ireq, lookup_table, parse_dependency,
+    parse_requirement_line)
 
 green = partial(click.style, fg='green')
 magenta = partial(click.style, fg='magenta')
@@ -23,21 +29,118 @@ magenta = partial(click.style, fg='magenta')
 class RequirementSummary(object):
     """
     Summary of a requirement's properties for comparison purposes.
+
+    The identity of the summary is a (key, specifier, extras) tuple,
+    which is computed once, so that the summaries are cheap to hash
+    and compare.
     """
+    __slots__ = ('key', 'specifier', 'extras', '_identity', '_hash')
+
     def __init__(self, ireq):
-        self.req = ireq.req
-        self.key = key_from_ireq(ireq)
-        self.extras = str(sorted(ireq.extras))
+        self.key = (ireq.key if isinstance(ireq, Constraint)
+                    else key_from_ireq(ireq))
         self.specifier = str(ireq.specifier)
+        self.extras = tuple(sorted(ireq.extras))
+        self._identity = (self.key, self.specifier, self.extras)
+        self._hash = hash(self._identity)
 
     def __eq__(self, other):
-        return str(self) == str(other)
+        if not isinstance(other, RequirementSummary):
+            return NotImplemented
+        return self._hash == other._hash and self._identity == other._identity
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __str__(self):
-        return repr([self.key, self.specifier, self.extras])
+        return repr([self.key, self.specifier, str(list(self.extras))])
+
+
+class Constraint(object):
+    """
+    Combined constraint of a package.
+
+    Holds the combined specifier, extras and constraint flag of the
+    InstallRequirements of a package without copying them.  The
+    InstallRequirement to pass to a repository is built only when
+    requested with to_ireq.  Constraints are immutable.
+    """
+    __slots__ = (
+        'key', 'ireq', 'specifier', 'extras', 'constraint',
+        'pinned_version', '_combined_ireq')
+
+    def __init__(self, key, ireq, specifier, extras, constraint):
+        """
+        Initialize constraint.
+
+        :param ireq: An InstallRequirement of the package to use as
+          a template for the combined InstallRequirement
+        :type ireq: pip.req.InstallRequirement
+        :type specifier: packaging.specifiers.SpecifierSet
+        :type extras: tuple[str]
+        """
+        self.key = key
+        self.ireq = ireq
+        self.specifier = specifier
+        self.extras = extras
+        self.constraint = constraint
+        self.pinned_version = (
+            None if ireq.editable else get_specifier_version(specifier))
+        self._combined_ireq = None
+
+    @classmethod
+    def from_ireq(cls, ireq):
+        return cls(key_from_ireq(ireq), ireq, ireq.specifier,
+                   tuple(sorted(ireq.extras)), ireq.constraint)
+
+    @property
+    def name(self):
+        return self.ireq.name
+
+    @property
+    def editable(self):
+        return self.ireq.editable
+
+    @property
+    def link(self):
+        return self.ireq.link
+
+    def with_specifier(self, specifier):
+        return type(self)(
+            self.key, self.ireq, specifier, self.extras, self.constraint)
+
+    def to_ireq(self):
+        """
+        Get the combined constraint as an InstallRequirement.
+
+        Editable and VCS requirements are returned as is.
+
+        :rtype: pip.req.InstallRequirement
+        """
+        if self.editable or is_vcs_link(self):
+            return self.ireq
+        if self._combined_ireq is None:
+            ireq = copy.copy(self.ireq)
+            ireq.req = copy.copy(self.ireq.req)
+            ireq.req.specifier = self.specifier
+            ireq.req.extras = set(self.extras)
+            ireq.extras = self.extras
+            ireq.constraint = self.constraint
+            ireq.comes_from = None
+            self._combined_ireq = ireq
+        return self._combined_ireq
+
+    def __str__(self):
+        if self.editable or is_vcs_link(self):
+            return str(self.ireq)
+        return '{}{}{}'.format(
+            self.name,
+            '[{}]'.format(','.join(self.extras)) if self.extras else '',
+            self.specifier)
 
 
 class Resolver(object):
@@ -49,6 +152,8 @@ class Resolver(object):
         """
         self.our_constraints = set(x for x in constraints if not x.constraint)
         self.limiters = set(x for x in constraints if x.constraint)
+        self.limiters_by_key = lookup_table(
+            self.limiters, key=key_from_ireq, use_lists=True)
         self.their_constraints = set()
         self.repository = repository
         if cache is None:
@@ -58,6 +163,16 @@ class Resolver(object):
         self.clear_caches = clear_caches
         self.allow_unsafe = allow_unsafe
         self.unsafe_constraints = set()
+        #: Summaries of their_constraints and unsafe_constraints
+        self.round_state = (frozenset(), frozenset())
+        self.dependency_graph = DependencyGraph()
+        #: ResolverCheckpoint to save the state of each round to, if any
+        self.checkpoint = None
+        #: ClosureCache to graft the closures of the best matches from
+        #: and to record them to, if any
+        self.closure_cache = None
+        self._warm_started = False
+        self._first_round = 1
         self._prepare_ireqs(self.our_constraints)
         self._prepare_ireqs(self.limiters)
 
@@ -75,10 +190,155 @@ class Resolver(object):
 
     @property
     def constraints(self):
-        grouped = self._group_constraints(chain(
-            self.our_constraints, self.their_constraints, self.limiters))
+        grouped = self._group_constraints(
+            chain(self.our_constraints, self.their_constraints),
+            with_limiters=True)
         return set(ireq for ireq in grouped if not ireq.constraint)
 
+    def warm_start(self, pins, dependents):
+        """
+        Seed the resolver state from the pins of a previous resolve.
+
+        The packages reachable from our constraints through the edges of
+        the previous dependency graph are assumed to keep their pins, and
+        their dependencies are used as the initial their_constraints.  If
+        the inputs haven't changed since the previous resolve, the first
+        round then only confirms the state.  Nothing is seeded when the
+        caches are to be cleared.
+
+        The results are the same as without the warm start: should the
+        seeded state lead to packages which are not required by our
+        constraints anymore, the resolve is restarted from scratch.
+
+        :param pins: Pinned requirements of the previous resolve by key
+        :type pins: dict[str,InstallRequirement]
+        :param dependents:
+          Keys of the packages depending on each package, e.g. from the
+          "# via" annotations of a requirements file
+        :type dependents: dict[str,set[str]]
+        """
+        if self.clear_caches:
+            return
+        reachable = self._get_reachable_keys(dependents)
+
+        # Only the dependencies already in the cache are used, since the
+        # pins of a changed input might not be available anymore
+        parents = [pins[key] for key in sorted(reachable)
+                   if key in pins and pins[key] in self.dependency_cache]
+        parents.extend(ireq for ireq in self.our_constraints if ireq.editable)
+        safe_constraints = []
+        unsafe_constraints = []
+        for parent in parents:
+            for dep in self._iter_dependencies(parent):
+                if self.allow_unsafe or dep.name not in UNSAFE_PACKAGES:
+                    safe_constraints.append(dep)
+                else:
+                    unsafe_constraints.append(
+                        Constraint.from_ireq(dep).with_specifier(
+                            type(dep.specifier)()))
+        self.their_constraints = set(
+            ireq for ireq in self._group_constraints(
+                safe_constraints, with_limiters=True)
+            if not ireq.constraint)
+        self.unsafe_constraints = list(
+            self._group_constraints(unsafe_constraints))
+        self.round_state = (
+            frozenset(RequirementSummary(t) for t in self.their_constraints),
+            frozenset(RequirementSummary(t) for t in self.unsafe_constraints))
+        self._warm_started = True
+        log.debug('Warm start from {} pins'.format(len(parents)))
+
+    def resume(self, checkpoint):
+        """
+        Restore the resolver state from a checkpoint.
+
+        Continues from the round after the last round saved to the
+        checkpoint, if any.  Nothing is restored when the caches are to
+        be cleared.
+
+        :type checkpoint: prequ.checkpoint.ResolverCheckpoint
+        :return: True, if the state was restored
+        :rtype: bool
+        """
+        state = checkpoint.load() if not self.clear_caches else None
+        if state is None:
+            return False
+        self.their_constraints = {
+            Constraint.from_ireq(parse_requirement_line(line))
+            for line in state['constraints']}
+        self.unsafe_constraints = [
+            Constraint.from_ireq(parse_requirement_line(line))
+            for line in state['unsafe']]
+        self.round_state = (
+            frozenset(RequirementSummary(t) for t in self.their_constraints),
+            frozenset(RequirementSummary(t) for t in self.unsafe_constraints))
+        self._warm_started = state['warm_start']
+        self._first_round = state['round'] + 1
+        log.debug('Resuming from round {}'.format(state['round']))
+        return True
+
+    def _save_checkpoint(self, current_round):
+        self.checkpoint.save({
+            'round': current_round,
+            'constraints': sorted(
+                format_requirement_line(t.to_ireq())
+                for t in self.their_constraints),
+            'unsafe': sorted(
+                format_requirement_line(t.to_ireq())
+                for t in self.unsafe_constraints),
+            'warm_start': self._warm_started,
+        })
+
+    def _get_reachable_keys(self, dependents):
+        """
+        Get keys of the packages reachable from our constraints.
+
+        :param dependents: Keys of the packages depending on each package
+        :type dependents: dict[str,set[str]]
+        :rtype: set[str]
+        """
+        children = {}
+        for (child, parents) in dependents.items():
+            for parent in parents:
+                children.setdefault(parent, set()).add(child)
+        reachable = {key_from_ireq(ireq) for ireq in self.our_constraints}
+        pending = list(reachable)
+        while pending:
+            for child in children.get(pending.pop(), ()):
+                if child not in reachable:
+                    reachable.add(child)
+                    pending.append(child)
+        return reachable
+
+    def _reset_state(self):
+        self.their_constraints = set()
+        self.unsafe_constraints = set()
+        self.round_state = (frozenset(), frozenset())
+        self.dependency_graph = DependencyGraph()
+        self._warm_started = False
+        self._first_round = 1
+
+    def _are_all_required(self, best_matches):
+        """
+        Check if all the best matches are required by our constraints.
+
+        Follows the dependency graph edges of the matched versions from
+        our constraints.
+        """
+        by_key = {key_from_ireq(ireq): ireq for ireq in best_matches}
+        required = {key_from_ireq(ireq) for ireq in self.our_constraints}
+        pending = list(required)
+        while pending:
+            ireq = by_key.get(pending.pop())
+            if ireq is None:
+                continue
+            for key in self.dependency_graph.get_dependencies(ireq):
+                if key not in required:
+                    required.add(key)
+                    pending.append(key)
+        return all(key in required for (key, ireq) in by_key.items()
+                   if not ireq.constraint)
+
     def resolve_hashes(self, ireqs):
         """
         Finds acceptable hashes for all of the given InstallRequirements.
@@ -98,6 +358,8 @@ class Resolver(object):
         if self.clear_caches:
             self.dependency_cache.clear()
             self.repository.clear_caches()
+            if self.closure_cache is not None:
+                self.closure_cache.clear()
 
         self.check_constraints(chain(self.our_constraints,
                                      self.their_constraints))
@@ -108,7 +370,39 @@ class Resolver(object):
 
         # Ignore existing packages
         os.environ[str('PIP_EXISTS_ACTION')] = str('i')  # NOTE: str() wrapping necessary for Python 2/3 compat
-        for current_round in count(start=1):
+        best_matches = self._resolve_rounds(max_rounds)
+        if self._warm_started and not self._are_all_required(best_matches):
+            log.debug('')
+            log.debug('Warm start left packages which are no longer required, '
+                      'resolving from scratch')
+            self._reset_state()
+            best_matches = self._resolve_rounds(max_rounds)
+
+        del os.environ['PIP_EXISTS_ACTION']
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+        self._store_prefetched_dependencies()
+        self.unsafe_constraints = [
+            constraint.to_ireq() for constraint in self.unsafe_constraints]
+        # Only include hard requirements and not pip constraints
+        results = {req for req in best_matches if not req.constraint}
+        if self.closure_cache is not None:
+            self.closure_cache.update(self._get_closures(results))
+        return results
+
+    def _resolve_rounds(self, max_rounds):
+        """
+        Resolve rounds until the constraints are stable.
+
+        :return: The best matches of the last round
+        """
+        # Rounds by the states seen after them, for detecting oscillation.
+        # The states are hashed by their frozensets of summaries, which
+        # cache their hashes, so the lookups are cheap.
+        rounds_by_state = {}
+        states = []
+        first_round = self._first_round
+        for current_round in count(start=first_round):
             if current_round > max_rounds:
                 raise RuntimeError('No stable configuration of concrete packages '
                                    'could be found for the given constraints after '
@@ -117,67 +411,106 @@ class Resolver(object):
 
             log.debug('')
             log.debug(magenta('{:^60}'.format('ROUND {}'.format(current_round))))
-            has_changed, best_matches = self._resolve_one_round()
+            with tracer.span('round {}'.format(current_round), 'resolver',
+                             round=current_round):
+                has_changed, best_matches = self._resolve_one_round()
             log.debug('-' * 60)
             log.debug('Result of round {}: {}'.format(current_round,
                                                       'not stable' if has_changed else 'stable, done'))
             if not has_changed:
                 break
 
+            state = self.round_state
+            previous_round = rounds_by_state.get(state)
+            if previous_round is not None:
+                raise OscillatingConstraints(
+                    previous_round, current_round,
+                    _get_oscillating_constraints(
+                        states[previous_round - first_round:]))
+            rounds_by_state[state] = current_round
+            states.append(state)
+            if self.checkpoint is not None:
+                self._save_checkpoint(current_round)
+
             # If a package version (foo==2.0) was built in a previous round,
             # and in this round a different version of foo needs to be built
             # (i.e. foo==1.0), the directory will exist already, which will
             # cause a pip build failure.  The trick is to start with a new
             # build cache dir for every round, so this can never happen.
             self.repository.freshen_build_caches()
-
-        del os.environ['PIP_EXISTS_ACTION']
-        # Only include hard requirements and not pip constraints
-        return {req for req in best_matches if not req.constraint}
+        return best_matches
 
     @staticmethod
     def check_constraints(constraints):
         pass
 
-    def _group_constraints(self, constraints):
+    def _group_constraints(self, constraints, with_limiters=False):
         """
-        Groups constraints (remember, InstallRequirements!) by their key name,
-        and combining their SpecifierSets into a single InstallRequirement per
+        Groups constraints (InstallRequirements or Constraints) by their key
+        name, and combining their SpecifierSets into a single Constraint per
         package.  For example, given the following constraints:
 
             Django<1.9,>=1.4.2
             django~=1.5
             Flask~=0.7
 
-        This will be combined into a single entry per package:
+        This will be combined into a single entry per package, with the
+        specifiers implied by the others dropped:
 
-            django~=1.5,<1.9,>=1.4.2
+            django<1.9,~=1.5
             flask~=0.7
 
+        The given constraints are not modified or copied.
+
+        If with_limiters is set, the limiting constraints of the packages
+        are combined too.  Only the limiters of the packages in the given
+        constraints are looked up, so the cost doesn't depend on the
+        number of the limiters.
+
+        :type constraints: Iterable[pip.req.InstallRequirement|Constraint]
+        :type with_limiters: bool
+        :rtype: Iterable[Constraint]
         """
-        for _, ireqs in full_groupby(constraints, key=key_from_ireq):
-            ireqs = list(ireqs)
+        groups = {}
+        for ireq in constraints:
+            key = (ireq.key if isinstance(ireq, Constraint)
+                   else key_from_ireq(ireq))
+            groups.setdefault(key, []).append(ireq)
+        if with_limiters:
+            for (key, ireqs) in groups.items():
+                ireqs.extend(self.limiters_by_key.get(key, ()))
+
+        for key in sorted(groups):
+            ireqs = groups[key]
             exception_ireq = first(
                 x for x in ireqs if x.editable or is_vcs_link(x))
             if exception_ireq:
-                yield exception_ireq  # ignore all the other specs: the editable/vcs one is the one that counts
+                # ignore all the other specs: the editable/vcs one is the one that counts
+                yield (exception_ireq if isinstance(exception_ireq, Constraint)
+                       else Constraint.from_ireq(exception_ireq))
+                continue
+
+            if len(ireqs) == 1 and isinstance(ireqs[0], Constraint):
+                yield ireqs[0]
                 continue
 
-            ireqs = iter(ireqs)
-            # deepcopy the accumulator so as to not modify the self.our_constraints invariant
-            combined_ireq = copy.deepcopy(next(ireqs))
-            combined_ireq.comes_from = None
-            for ireq in ireqs:
+            first_ireq = ireqs[0]
+            specifier = first_ireq.specifier
+            extras = set(first_ireq.extras)
+            constraint = first_ireq.constraint
+            for ireq in ireqs[1:]:
                 # NOTE we may be losing some info on dropped reqs here
-                combined_ireq.req.specifier &= ireq.req.specifier
-                combined_ireq.constraint &= ireq.constraint
-                # Return a sorted, de-duped tuple of extras
-                combined_ireq.extras = tuple(sorted(set(tuple(combined_ireq.extras) + tuple(ireq.extras))))
-            pinned_version = get_pinned_version(combined_ireq)
-            if pinned_version:  # Simplify combined_ireq to single version
-                specset = type(combined_ireq.specifier)('==' + pinned_version)
-                combined_ireq.req.specifier = specset
-            yield combined_ireq
+                specifier = specifier & ireq.specifier
+                constraint &= ireq.constraint
+                extras.update(ireq.extras)
+            specifier = simplify_specifier(specifier)
+            pinned_version = get_specifier_version(specifier)
+            if pinned_version:  # Simplify combined constraint to single version
+                specifier = type(specifier)('==' + pinned_version)
+            template = (first_ireq.ireq if isinstance(first_ireq, Constraint)
+                        else first_ireq)
+            yield Constraint(
+                key, template, specifier, tuple(sorted(extras)), constraint)
 
     def _resolve_one_round(self):  # noqa: C901 (too complex)
         """
@@ -191,15 +524,15 @@ class Resolver(object):
         configuration.
         """
         # Sort this list for readability of terminal output
-        constraints = sorted(self.constraints, key=key_from_ireq)
+        constraints = sorted(self.constraints, key=attrgetter('key'))
         unsafe_constraints = []
         original_constraints = copy.copy(constraints)
         if not self.allow_unsafe:
             for constraint in original_constraints:
                 if constraint.name in UNSAFE_PACKAGES:
                     constraints.remove(constraint)
-                    constraint.req.specifier = type(constraint.req.specifier)()
-                    unsafe_constraints.append(constraint)
+                    unsafe_constraints.append(constraint.with_specifier(
+                        type(constraint.specifier)()))
 
         log.debug('Current constraints:')
         for constraint in constraints:
@@ -207,54 +540,144 @@ class Resolver(object):
 
         log.debug('')
         log.debug('Finding the best candidates:')
-        best_matches = {self.get_best_match(ireq) for ireq in constraints}
+        best_matches = set(self._find_best_matches(constraints))
 
         # Find the new set of secondary dependencies
         log.debug('')
         log.debug('Finding secondary dependencies:')
 
-        safe_constraints = list(self.limiters)
-        for best_match in best_matches:
-            for dep in self._iter_dependencies(best_match):
-                if self.allow_unsafe or dep.name not in UNSAFE_PACKAGES:
-                    safe_constraints.append(dep)
-                else:
-                    dep.req.specifier = type(dep.req.specifier)()
-                    unsafe_constraints.append(dep)
-                    unsafe_constraints = list(
-                        self._group_constraints(unsafe_constraints))
+        self._fetch_dependencies(best_matches)
+        dependencies = [
+            dep for best_match in best_matches
+            for dep in self._iter_dependencies(best_match)]
+        if self.closure_cache is not None:
+            dependencies.extend(self._graft_closures(best_matches, constraints))
+        safe_constraints = []
+        for dep in dependencies:
+            if self.allow_unsafe or dep.name not in UNSAFE_PACKAGES:
+                safe_constraints.append(dep)
+            else:
+                unsafe_constraints.append(
+                    Constraint.from_ireq(dep).with_specifier(
+                        type(dep.specifier)()))
+                unsafe_constraints = list(
+                    self._group_constraints(unsafe_constraints))
         # Grouping constraints to make clean diff between rounds
         theirs = set(
-            ireq for ireq in self._group_constraints(safe_constraints)
+            ireq for ireq in self._group_constraints(
+                safe_constraints, with_limiters=True)
             if not ireq.constraint)
 
         # NOTE: We need to compare RequirementSummary objects, since
         # InstallRequirement does not define equality
-        diff = {RequirementSummary(t) for t in theirs} - {RequirementSummary(t) for t in self.their_constraints}
-        removed = ({RequirementSummary(t) for t in self.their_constraints} -
-                   {RequirementSummary(t) for t in theirs})
-        unsafe = ({RequirementSummary(t) for t in unsafe_constraints} -
-                  {RequirementSummary(t) for t in self.unsafe_constraints})
+        summaries = {t: RequirementSummary(t) for t in theirs}
+        new_summaries = frozenset(summaries.values())
+        new_unsafe_summaries = frozenset(
+            RequirementSummary(t) for t in unsafe_constraints)
+        (old_summaries, old_unsafe_summaries) = self.round_state
+        diff = new_summaries - old_summaries
+        removed = old_summaries - new_summaries
+        unsafe = new_unsafe_summaries - old_unsafe_summaries
 
         has_changed = len(diff) > 0 or len(removed) > 0 or len(unsafe) > 0
+        if diff:
+            self._prefetch_dependencies(
+                t for t in theirs if summaries[t] in diff)
         if has_changed:
             log.debug('')
             log.debug('New dependencies found in this round:')
-            for new_dependency in sorted(diff, key=lambda ireq: key_from_ireq(ireq)):
+            for new_dependency in sorted(diff, key=attrgetter('key')):
                 log.debug('  adding {}'.format(new_dependency))
             log.debug('Removed dependencies in this round:')
-            for removed_dependency in sorted(removed, key=lambda ireq: key_from_ireq(ireq)):
+            for removed_dependency in sorted(removed, key=attrgetter('key')):
                 log.debug('  removing {}'.format(removed_dependency))
             log.debug('Unsafe dependencies in this round:')
-            for unsafe_dependency in sorted(unsafe, key=lambda ireq: key_from_ireq(ireq)):
+            for unsafe_dependency in sorted(unsafe, key=attrgetter('key')):
                 log.debug('  remembering unsafe {}'.format(unsafe_dependency))
 
         # Store the last round's results in the their_constraints
         self.their_constraints = theirs
         # Store the last round's unsafe constraints
         self.unsafe_constraints = unsafe_constraints
+        self.round_state = (new_summaries, new_unsafe_summaries)
         return has_changed, best_matches
 
+    def _graft_closures(self, best_matches, constraints):
+        """
+        Get the dependencies of the cached closures of the best matches.
+
+        Grafting the dependencies of a whole closure in one round saves
+        discovering them one level per round.  A closure is grafted
+        only if none of its packages are required yet or limited by
+        a constraint, since then they would not resolve as when the
+        closure was recorded, and only if the dependencies of all of
+        its packages are in the dependency cache.  Otherwise the
+        packages are resolved normally.
+        """
+        known = {constraint.key for constraint in constraints}
+        known.update(self.limiters_by_key)
+        dependencies = []
+        for best_match in sorted(best_matches, key=key_from_ireq):
+            if not is_pinned_requirement(best_match):
+                continue
+            closure = self.closure_cache.get(best_match)
+            if not closure:
+                continue
+            members = [parse_dependency(line) for line in closure]
+            keys = {member.key for member in members}
+            if (keys & known or any(
+                    member.ireq not in self.dependency_cache
+                    for member in members)):
+                log.debug('  not grafting closure of {}'.format(
+                    format_requirement(best_match)))
+                continue
+            log.debug('  grafting closure of {}: {}'.format(
+                format_requirement(best_match), ', '.join(closure)))
+            known.update(keys)
+            for member in members:
+                dependencies.extend(self._iter_dependencies(member.ireq))
+        return dependencies
+
+    def _get_closures(self, results):
+        """
+        Get the closures of the pinned results to record.
+
+        A closure is recorded only if none of its packages are required
+        by packages outside of it or by our constraints, or limited by
+        a constraint, and all of them are pinned.
+
+        :rtype: dict[InstallRequirement,list[str]]
+        """
+        by_key = {key_from_ireq(ireq): ireq for ireq in results}
+        children = {
+            key: self.dependency_graph.get_dependencies(ireq)
+            for (key, ireq) in by_key.items()}
+        parents = {}
+        for (key, child_keys) in children.items():
+            for child_key in child_keys:
+                parents.setdefault(child_key, set()).add(key)
+        outside = {key_from_ireq(ireq) for ireq in self.our_constraints}
+        outside.update(self.limiters_by_key)
+
+        closures = {}
+        for (key, ireq) in sorted(by_key.items()):
+            if not is_pinned_requirement(ireq):
+                continue
+            closure = set()
+            pending = [key]
+            while pending:
+                for child_key in children.get(pending.pop(), ()):
+                    if child_key not in closure and child_key != key:
+                        closure.add(child_key)
+                        pending.append(child_key)
+            if (not closure or closure & outside or
+                    not closure <= set(by_key) or
+                    not all(is_pinned_requirement(by_key[x]) for x in closure) or
+                    any(parents[x] - closure - {key} for x in closure)):
+                continue
+            closures[ireq] = sorted(str(by_key[x].req) for x in closure)
+        return closures
+
     def get_best_match(self, ireq):
         """
         Returns a (pinned or editable) InstallRequirement, indicating the best
@@ -278,6 +701,10 @@ class Resolver(object):
             # NOTE: it's much quicker to immediately return instead of
             # hitting the index server
             best_match = ireq
+        elif get_interval(ireq.specifier).is_empty():
+            # NOTE: conflicting constraints cannot match any version, so
+            # there's no need to hit the index server either
+            raise ConflictingConstraints(ireq)
         else:
             best_match = self.repository.find_best_match(ireq, prereleases=self.prereleases)
 
@@ -286,6 +713,85 @@ class Resolver(object):
                                                                     format_specifier(ireq)))
         return best_match
 
+    def _find_best_matches(self, constraints):
+        """
+        Find the best matches of the given constraints in order.
+
+        The candidates of the constraints are looked up concurrently
+        and getting the dependencies of each best match is started as
+        soon as it is found, while the candidates of the following
+        constraints are still being looked up.
+        """
+        def needs_lookup(constraint):
+            return not (constraint.editable or is_vcs_link(constraint) or
+                        constraint.pinned_version)
+
+        lookups = self.repository.iter_prefetch_candidates(
+            constraint.to_ireq() for constraint in constraints
+            if needs_lookup(constraint))
+        for constraint in constraints:
+            if needs_lookup(constraint):
+                next(lookups)
+            best_match = self.get_best_match(constraint.to_ireq())
+            if (is_pinned_requirement(best_match) and
+                    best_match not in self.dependency_cache):
+                self.repository.start_getting_dependencies([best_match])
+            yield best_match
+
+    def _prefetch_dependencies(self, constraints):
+        """
+        Start getting dependencies of the likely best matches of the given
+        constraints in the background, if they are not in the cache.
+
+        The best matches of the next round are likely the same, so their
+        dependencies are prepared while the candidates of the other
+        packages are looked up.
+        """
+        likely_matches = []
+        for constraint in constraints:
+            if constraint.editable or is_vcs_link(constraint):
+                continue
+            ireq = constraint.to_ireq()
+            likely_match = (
+                ireq if constraint.pinned_version else
+                self.repository.get_likely_match(ireq, self.prereleases))
+            if (likely_match is not None and
+                    likely_match not in self.dependency_cache):
+                likely_matches.append(likely_match)
+        if likely_matches:
+            self.repository.prefetch_dependencies(
+                sorted(likely_matches, key=key_from_ireq))
+
+    def _store_prefetched_dependencies(self):
+        """
+        Store the dependencies prefetched by the repository to the cache.
+        """
+        for (ireq, dependencies) in self.repository.pop_prefetched_dependencies():
+            if ireq not in self.dependency_cache:
+                self.dependency_cache[ireq] = sorted(
+                    str(dependency.req) for dependency in dependencies)
+
+    def _fetch_dependencies(self, ireqs):
+        """
+        Fetch dependencies of the given pinned InstallRequirements to
+        the dependency cache in one go, if they are not there already.
+
+        This lets the repository prepare several requirements at once.
+        Editable requirements are left for _iter_dependencies.
+        """
+        self._store_prefetched_dependencies()
+        missing = sorted((
+            ireq for ireq in ireqs
+            if is_pinned_requirement(ireq) and ireq not in self.dependency_cache
+        ), key=key_from_ireq)
+        if len(missing) <= 1:
+            return
+        for ireq in missing:
+            log.debug('  {} not in cache, need to check index'.format(format_requirement(ireq)), fg='yellow')
+        all_dependencies = self.repository.get_many_dependencies(missing)
+        for (ireq, dependencies) in zip(missing, all_dependencies):
+            self.dependency_cache[ireq] = sorted(str(ireq.req) for ireq in dependencies)
+
     def _iter_dependencies(self, ireq):
         """
         Given a pinned or editable InstallRequirement, collects all the
@@ -311,9 +817,45 @@ class Resolver(object):
         dependency_strings = self.dependency_cache[ireq]
         log.debug('  {:25} requires {}'.format(format_requirement(ireq),
                                                ', '.join(sorted(dependency_strings, key=lambda s: s.lower())) or '-'))
-        for dependency_string in dependency_strings:
-            yield install_req_from_line(
-                dependency_string, constraint=ireq.constraint)
+        dependencies = [
+            parse_dependency(dependency_string, constraint=ireq.constraint)
+            for dependency_string in dependency_strings]
+        self.dependency_graph.set_dependencies(
+            ireq, (dependency.key for dependency in dependencies))
+        for dependency in dependencies:
+            yield dependency.ireq
 
     def reverse_dependencies(self, ireqs):
-        return self.dependency_cache.reverse_dependencies(ireqs)
+        """
+        Get a lookup table of reverse dependencies of the given ireqs.
+
+        The table is built from the dependency graph collected while
+        resolving, so it covers also the editable requirements.
+        """
+        return self.dependency_graph.reverse_dependencies(ireqs)
+
+
+def _get_oscillating_constraints(states):
+    """
+    Get the constraints of the packages which change in a cycle of states.
+
+    :param states: The resolver round states of the cycle
+    :type states: list[(frozenset[RequirementSummary],frozenset[RequirementSummary])]
+    :return: The specifiers of each changing package in each state
+    :rtype: dict[str,list[str]]
+    """
+    tables = [
+        {summary.key: summary for summary in chain(*state)}
+        for state in states]
+    keys = set(chain.from_iterable(tables))
+    return {
+        key: [_format_summary(table.get(key)) for table in tables]
+        for key in keys
+        if len(set(table.get(key) for table in tables)) > 1}
+
+
+def _format_summary(summary):
+    if summary is None:
+        return '(none)'
+    extras = '[{}]'.format(','.join(summary.extras)) if summary.extras else ''
+    return '{}{}'.format(extras, summary.specifier or '(any)')
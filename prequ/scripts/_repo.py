@@ -11,7 +11,8 @@ class PipCommand(Command):
 def get_pip_options_and_pypi_repository(  # noqa: C901
         index_url=None, extra_index_url=None, no_index=None,
         find_links=None, cert=None, client_cert=None, pre=None,
-        trusted_host=None):
+        trusted_host=None, jobs=1, prefetch_budget=0, target=None,
+        metadata_store=None):
     pip_command = get_pip_command()
 
     pip_args = []
@@ -38,7 +39,9 @@ def get_pip_options_and_pypi_repository(  # noqa: C901
     pip_options, _ = pip_command.parse_args(pip_args)
 
     session = pip_command._build_session(pip_options)
-    repository = PyPIRepository(pip_options, session)
+    repository = PyPIRepository(
+        pip_options, session, jobs=jobs, prefetch_budget=prefetch_budget,
+        target=target, metadata_store=metadata_store)
     return (pip_options, repository)
 
 
@@ -8,6 +8,7 @@ from . import compile_in
 from ..configuration import PrequConfiguration
 from ..exceptions import FileOutdated, PrequError
 from ..logging import log
+from ..trace import trace_to_file
 
 click.disable_unicode_literals_warning = True
 
@@ -17,38 +18,104 @@ click.disable_unicode_literals_warning = True
 @click.option('-s', '--silent', is_flag=True, help="Show no output")
 @click.option('-c', '--check', is_flag=True,
               help="Check if the generated files are up-to-date")
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1),
+              help="Number of concurrent index lookups (default is 1)")
+@click.option('--prefetch', 'prefetch_budget', default=0,
+              type=click.IntRange(min=0), metavar='N',
+              help="Prepare the dependencies of at most N likely package "
+              "versions in the background, needs --jobs (default is 0)")
+@click.option('--resolver', 'resolver_name', default=None,
+              type=click.Choice(sorted(compile_in.RESOLVERS)),
+              help="Resolving algorithm to use (default is rounds, or "
+              "incremental with --what-if)")
+@click.option('--single-session/--session-per-file', default=False,
+              help="Resolve all requirement sets in a single session "
+              "sharing the package index data and dependency metadata "
+              "or start from scratch for every file (default)")
+@click.option('--trace', 'trace_file', metavar='FILE',
+              type=click.Path(dir_okay=False, writable=True),
+              help="Write a timeline of the resolving to FILE "
+              "in the Chrome trace format")
+@click.option('--warm-start', is_flag=True, default=False,
+              help="Start resolving from the pins and the annotations "
+              "of the existing output files")
+@click.option('--python-version', metavar='VERSION',
+              help="Resolve for this Python version, e.g. 3.11, instead "
+              "of the running interpreter")
+@click.option('--platform', metavar='PLATFORM',
+              help="Resolve for this platform given as a wheel platform "
+              "tag, e.g. manylinux1_x86_64 or win_amd64, instead of the "
+              "running one")
+@click.option('--implementation', metavar='IMPL',
+              help="Resolve for this Python implementation, e.g. cp or "
+              "pp, instead of the running one")
+@click.option('--target', 'target_tags', multiple=True, metavar='TAG',
+              help="Resolve for each of these target environments, given "
+              "like py3.11-manylinux1_x86_64-cp, and write single output "
+              "files with environment markers on the pins which differ "
+              "between the targets")
+@click.option('--resume', is_flag=True, default=False,
+              help="Save the resolver state after each round and resume "
+              "from the last finished round of an interrupted --resume "
+              "run with the same inputs")
+@click.option('--what-if', is_flag=True, default=False,
+              help="Instead of updating the output files, report how "
+              "upgrading each of their packages on its own would change "
+              "them")
 @click.pass_context
-def main(ctx, verbose, silent, check):
+def main(ctx, verbose, silent, check, jobs, prefetch_budget, resolver_name,
+         single_session, trace_file=None, warm_start=False, resume=False,
+         what_if=False, python_version=None, platform=None,
+         implementation=None, target_tags=()):
     """
     Compile requirements from source requirements.
     """
+    trace_to_file(ctx, trace_file)
     try:
-        compile(ctx, verbose, silent, check)
+        compile(ctx, verbose, silent, check, jobs=jobs,
+                prefetch_budget=prefetch_budget, resolver_name=resolver_name,
+                single_session=single_session, warm_start=warm_start,
+                resume=resume, what_if=what_if,
+                target_options=dict(
+                    python_version=python_version, platform=platform,
+                    implementation=implementation, target_tags=target_tags))
     except PrequError as error:
         if not check or not silent:
             log.error('{}'.format(error))
         raise SystemExit(1)
 
 
-def compile(ctx, verbose, silent, check):
+def compile(ctx, verbose, silent, check, jobs=1, prefetch_budget=0,
+            resolver_name=None, single_session=False, warm_start=False,
+            resume=False, what_if=False, target_options=None):
     info = log.info if not silent else (lambda x: None)
     conf_cls = PrequConfiguration if not check else CheckerPrequConfiguration
     conf = conf_cls.from_directory('.')
 
     compile_opts = dict(conf.get_prequ_compile_options())
-    compile_opts.update(verbose=verbose, silent=(not verbose))
+    compile_opts.update(verbose=verbose, silent=(not verbose), jobs=jobs,
+                        prefetch_budget=prefetch_budget,
+                        resolver_name=resolver_name, warm_start=warm_start,
+                        resume=resume, what_if=what_if,
+                        **(target_options or {}))
     if check:
         compile_opts.update(verbose=False, silent=True)
 
+    if single_session:
+        ctx.meta[compile_in.SHARED_SESSION_KEY] = compile_in.SharedSession()
+
     try:
         for label in conf.labels:
-            if not check:
+            if not check and not what_if:
                 info('*** Compiling {}'.format(
                     conf.get_output_file_for(label)))
             do_one_file(ctx, conf, label, compile_opts)
             if isinstance(conf, CheckerPrequConfiguration):
                 conf.check(label, info, verbose)
     finally:
+        shared_session = ctx.meta.pop(compile_in.SHARED_SESSION_KEY, None)
+        if shared_session:
+            shared_session.close()
         if isinstance(conf, CheckerPrequConfiguration):
             conf.cleanup()
 
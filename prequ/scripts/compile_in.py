@@ -2,31 +2,99 @@
 from __future__ import (
     absolute_import, division, print_function, unicode_literals)
 
+import io
 import os
+import re
 import sys
 import tempfile
 
 import click
 
-from .._pip_compat import Command, install_req_from_line, parse_requirements
-from ..exceptions import PrequError
+from .._pip_compat import (
+    Command, install_req_from_editable, install_req_from_line,
+    parse_requirements)
+from ..cache import ClosureCache, DependencyCache
+from ..checkpoint import CHECKPOINT_DIR
+from ..exceptions import PrequError, UnsupportedTargetEnvironment
 from ..logging import log
-from ..repositories import LocalRequirementsRepository
+from ..repositories.metadata import MetadataStore
 from ..resolver import Resolver
+from ..session import RESOLVERS, ResolutionSession
+from ..target import TargetEnvironment
+from ..trace import trace_to_file, tracer
+from ..universal import resolve_universal
 from ..utils import (
-    UNSAFE_PACKAGES, dedup, is_pinned_requirement, key_from_ireq)
+    UNSAFE_PACKAGES, dedup, is_pinned_requirement, key_from_ireq,
+    parse_dependency)
 from ..writer import OutputWriter
-from ._repo import get_pip_options_and_pypi_repository
 
 click.disable_unicode_literals_warning = True
 
 DEFAULT_REQUIREMENTS_FILE = 'requirements.in'
 
+SHARED_SESSION_KEY = 'prequ.compile_in.shared_session'
+
 
 class PipCommand(Command):
     name = 'PipCommand'
 
 
+class SharedSession(object):
+    """
+    Resolution sessions shared by several compile-in runs.
+
+    Stored to the meta data of the Click context with SHARED_SESSION_KEY,
+    it makes the compile-in commands invoked within the context share
+    the pip session, the candidate lists and the prepared dependency
+    metadata, instead of starting from scratch for every file.
+    """
+    def __init__(self):
+        self._dependency_caches = {}
+        self._closure_caches = {}
+        self._sessions = {}
+        #: Store of the package metadata for resolving for several
+        #: target environments at once
+        self.metadata_store = MetadataStore()
+
+    def get_session(self, **kwargs):
+        """
+        Get resolution session for the given repository options.
+
+        Reuses the session created earlier with the same options.
+        Index URLs and find links added to the package finder from
+        requirement files of the earlier runs are dropped, so that they
+        don't leak to the output of the later runs.
+
+        :rtype: ResolutionSession
+        """
+        key = tuple(sorted(
+            (name, tuple(value) if isinstance(value, (list, tuple)) else value)
+            for (name, value) in kwargs.items()))
+        session = self._sessions.get(key)
+        if session is None:
+            # The caches are shared by the sessions of the same target
+            # environment
+            target = kwargs.get('target')
+            tag = target.cache_tag if target else None
+            if tag not in self._dependency_caches:
+                self._dependency_caches[tag] = DependencyCache(
+                    environment_tag=tag)
+                self._closure_caches[tag] = ClosureCache(environment_tag=tag)
+            session = ResolutionSession.create(
+                cache=self._dependency_caches[tag],
+                closure_cache=self._closure_caches[tag], **kwargs)
+            self._sessions[key] = session
+        session.reset_finder()
+        return session
+
+    def close(self):
+        """
+        Release the resources, like worker processes, of the sessions.
+        """
+        for session in self._sessions.values():
+            session.close()
+
+
 @click.command()  # noqa: C901
 @click.version_option()
 @click.option('-v', '--verbose', is_flag=True, help="Show more output")
@@ -63,11 +131,54 @@ class PipCommand(Command):
               help="Generate pip 8 style hashes in the resulting requirements file.")
 @click.option('--max-rounds', default=10,
               help="Maximum number of rounds before resolving the requirements aborts.")
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1),
+              help="Number of concurrent index lookups (default is 1)")
+@click.option('--prefetch', 'prefetch_budget', default=0,
+              type=click.IntRange(min=0), metavar='N',
+              help="Prepare the dependencies of at most N likely package "
+              "versions in the background, needs --jobs (default is 0)")
+@click.option('--resolver', 'resolver_name', default=None,
+              type=click.Choice(sorted(RESOLVERS)),
+              help="Resolving algorithm to use (default is rounds, or "
+              "incremental when upgrading packages with --upgrade-package)")
+@click.option('--trace', 'trace_file', metavar='FILE',
+              type=click.Path(dir_okay=False, writable=True),
+              help="Write a timeline of the resolving to FILE "
+              "in the Chrome trace format")
+@click.option('--warm-start', is_flag=True, default=False,
+              help="Start resolving from the pins and the annotations "
+              "of the existing output file")
+@click.option('--python-version', metavar='VERSION',
+              help="Resolve for this Python version, e.g. 3.11, instead "
+              "of the running interpreter")
+@click.option('--platform', metavar='PLATFORM',
+              help="Resolve for this platform given as a wheel platform "
+              "tag, e.g. manylinux1_x86_64 or win_amd64, instead of the "
+              "running one")
+@click.option('--implementation', metavar='IMPL',
+              help="Resolve for this Python implementation, e.g. cp or "
+              "pp, instead of the running one")
+@click.option('--target', 'target_tags', multiple=True, metavar='TAG',
+              help="Resolve for each of these target environments, given "
+              "like py3.11-manylinux1_x86_64-cp, and write a single output "
+              "file with environment markers on the pins which differ "
+              "between the targets")
+@click.option('--resume', is_flag=True, default=False,
+              help="Save the resolver state after each round and resume "
+              "from the last finished round of an interrupted --resume "
+              "run with the same inputs")
+@click.option('--what-if', is_flag=True, default=False,
+              help="Instead of updating the output file, report how "
+              "upgrading each of its packages on its own would change it "
+              "(only the packages given with --upgrade-package, if any)")
 @click.argument('src_files', nargs=-1, type=click.Path())
 def cli(verbose, silent, dry_run, pre, rebuild, find_links, index_url,
         extra_index_url, cert, client_cert, trusted_host, header, index,
         emit_trusted_host, annotate, upgrade, upgrade_packages, output_file,
-        allow_unsafe, generate_hashes, src_files, max_rounds):
+        allow_unsafe, generate_hashes, src_files, max_rounds, jobs,
+        resolver_name, trace_file=None, warm_start=False, prefetch_budget=0,
+        resume=False, what_if=False, python_version=None, platform=None,
+        implementation=None, target_tags=()):
     """
     INTERNAL: Compile a single in-file.
 
@@ -103,139 +214,443 @@ def cli(verbose, silent, dry_run, pre, rebuild, find_links, index_url,
     if upgrade and upgrade_packages:
         raise click.BadParameter('Only one of --upgrade or --upgrade-package can be provided as an argument.')
 
+    (target, targets) = get_targets(
+        python_version, platform, implementation, target_tags, what_if)
+
+    what_if_keys = None
+    if what_if:
+        what_if_keys = get_what_if_keys(dst_file, upgrade, upgrade_packages)
+        upgrade_packages = ()
+
     ###
     # Setup
     ###
 
-    (pip_options, repository) = get_pip_options_and_pypi_repository(
+    ctx = click.get_current_context()
+    trace_to_file(ctx, trace_file)
+    shared_session = ctx.meta.get(SHARED_SESSION_KEY)
+    repository_options = dict(
         index_url=index_url, extra_index_url=extra_index_url,
         find_links=find_links, cert=cert, client_cert=client_cert,
-        pre=pre, trusted_host=trusted_host)
-
-    upgrade_install_reqs = {}
-    # Proxy with a LocalRequirementsRepository if --upgrade is not specified
-    # (= default invocation)
-    if not upgrade and os.path.exists(dst_file):
-        ireqs = parse_requirements(dst_file, finder=repository.finder, session=repository.session, options=pip_options)
-        # Exclude packages from --upgrade-package/-P from the existing pins: We want to upgrade.
-        upgrade_reqs_gen = (install_req_from_line(pkg) for pkg in upgrade_packages)
-        upgrade_install_reqs = {
-            key_from_ireq(install_req): install_req
-            for install_req in upgrade_reqs_gen
-        }
-
-        existing_pins = {key_from_ireq(ireq): ireq
-                         for ireq in ireqs
-                         if is_pinned_requirement(ireq) and key_from_ireq(ireq) not in upgrade_install_reqs}
-        repository = LocalRequirementsRepository(existing_pins, repository)
+        pre=pre, trusted_host=trusted_host, jobs=jobs,
+        prefetch_budget=prefetch_budget, target=target)
+    sessions = get_sessions(shared_session, repository_options, targets)
+    try:
+        session = sessions[0]
+        (pip_options, repository) = (session.pip_options, session.repository)
+
+        existing_pins = None
+        existing_pin_list = None
+        existing_dependents = None
+        upgrade_install_reqs = {}
+        # Resolve with the existing pins if --upgrade is not specified
+        # (= default invocation)
+        if not upgrade and os.path.exists(dst_file):
+            # Upgrading single packages re-resolves only the packages whose
+            # constraints change, starting from the existing pins
+            (existing_pin_list, upgrade_install_reqs, existing_dependents) = (
+                read_existing_pins(
+                    dst_file, session, upgrade_packages,
+                    with_dependents=bool(warm_start or upgrade_packages or what_if)))
+            existing_pins = {key_from_ireq(ireq): ireq for ireq in existing_pin_list}
+
+        resolver_name = resolver_name or get_default_resolver(
+            upgrading=bool(upgrade_install_reqs or what_if),
+            existing_dependents=existing_dependents)
+
+        log_finder_urls(repository.finder)
+
+        ###
+        # Parsing/collecting initial requirements
+        ###
+
+        constraints = []
+        for src_file in src_files:
+            is_setup_file = os.path.basename(src_file) == 'setup.py'
+            if is_setup_file or src_file == '-':
+                # pip requires filenames and not files. Since we want to support
+                # piping from stdin, we need to briefly save the input from stdin
+                # to a temporary file and have pip read that.  also used for
+                # reading requirements from install_requires in setup.py.
+                tmpfile = tempfile.NamedTemporaryFile(mode='wt', delete=False)
+                if is_setup_file:
+                    from distutils.core import run_setup
+                    dist = run_setup(src_file)
+                    tmpfile.write('\n'.join(dist.install_requires))
+                else:
+                    tmpfile.write(sys.stdin.read())
+                tmpfile.flush()
+                constraints.extend(parse_requirements(
+                    tmpfile.name, finder=repository.finder, session=repository.session, options=pip_options))
+            else:
+                constraints.extend(parse_requirements(
+                    src_file, finder=repository.finder, session=repository.session, options=pip_options))
+
+        constraints.extend(upgrade_install_reqs.values())
+
+        # The index URLs and find links of the parsed files are used for
+        # all the targets
+        share_finder_urls(sessions)
+
+        # Filter out pip environment markers which do not match (PEP496).
+        # With several targets, the markers are evaluated for each of them.
+        if not targets:
+            constraints = filter_by_markers(constraints, target)
+
+        # Check the given base set of constraints first
+        Resolver.check_constraints(constraints)
+
+        if what_if:
+            scenarios = session.evaluate_upgrades(
+                constraints, existing_pins, keys=what_if_keys,
+                existing_dependents=existing_dependents, resolver=resolver_name,
+                prereleases=pre, allow_unsafe=allow_unsafe, max_rounds=max_rounds)
+            echo_upgrade_report(dst_file, scenarios)
+            return
+
+        resolve_options = dict(
+            resolver=resolver_name, prereleases=pre, clear_caches=rebuild,
+            allow_unsafe=allow_unsafe, max_rounds=max_rounds,
+            existing_dependents=existing_dependents,
+            checkpoint_dir=(CHECKPOINT_DIR if resume else None),
+            resume=resume)
+        try:
+            resolution = resolve(
+                sessions, targets, constraints, existing_pin_list,
+                **resolve_options)
+            results = resolution.results
+            hashes = resolution.get_hashes() if generate_hashes else None
+        except PrequError as e:
+            log.error(str(e))
+            sys.exit(2)
+
+        log.debug('')
+
+        ##
+        # Output
+        ##
+
+        # Get reverse dependency annotations from the dependency graph that
+        # the resolver has built while resolving.  It covers also the
+        # dependencies of the editable packages.
+        reverse_dependencies = None
+        if annotate:
+            reverse_dependencies = resolution.get_reverse_dependencies()
+
+        writer = OutputWriter(src_files, dst_file, dry_run=dry_run,
+                              emit_header=header, emit_index=index,
+                              emit_trusted_host=emit_trusted_host,
+                              annotate=annotate,
+                              generate_hashes=generate_hashes,
+                              default_index_url=repository.DEFAULT_INDEX_URL,
+                              index_urls=repository.finder.index_urls,
+                              trusted_hosts=pip_options.trusted_hosts,
+                              find_links=repository.finder.find_links,
+                              format_control=repository.finder.format_control,
+                              allow_unsafe=allow_unsafe,
+                              silent=silent)
+        markers = {key_from_ireq(ireq): ireq.markers
+                   for ireq in constraints if ireq.markers}
+        markers.update(resolution.markers)
+        with tracer.span('write', 'output', file=dst_file):
+            writer.write(results=results,
+                         unsafe_requirements=resolution.unsafe_constraints,
+                         reverse_dependencies=reverse_dependencies,
+                         primary_packages={key_from_ireq(ireq) for ireq in constraints if not ireq.constraint},
+                         markers=markers,
+                         hashes=hashes)
+
+        if dry_run:
+            log.warning('Dry-run, so nothing updated.')
+    finally:
+        # Stop the worker processes also if the compile fails
+        close_sessions(shared_session, sessions)
+
+
+def get_what_if_keys(dst_file, upgrade, upgrade_packages):
+    """
+    Get keys of the packages whose upgrades to evaluate with --what-if.
+
+    The packages given with --upgrade-package are evaluated, or all the
+    pinned packages of the output file, if none are given.
+
+    :return: The keys of the packages, or None for all the packages
+    :rtype: list[str]|None
+    :raises click.BadParameter:
+      if there is no output file or all packages are to be upgraded
+    """
+    if upgrade or not os.path.exists(dst_file):
+        raise click.BadParameter('--what-if needs an existing output file and cannot be used with --upgrade.')
+    return [key_from_ireq(install_req_from_line(pkg))
+            for pkg in upgrade_packages] or None
+
 
+def read_existing_pins(dst_file, session, upgrade_packages,
+                       with_dependents=False):
+    """
+    Read the pins of an existing output file.
+
+    :param upgrade_packages:
+      Packages to upgrade, given with --upgrade-package.  They are
+      excluded from the pins, since we want to upgrade them.
+    :type session: ResolutionSession
+    :param with_dependents:
+      Whether to read the dependents of the pins from the annotations
+    :return:
+      The pins except of the packages to upgrade, the requirements of
+      the packages to upgrade by key, and the dependents of the pins, if
+      asked for, see read_dependents
+    :rtype: (list[InstallRequirement], dict[str,InstallRequirement],
+             dict[str,set[str]]|None)
+    """
+    repository = session.repository
+    ireqs = parse_requirements(
+        dst_file, finder=repository.finder, session=repository.session,
+        options=session.pip_options)
+    upgrade_reqs_gen = (install_req_from_line(pkg) for pkg in upgrade_packages)
+    upgrade_install_reqs = {
+        key_from_ireq(install_req): install_req
+        for install_req in upgrade_reqs_gen
+    }
+    existing_pin_list = [
+        ireq for ireq in ireqs
+        if is_pinned_requirement(ireq) and key_from_ireq(ireq) not in upgrade_install_reqs]
+    existing_dependents = read_dependents(dst_file) if with_dependents else None
+    return (existing_pin_list, upgrade_install_reqs, existing_dependents)
+
+
+def get_targets(python_version, platform, implementation, target_tags,
+                what_if=False):
+    """
+    Get the target environments given in the command line options.
+
+    :return:
+      The environment to resolve for, if not the running interpreter,
+      and the environments to resolve a universal lock for
+    :rtype: (TargetEnvironment|None, list[TargetEnvironment])
+    :raises click.BadParameter:
+      if an environment is invalid or not supported by the installed pip
+    """
+    try:
+        target = TargetEnvironment.from_options(
+            python_version, platform, implementation)
+        targets = [TargetEnvironment.from_tag(tag)
+                   for tag in dedup(target_tags)]
+        for x in ([target] if target else []) + targets:
+            x.check_support()
+    except (ValueError, UnsupportedTargetEnvironment) as error:
+        raise click.BadParameter(str(error))
+    if targets and (target or what_if):
+        raise click.BadParameter(
+            '--target cannot be used with --what-if, --python-version, '
+            '--platform or --implementation.')
+    return (target, targets)
+
+
+def get_sessions(shared_session, repository_options, targets):
+    """
+    Get resolution sessions for the target environments.
+
+    :return:
+      A session for each of the targets, if any, or a single session
+      for the repository options
+    :rtype: list[ResolutionSession]
+    """
+    if not targets:
+        return [get_session(shared_session, repository_options)]
+    # The sessions of the targets share the package metadata
+    metadata_store = (
+        shared_session.metadata_store if shared_session
+        else MetadataStore())
+    return [
+        get_session(shared_session, dict(
+            repository_options, target=x, metadata_store=metadata_store))
+        for x in targets]
+
+
+def close_sessions(shared_session, sessions):
+    """
+    Close the sessions, unless they are owned by the shared session.
+
+    :type shared_session: SharedSession|None
+    :type sessions: list[ResolutionSession]
+    """
+    if shared_session:
+        return
+    for session in sessions:
+        session.close()
+
+
+def log_finder_urls(finder):
+    """
+    Log the index URLs and find links of a package finder.
+    """
     log.debug('Using indexes:')
-    for index_url in dedup(repository.finder.index_urls):
+    for index_url in dedup(finder.index_urls):
         log.debug('  {}'.format(index_url))
 
-    if repository.finder.find_links:
+    if finder.find_links:
         log.debug('')
         log.debug('Configuration:')
-        for find_link in dedup(repository.finder.find_links):
+        for find_link in dedup(finder.find_links):
             log.debug('  -f {}'.format(find_link))
 
-    ###
-    # Parsing/collecting initial requirements
-    ###
 
-    constraints = []
-    for src_file in src_files:
-        is_setup_file = os.path.basename(src_file) == 'setup.py'
-        if is_setup_file or src_file == '-':
-            # pip requires filenames and not files. Since we want to support
-            # piping from stdin, we need to briefly save the input from stdin
-            # to a temporary file and have pip read that.  also used for
-            # reading requirements from install_requires in setup.py.
-            tmpfile = tempfile.NamedTemporaryFile(mode='wt', delete=False)
-            if is_setup_file:
-                from distutils.core import run_setup
-                dist = run_setup(src_file)
-                tmpfile.write('\n'.join(dist.install_requires))
+def get_session(shared_session, repository_options):
+    """
+    Get resolution session from the shared sessions, if any, or create it.
+
+    :type shared_session: SharedSession|None
+    :rtype: ResolutionSession
+    """
+    if shared_session:
+        return shared_session.get_session(**repository_options)
+    target = repository_options.get('target')
+    return ResolutionSession.create(
+        closure_cache=ClosureCache(
+            environment_tag=target.cache_tag if target else None),
+        **repository_options)
+
+
+def get_default_resolver(upgrading, existing_dependents):
+    """
+    Get name of the resolver to use when none is given.
+
+    Upgrades of single packages are resolved with the incremental
+    resolver, which re-resolves only the packages whose constraints
+    change, when the dependents of the existing pins are known.
+
+    :type upgrading: bool
+    :type existing_dependents: dict[str,set[str]]|None
+    :rtype: str
+    """
+    if upgrading and existing_dependents is not None:
+        return 'incremental'
+    return 'rounds'
+
+
+def filter_by_markers(constraints, target=None):
+    """
+    Filter out the constraints whose markers do not match the target.
+
+    :type constraints: list[InstallRequirement]
+    :param target:
+      The environment to evaluate the markers for, if not the running
+      interpreter
+    :type target: TargetEnvironment|None
+    :rtype: list[InstallRequirement]
+    """
+    marker_environment = target.markers if target else None
+    return [req for req in constraints
+            if req.markers is None or req.markers.evaluate(marker_environment)]
+
+
+def resolve(sessions, targets, constraints, existing_pins=None,
+            **resolve_options):
+    """
+    Resolve the constraints in the sessions.
+
+    With several target environments, the constraints are resolved in
+    the session of each target and the results are merged.
+
+    :param existing_pins: The pins of the existing output file, if any
+    :type existing_pins: list[InstallRequirement]|None
+    :param resolve_options:
+      Options of the resolve, see ResolutionSession.resolve
+    :rtype: prequ.session.Resolution|prequ.universal.UniversalResolution
+    """
+    if targets:
+        return resolve_universal(
+            sessions, constraints, existing_pins=existing_pins,
+            **resolve_options)
+    pins = (
+        {key_from_ireq(ireq): ireq for ireq in existing_pins}
+        if existing_pins is not None else None)
+    return sessions[0].resolve(
+        constraints, existing_pins=pins, **resolve_options)
+
+
+def share_finder_urls(sessions):
+    """
+    Set the finder URLs of the first session to the other sessions.
+
+    :type sessions: list[ResolutionSession]
+    """
+    finder = sessions[0].repository.finder
+    for other_session in sessions[1:]:
+        other_finder = other_session.repository.finder
+        other_finder.index_urls[:] = finder.index_urls
+        other_finder.find_links[:] = finder.find_links
+
+
+def echo_upgrade_report(dst_file, scenarios):
+    """
+    Echo the report of evaluating upgrades of the pins of a file.
+
+    :type scenarios: list[prequ.session.UpgradeScenario]
+    """
+    click.echo('Upgrades of {}:'.format(dst_file))
+    for line in format_upgrade_report(scenarios):
+        click.echo('  {}'.format(line))
+
+
+def format_upgrade_report(scenarios):
+    """
+    Format the results of evaluating upgrades to lines of a report.
+
+    :type scenarios: list[prequ.session.UpgradeScenario]
+    :rtype: Iterable[str]
+    """
+    for scenario in scenarios:
+        name = scenario.old_pin.name if scenario.old_pin else scenario.key
+        if not scenario.resolved:
+            error_lines = str(scenario.error).strip().splitlines()
+            yield '{} {}: FAILED: {}'.format(
+                name, scenario.old_version, error_lines[0])
+            continue
+        if not scenario.is_upgrade:
+            yield '{} {}: up-to-date'.format(name, scenario.old_version)
+            continue
+        yield '{} {} -> {}: ok{}'.format(
+            name, scenario.old_version, scenario.new_version or '(removed)',
+            '' if scenario.changes else ', no other changes')
+        for (key, (old, new)) in sorted(scenario.changes.items()):
+            if old is None:
+                yield '    + {}=={}'.format(key, new)
+            elif new is None:
+                yield '    - {}=={}'.format(key, old)
             else:
-                tmpfile.write(sys.stdin.read())
-            tmpfile.flush()
-            constraints.extend(parse_requirements(
-                tmpfile.name, finder=repository.finder, session=repository.session, options=pip_options))
-        else:
-            constraints.extend(parse_requirements(
-                src_file, finder=repository.finder, session=repository.session, options=pip_options))
+                yield '    {} {} -> {}'.format(key, old, new)
 
-    constraints.extend(upgrade_install_reqs.values())
 
-    # Filter out pip environment markers which do not match (PEP496)
-    constraints = [req for req in constraints
-                   if req.markers is None or req.markers.evaluate()]
+_VIA_RX = re.compile(r'\s*#\s*via\s+(?P<names>.*)$')
+_HASH_RX = re.compile(r'\s--hash=\S+')
 
-    # Check the given base set of constraints first
-    Resolver.check_constraints(constraints)
 
-    try:
-        resolver = Resolver(constraints, repository, prereleases=pre,
-                            clear_caches=rebuild, allow_unsafe=allow_unsafe)
-        results = resolver.resolve(max_rounds=max_rounds)
-        if generate_hashes:
-            hashes = resolver.resolve_hashes(results)
+def read_dependents(path):
+    """
+    Read the dependency edges from the annotations of a requirements file.
+
+    :return: Keys of the packages depending on each package by key
+    :rtype: dict[str,set[str]]
+    """
+    with io.open(path, 'rt', encoding='utf-8') as fp:
+        text = fp.read().replace('\\\n', ' ')
+    dependents = {}
+    for line in text.splitlines():
+        match = _VIA_RX.search(line)
+        if not match:
+            continue
+        requirement = _HASH_RX.sub('', line[:match.start()]).strip()
+        if requirement.startswith('-e '):
+            ireq = install_req_from_editable(requirement[3:].strip())
+        elif requirement and not requirement.startswith('-'):
+            ireq = parse_dependency(requirement).ireq
         else:
-            hashes = None
-    except PrequError as e:
-        log.error(str(e))
-        sys.exit(2)
-
-    log.debug('')
-
-    ##
-    # Output
-    ##
-
-    # Compute reverse dependency annotations statically, from the
-    # dependency cache that the resolver has populated by now.
-    #
-    # TODO (1a): reverse deps for any editable package are lost
-    #            what SHOULD happen is that they are cached in memory, just
-    #            not persisted to disk!
-    #
-    # TODO (1b): perhaps it's easiest if the dependency cache has an API
-    #            that could take InstallRequirements directly, like:
-    #
-    #                cache.set(ireq, ...)
-    #
-    #            then, when ireq is editable, it would store in
-    #
-    #              editables[egg_name][link_without_fragment] = deps
-    #              editables['prequ']['git+...ols.git@future'] = {'click>=3.0', 'six'}
-    #
-    #            otherwise:
-    #
-    #              self[as_name_version_tuple(ireq)] = {'click>=3.0', 'six'}
-    #
-    reverse_dependencies = None
-    if annotate:
-        reverse_dependencies = resolver.reverse_dependencies(results)
-
-    writer = OutputWriter(src_files, dst_file, dry_run=dry_run,
-                          emit_header=header, emit_index=index,
-                          emit_trusted_host=emit_trusted_host,
-                          annotate=annotate,
-                          generate_hashes=generate_hashes,
-                          default_index_url=repository.DEFAULT_INDEX_URL,
-                          index_urls=repository.finder.index_urls,
-                          trusted_hosts=pip_options.trusted_hosts,
-                          find_links=repository.finder.find_links,
-                          format_control=repository.finder.format_control,
-                          allow_unsafe=allow_unsafe,
-                          silent=silent)
-    writer.write(results=results,
-                 unsafe_requirements=resolver.unsafe_constraints,
-                 reverse_dependencies=reverse_dependencies,
-                 primary_packages={key_from_ireq(ireq) for ireq in constraints if not ireq.constraint},
-                 markers={key_from_ireq(ireq): ireq.markers
-                          for ireq in constraints if ireq.markers},
-                 hashes=hashes)
-
-    if dry_run:
-        log.warning('Dry-run, so nothing updated.')
+            continue
+        if ireq.req is None:
+            continue
+        dependents[key_from_ireq(ireq)] = {
+            parse_dependency(name.strip()).key
+            for name in match.group('names').split(',')}
+    return dependents
@@ -1,6 +1,7 @@
 import click
 
 from . import build_wheels, compile, compile_yaml, compile_packagejson, update_versions
+from ..trace import trace_to_file
 
 click.disable_unicode_literals_warning = True
 
@@ -8,11 +9,16 @@ click.disable_unicode_literals_warning = True
 @click.command()
 @click.option('-v', '--verbose', is_flag=True, help="Show more output")
 @click.option('-s', '--silent', is_flag=True, help="Show no output")
+@click.option('--trace', 'trace_file', metavar='FILE',
+              type=click.Path(dir_okay=False, writable=True),
+              help="Write a timeline of the compiling to FILE "
+              "in the Chrome trace format")
 @click.pass_context
-def main(ctx, verbose, silent):
+def main(ctx, verbose, silent, trace_file=None):
     """
     Build wheels and compile requirements.
     """
+    trace_to_file(ctx, trace_file)
     ctx.invoke(compile_yaml.main, verbose=verbose, silent=silent)
     ctx.invoke(compile_packagejson.main, verbose=verbose, silent=silent)
     ctx.invoke(update_versions.main, verbose=verbose, silent=silent)
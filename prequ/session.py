@@ -0,0 +1,466 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import multiprocessing
+import os
+
+from ._pip_compat import install_req_from_line
+from .cache import ClosureCache, DependencyCache
+from .checkpoint import ResolverCheckpoint, get_input_digest
+from .exceptions import PrequError
+from .incremental import IncrementalResolver
+from .pubgrub import PubGrubResolver
+from .repositories import LocalRequirementsRepository, PyPIRepository
+from .resolver import Resolver
+from .scripts._repo import get_pip_command, get_pip_options_and_pypi_repository
+from .utils import (
+    format_requirement_line, get_pinned_version, is_pinned_requirement,
+    key_from_ireq, parse_requirement_line)
+
+RESOLVERS = {
+    'rounds': Resolver,
+    'incremental': IncrementalResolver,
+    'pubgrub': PubGrubResolver,
+}
+
+
+class ResolutionSession(object):
+    """
+    Session for resolving many independent sets of requirements.
+
+    The session owns the repository and the dependency cache, and the
+    warm state in them, like the candidate lists, the version indexes
+    and the prepared dependency metadata, is shared between the resolve
+    calls instead of being rebuilt for every set of requirements.
+    """
+    def __init__(self, repository, pip_options=None, cache=None,
+                 closure_cache=None):
+        """
+        Initialize resolution session.
+
+        :type repository: prequ.repositories.base.BaseRepository
+        :type cache: DependencyCache|None
+        :param closure_cache:
+          Cache of the closures of pinned requirements for the rounds
+          resolver to graft, if any
+        :type closure_cache: prequ.cache.ClosureCache|None
+        """
+        self.repository = repository
+        self.pip_options = pip_options
+        #: The environment to resolve for, if not the running interpreter
+        self.target = getattr(repository, 'target', None)
+        self.dependency_cache = (
+            cache if cache is not None else DependencyCache(
+                environment_tag=(
+                    self.target.cache_tag if self.target else None)))
+        self.closure_cache = closure_cache
+        finder = getattr(repository, 'finder', None)
+        self._finder_state = (
+            (list(finder.index_urls), list(finder.find_links))
+            if finder is not None else None)
+
+    @classmethod
+    def create(cls, cache=None, closure_cache=None, **repository_options):
+        """
+        Create a session with a new PyPI repository.
+
+        :param repository_options:
+          Options of the repository, like index_url, find_links, pre,
+          jobs, prefetch_budget and target, see
+          get_pip_options_and_pypi_repository
+        """
+        (pip_options, repository) = get_pip_options_and_pypi_repository(
+            **repository_options)
+        return cls(repository, pip_options=pip_options, cache=cache,
+                   closure_cache=closure_cache)
+
+    def close(self):
+        """
+        Release the resources of the repository, like worker processes.
+
+        The session can still be used after closing.
+        """
+        self.repository.close()
+
+    def reset_finder(self):
+        """
+        Reset the index URLs and find links of the package finder.
+
+        Drops the index URLs and find links added to the finder since
+        the session was created, e.g. by parsing requirement files, so
+        that they don't leak from one set of requirements to another.
+        """
+        if self._finder_state is None:
+            return
+        (index_urls, find_links) = self._finder_state
+        self.repository.finder.index_urls[:] = index_urls
+        self.repository.finder.find_links[:] = find_links
+
+    def resolve(self, constraints, existing_pins=None, resolver='rounds',
+                prereleases=False, clear_caches=False, allow_unsafe=False,
+                max_rounds=10, existing_dependents=None, checkpoint_dir=None,
+                resume=False):
+        """
+        Resolve a set of constraints to pinned requirements.
+
+        :param constraints: The requirements to resolve
+        :type constraints: list[InstallRequirement]
+        :param existing_pins:
+          Pins to prefer by requirement key, e.g. from an existing
+          requirements file
+        :type existing_pins: dict[str,InstallRequirement]|None
+        :param resolver: Name of the resolving algorithm, see RESOLVERS
+        :param existing_dependents:
+          Keys of the packages depending on each package of the existing
+          pins.  If given, the resolver is warm started from the existing
+          pins, see Resolver.warm_start
+        :type existing_dependents: dict[str,set[str]]|None
+        :param checkpoint_dir:
+          Directory to save the resolver state to after each round, if
+          any.  The state is removed when the resolve succeeds.
+        :param resume:
+          Resume from the state saved by an earlier resolve of the same
+          inputs, if there is one in checkpoint_dir
+        :rtype: Resolution
+        """
+        repository = self.repository
+        if existing_pins is not None:
+            repository = LocalRequirementsRepository(existing_pins, repository)
+        resolver_cls = RESOLVERS[resolver]
+        resolver_obj = resolver_cls(
+            constraints, repository, cache=self.dependency_cache,
+            prereleases=prereleases, clear_caches=clear_caches,
+            allow_unsafe=allow_unsafe)
+        resolver_obj.closure_cache = self.closure_cache
+        resumed = False
+        if checkpoint_dir is not None:
+            finder = getattr(repository, 'finder', None)
+            digest = get_input_digest(
+                constraints, existing_pins, resolver=resolver,
+                prereleases=bool(prereleases), allow_unsafe=allow_unsafe,
+                index_urls=list(finder.index_urls) if finder else None,
+                find_links=list(finder.find_links) if finder else None,
+                target=self.target.cache_tag if self.target else None)
+            resolver_obj.checkpoint = ResolverCheckpoint(digest, checkpoint_dir)
+            if resume:
+                resumed = resolver_obj.resume(resolver_obj.checkpoint)
+        if (not resumed and existing_pins is not None and
+                existing_dependents is not None):
+            resolver_obj.warm_start(existing_pins, existing_dependents)
+        results = resolver_obj.resolve(max_rounds=max_rounds)
+        return Resolution(resolver_obj, results)
+
+    def evaluate_upgrades(self, constraints, existing_pins, keys=None,
+                          existing_dependents=None, resolver=None,
+                          prereleases=False, allow_unsafe=False,
+                          max_rounds=10):
+        """
+        Evaluate upgrading each of the given packages on its own.
+
+        Every scenario is resolved like upgrading a single package with
+        --upgrade-package: the pin of the package is dropped from the
+        existing pins and the package is added to the constraints.  The
+        candidate lookups of the upgraded packages are done concurrently
+        up front.  With a single job of the repository the scenarios are
+        then resolved one by one sharing the warm repository and
+        dependency cache of the session, while the dependencies of the
+        latest versions are prepared in the background.  With more jobs
+        the scenarios are resolved in parallel in worker processes,
+        each with its own repository, sharing the on-disk dependency
+        and closure caches.
+
+        :param constraints: The requirements to resolve
+        :type constraints: list[InstallRequirement]
+        :param existing_pins: The current pins by requirement key
+        :type existing_pins: dict[str,InstallRequirement]
+        :param keys:
+          Keys of the packages to upgrade, or None for all the pinned
+          packages
+        :type keys: Iterable[str]|None
+        :param existing_dependents:
+          Keys of the packages depending on each package of the existing
+          pins, for warm starting the resolver, see resolve
+        :type existing_dependents: dict[str,set[str]]|None
+        :param resolver:
+          Name of the resolving algorithm, or None for the incremental
+          resolver when the dependents are given and the rounds resolver
+          otherwise
+        :rtype: list[UpgradeScenario]
+        """
+        if keys is None:
+            keys = sorted(
+                key for (key, ireq) in existing_pins.items()
+                if is_pinned_requirement(ireq))
+        if resolver is None:
+            resolver = (
+                'incremental' if existing_dependents is not None
+                else 'rounds')
+        upgrades = [
+            (key, existing_pins.get(key), install_req_from_line(
+                existing_pins[key].name if key in existing_pins else key))
+            for key in keys]
+        latest = self._prepare_upgrades(
+            [ireq for (_key, _pin, ireq) in upgrades], prereleases)
+        pending = [
+            (key, upgrade)
+            for ((key, pin, upgrade), best_match) in zip(upgrades, latest)
+            if (pin is None or best_match is None or
+                get_pinned_version(best_match) != get_pinned_version(pin))]
+
+        options = dict(
+            resolver=resolver, prereleases=prereleases,
+            allow_unsafe=allow_unsafe, max_rounds=max_rounds,
+            existing_dependents=existing_dependents)
+        if self._can_resolve_in_workers(len(pending)):
+            outcomes = self._resolve_upgrades_in_workers(
+                constraints, existing_pins, pending, options)
+        else:
+            self.repository.start_getting_dependencies([
+                ireq for ireq in latest
+                if ireq is not None and ireq not in self.dependency_cache])
+            outcomes = [
+                self._resolve_upgrade(
+                    constraints, existing_pins, key, upgrade, options)
+                for (key, upgrade) in pending]
+        outcomes_by_key = {
+            key: outcome for ((key, _), outcome) in zip(pending, outcomes)}
+
+        scenarios = []
+        for (key, pin, _upgrade) in upgrades:
+            if key not in outcomes_by_key:
+                scenarios.append(UpgradeScenario(key, pin, pin))
+                continue
+            (new_pins, error) = outcomes_by_key[key]
+            if error is not None:
+                scenarios.append(UpgradeScenario(key, pin, error=error))
+                continue
+            changes = _get_pin_changes(existing_pins, new_pins, skip=key)
+            scenarios.append(UpgradeScenario(
+                key, pin, new_pins.get(key), changes=changes))
+        return scenarios
+
+    def _prepare_upgrades(self, upgrades, prereleases):
+        """
+        Find the latest versions of the upgrades.
+
+        :return: The latest version of each upgrade, or None if there is
+          no matching version
+        :rtype: list[InstallRequirement|None]
+        """
+        self.repository.prefetch_candidates(upgrades)
+        latest = []
+        for ireq in upgrades:
+            try:
+                latest.append(self.repository.find_best_match(
+                    ireq, prereleases=prereleases))
+            except PrequError:
+                latest.append(None)
+        return latest
+
+    def _resolve_upgrade(self, constraints, existing_pins, key, upgrade,
+                         options):
+        """
+        Resolve the scenario of upgrading a single package.
+
+        :param options: Options of the resolve, see resolve
+        :type options: dict
+        :return: The new pins by requirement key, or the error from
+          resolving the upgrade
+        :rtype: (dict[str,InstallRequirement]|None, PrequError|None)
+        """
+        scenario_pins = {
+            k: v for (k, v) in existing_pins.items() if k != key}
+        try:
+            resolution = self.resolve(
+                constraints + [upgrade], existing_pins=scenario_pins,
+                **options)
+        except PrequError as error:
+            return (None, error)
+        new_pins = {
+            key_from_ireq(ireq): ireq for ireq in resolution.results
+            if is_pinned_requirement(ireq)}
+        return (new_pins, None)
+
+    def _can_resolve_in_workers(self, count):
+        return (
+            count > 1 and self.pip_options is not None and
+            isinstance(self.repository, PyPIRepository) and
+            self.repository.jobs > 1)
+
+    def _resolve_upgrades_in_workers(self, constraints, existing_pins,
+                                     upgrades, options):
+        """
+        Resolve the upgrade scenarios in parallel in worker processes.
+
+        The requirements are passed to the workers and back as
+        requirement lines.
+
+        :type upgrades: list[(str, InstallRequirement)]
+        :rtype: list[(dict[str,InstallRequirement]|None, PrequError|None)]
+        """
+        finder = self.repository.finder
+        closure_cache = self.closure_cache
+        pool = multiprocessing.Pool(
+            self.repository.jobs, initializer=_init_upgrade_worker,
+            initargs=(
+                self.pip_options, self.target,
+                (list(finder.index_urls), list(finder.find_links)),
+                (self.dependency_cache.cache_dir,
+                 self.dependency_cache.environment_tag),
+                (closure_cache.cache_dir, closure_cache.environment_tag)
+                if closure_cache is not None else None,
+                [(format_requirement_line(ireq), ireq.constraint)
+                 for ireq in constraints],
+                {key: format_requirement_line(ireq)
+                 for (key, ireq) in existing_pins.items()},
+                options))
+        try:
+            async_results = [
+                pool.apply_async(
+                    _resolve_upgrade_in_worker, (key, str(upgrade.req)))
+                for (key, upgrade) in upgrades]
+            outcomes = []
+            for async_result in async_results:
+                (pin_lines, error_message) = async_result.get()
+                if error_message is not None:
+                    outcomes.append((None, PrequError(error_message)))
+                    continue
+                outcomes.append(({
+                    key: parse_requirement_line(line)
+                    for (key, line) in pin_lines.items()}, None))
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+        return outcomes
+
+
+#: Session and inputs of an upgrade worker process
+_worker_state = None
+
+
+def _init_upgrade_worker(pip_options, target, finder_state, cache_location,
+                         closure_cache_location, constraint_lines, pin_lines,
+                         options):
+    global _worker_state
+    os.environ[str('PIP_EXISTS_ACTION')] = str('i')
+    repository = PyPIRepository(
+        pip_options, get_pip_command()._build_session(pip_options),
+        target=target)
+    (index_urls, find_links) = finder_state
+    repository.finder.index_urls[:] = index_urls
+    repository.finder.find_links[:] = find_links
+    session = ResolutionSession(
+        repository, pip_options=pip_options,
+        cache=DependencyCache(*cache_location),
+        closure_cache=(
+            ClosureCache(*closure_cache_location)
+            if closure_cache_location is not None else None))
+    constraints = [
+        parse_requirement_line(line, constraint=constraint)
+        for (line, constraint) in constraint_lines]
+    existing_pins = {
+        key: parse_requirement_line(line)
+        for (key, line) in pin_lines.items()}
+    _worker_state = (session, constraints, existing_pins, options)
+
+
+def _resolve_upgrade_in_worker(key, upgrade_line):
+    """
+    Resolve the scenario of upgrading a single package in a worker.
+
+    :return: The new pin lines by requirement key, or the message of
+      the error from resolving the upgrade
+    :rtype: (dict[str,str]|None, str|None)
+    """
+    (session, constraints, existing_pins, options) = _worker_state
+    (new_pins, error) = session._resolve_upgrade(
+        constraints, existing_pins, key, install_req_from_line(upgrade_line),
+        options)
+    if error is not None:
+        return (None, str(error))
+    return ({k: format_requirement_line(ireq)
+             for (k, ireq) in new_pins.items()}, None)
+
+
+class UpgradeScenario(object):
+    """
+    Result of evaluating an upgrade of a single package.
+    """
+    def __init__(self, key, old_pin, new_pin=None, changes=None, error=None):
+        #: Key of the upgraded package
+        self.key = key
+        #: The current pin of the package
+        self.old_pin = old_pin
+        #: The pin of the package after the upgrade, or None if the
+        #: upgrade failed or the package is no longer needed
+        self.new_pin = new_pin
+        #: Changed versions of the other packages by key, as (old, new)
+        #: tuples with None for an added or removed package
+        self.changes = changes or {}
+        #: The error from resolving the upgrade, if it failed
+        self.error = error
+
+    @property
+    def old_version(self):
+        return get_pinned_version(self.old_pin) if self.old_pin else None
+
+    @property
+    def new_version(self):
+        return get_pinned_version(self.new_pin) if self.new_pin else None
+
+    @property
+    def resolved(self):
+        return self.error is None
+
+    @property
+    def is_upgrade(self):
+        """
+        Check if the package would be upgraded to another version.
+        """
+        return self.resolved and self.new_version != self.old_version
+
+
+def _get_pin_changes(old_pins, new_pins, skip=None):
+    changes = {}
+    for key in set(old_pins) | set(new_pins):
+        old = old_pins.get(key)
+        new = new_pins.get(key)
+        old_version = get_pinned_version(old) if old is not None else None
+        new_version = get_pinned_version(new) if new is not None else None
+        if key != skip and old_version != new_version:
+            changes[key] = (old_version, new_version)
+    return changes
+
+
+class Resolution(object):
+    """
+    Result of resolving a set of constraints in a session.
+    """
+    def __init__(self, resolver, results):
+        self.resolver = resolver
+        #: The pinned requirements
+        self.results = results
+        #: Constraints of the unsafe packages, if they were not pinned
+        self.unsafe_constraints = resolver.unsafe_constraints
+        #: Environment markers of the results, which are set only when
+        #: resolving for several target environments, see
+        #: prequ.universal.UniversalResolution
+        self.markers = {}
+
+    def get_hashes(self):
+        """
+        Get hashes of the pinned requirements.
+
+        :rtype: dict[InstallRequirement,set[str]]
+        """
+        return self.resolver.resolve_hashes(self.results)
+
+    def get_reverse_dependencies(self):
+        """
+        Get reverse dependencies of the pinned requirements.
+
+        :rtype: dict[str,set[str]]
+        """
+        return self.resolver.reverse_dependencies(self.results)
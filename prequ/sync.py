@@ -10,7 +10,7 @@ from ._pip_compat import DEV_PKGS, stdlib_pkgs
 from .exceptions import IncompatibleRequirements, UnsupportedConstraint
 from .utils import (
     flat_map, format_requirement, get_hashes_from_ireq, is_pinned_requirement,
-    is_vcs_link, key_from_dist, key_from_ireq, key_from_req)
+    is_vcs_link, key_from_dist, key_from_ireq, parse_dependency)
 
 PACKAGES_TO_IGNORE = [
     '-markerlib',
@@ -45,11 +45,11 @@ def dependency_tree(installed_keys, root_key):
         dependencies.add(v.key)
 
         for dep_specifier in v.requires():
-            dep_name = key_from_req(dep_specifier)
-            if dep_name in installed_keys:
-                dep = installed_keys[dep_name]
+            parsed = parse_dependency(str(dep_specifier))
+            if parsed.key in installed_keys:
+                dep = installed_keys[parsed.key]
 
-                specifier = dep_specifier.specifier
+                specifier = parsed.ireq.specifier
                 if specifier.contains(dep.version, prereleases=True):
                     queue.append(dep)
 
@@ -0,0 +1,322 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import re
+import sys
+from contextlib import contextmanager
+
+from pip._vendor.packaging import markers as packaging_markers
+
+from ._pip_compat import (
+    CAN_SKIP_WHEEL_CHECK, PIP_192_OR_NEWER, RequirementPreparer, TargetPython)
+from .exceptions import UnsupportedTargetEnvironment
+
+#: Implementation abbreviations of the wheel tags and their names in the
+#: implementation_name and platform_python_implementation markers
+IMPLEMENTATIONS = {
+    'cp': ('cpython', 'CPython'),
+    'pp': ('pypy', 'PyPy'),
+    'ip': ('ironpython', 'IronPython'),
+    'jy': ('jython', 'Jython'),
+}
+
+_PLATFORM_RX = re.compile(
+    r'^(?:(?P<linux>(?:many)?linux(?:1|2010|2014|_\d+_\d+)?)'
+    r'|(?P<macosx>macosx_\d+_\d+)'
+    r'|(?P<win>win))_(?P<machine>\w+)$')
+
+
+class TargetEnvironment(object):
+    """
+    Description of the environment to resolve the requirements for.
+
+    The environment markers, the Python version requirements of the
+    packages and the wheel tags are evaluated against the described
+    environment instead of the running interpreter.  The parts which are
+    not described are taken from the running interpreter.
+    """
+    def __init__(self, python_version=None, platform=None,
+                 implementation=None):
+        """
+        Initialize target environment.
+
+        :param python_version: Python version, like "3.11" or "3.11.4"
+        :type python_version: str|None
+        :param platform:
+          Wheel platform tag, like "manylinux1_x86_64", "win_amd64" or
+          "macosx_10_9_x86_64", as with the --platform option of pip
+        :type platform: str|None
+        :param implementation:
+          Python implementation, like "cp" or "cpython"
+        :type implementation: str|None
+        :raises ValueError: if some of the values is not understood
+        """
+        self.python_version = python_version
+        self.platform = platform
+        self.implementation = _parse_implementation(implementation)
+        self.py_version_info = _parse_python_version(python_version)
+        self.markers = self._get_markers()
+
+    @classmethod
+    def from_options(cls, python_version=None, platform=None,
+                     implementation=None):
+        """
+        Get target environment from command line options.
+
+        :return: The environment, or None if none of the options is set
+        :rtype: TargetEnvironment|None
+        """
+        if not (python_version or platform or implementation):
+            return None
+        return cls(python_version, platform, implementation)
+
+    @classmethod
+    def from_tag(cls, tag):
+        """
+        Get target environment from a tag like "py3.11-win_amd64-cp".
+
+        The tag has the Python version, optionally prefixed by "py",
+        followed by the platform and the implementation, if any, in any
+        order, like the cache_tag of an environment.
+
+        :raises ValueError: if the tag is not understood
+        :rtype: TargetEnvironment
+        """
+        (python_version, platform, implementation) = (None, None, None)
+        for (index, part) in enumerate(tag.split('-')):
+            if index == 0 and re.match(r'^(py)?\d', part):
+                python_version = part[2:] if part.startswith('py') else part
+            elif _is_implementation(part) and not implementation:
+                implementation = part
+            elif not platform:
+                platform = part
+            else:
+                raise ValueError('Invalid target: {}'.format(tag))
+        return cls(python_version, platform, implementation)
+
+    @property
+    def environment(self):
+        """
+        The full marker environment of the target.
+
+        The values which are not described are those of the running
+        interpreter.
+
+        :rtype: dict[str,str]
+        """
+        environment = packaging_markers.default_environment()
+        environment.update(self.markers)
+        return environment
+
+    def __eq__(self, other):
+        return (isinstance(other, TargetEnvironment) and
+                self._as_tuple() == other._as_tuple())
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return hash(self._as_tuple())
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.cache_tag)
+
+    def _as_tuple(self):
+        return (self.py_version_info or (), self.platform or '',
+                self.implementation or '')
+
+    @property
+    def cache_tag(self):
+        """
+        Tag for naming the caches of the target environment.
+
+        The tag of the running interpreter is like "py3.11", so that
+        a target with only the Python version given shares the caches
+        with the interpreter of that version.
+        """
+        version_info = self.py_version_info or sys.version_info
+        parts = ['py{}.{}'.format(*version_info[:2])]
+        if self.platform:
+            parts.append(self.platform)
+        if self.implementation:
+            parts.append(self.implementation)
+        return '-'.join(parts)
+
+    def evaluate(self, marker):
+        """
+        Evaluate an environment marker against the target environment.
+
+        :type marker: packaging.markers.Marker
+        :rtype: bool
+        """
+        return marker.evaluate(self.markers)
+
+    @contextmanager
+    def patched_markers(self):
+        """
+        Make markers evaluate against the target environment by default.
+
+        Pip evaluates the markers of the dependencies of a package while
+        preparing it, through pkg_resources and InstallRequirement, which
+        both use the default environment of the vendored packaging
+        library.  Not thread safe.
+        """
+        original = packaging_markers.default_environment
+        markers = self.markers
+
+        def default_environment():
+            environment = original()
+            environment.update(markers)
+            return environment
+
+        packaging_markers.default_environment = default_environment
+        try:
+            yield
+        finally:
+            packaging_markers.default_environment = original
+
+    def check_support(self):
+        """
+        Check that the installed pip can resolve for the target.
+
+        Old pip versions evaluate the wheel tags or the Python version
+        requirements only against the running interpreter, which would
+        silently give the results of the wrong environment.
+
+        :raises UnsupportedTargetEnvironment:
+          if the installed pip cannot evaluate the target
+        """
+        if RequirementPreparer is None:
+            raise UnsupportedTargetEnvironment(
+                self, 'pip 10 or newer is needed')
+        is_host_python = (
+            not self.py_version_info or
+            self.py_version_info == sys.version_info[:len(
+                self.py_version_info)])
+        if not CAN_SKIP_WHEEL_CHECK and not (
+                is_host_python and not self.platform and
+                not self.implementation):
+            raise UnsupportedTargetEnvironment(
+                self, 'the installed pip cannot prepare wheels of '
+                'another environment')
+        if not PIP_192_OR_NEWER and not is_host_python:
+            raise UnsupportedTargetEnvironment(
+                self, 'pip 19.2 or newer is needed for checking the '
+                'Python version requirements of another Python version')
+
+    def get_finder_kwargs(self):
+        """
+        Get keyword arguments for the package finder of pip.
+
+        :rtype: dict
+        """
+        versions = (
+            [''.join(str(x) for x in self.py_version_info[:2])]
+            if self.py_version_info else None)
+        abi = self._get_abi()
+        if TargetPython is None:
+            return {'platform': self.platform, 'versions': versions,
+                    'implementation': self.implementation, 'abi': abi}
+        return {'target_python': TargetPython(
+            platform=self.platform, py_version_info=self.py_version_info,
+            abi=abi, implementation=self.implementation)}
+
+    def _get_abi(self):
+        if not self.py_version_info and not self.implementation:
+            return None
+        if (self.implementation or _get_current_implementation()) != 'cp':
+            return 'none'
+        version_info = self.py_version_info or sys.version_info[:3]
+        # The "m" flag for pymalloc was dropped from the ABI in Python 3.8
+        suffix = 'm' if version_info[:2] < (3, 8) else ''
+        return 'cp{}{}{}'.format(version_info[0], version_info[1], suffix)
+
+    def _get_markers(self):
+        markers = {}
+        if self.py_version_info:
+            full_version = '.'.join(
+                str(x) for x in (self.py_version_info + (0, 0))[:3])
+            markers.update(
+                python_version='{}.{}'.format(*self.py_version_info[:2]),
+                python_full_version=full_version,
+                implementation_version=full_version)
+        if self.implementation:
+            (name, python_implementation) = IMPLEMENTATIONS.get(
+                self.implementation, (self.implementation, self.implementation))
+            markers.update(
+                implementation_name=name,
+                platform_python_implementation=python_implementation)
+        if self.platform:
+            version_info = self.py_version_info or sys.version_info
+            markers.update(
+                _get_platform_markers(self.platform, version_info[0]))
+        return markers
+
+
+def _parse_python_version(python_version):
+    if not python_version:
+        return None
+    if re.match(r'^\d\d+$', python_version):
+        # The nodot form, like "311", as in the wheel tags
+        python_version = '{}.{}'.format(python_version[0], python_version[1:])
+    if not re.match(r'^\d+(\.\d+){1,2}$', python_version):
+        raise ValueError(
+            'Invalid Python version: {}'.format(python_version))
+    return tuple(int(x) for x in python_version.split('.'))
+
+
+def _is_implementation(value):
+    lowered = value.lower()
+    return any(lowered in (abbreviation, name) for (abbreviation, (name, _))
+               in IMPLEMENTATIONS.items())
+
+
+def _parse_implementation(implementation):
+    if not implementation:
+        return None
+    lowered = implementation.lower()
+    for (abbreviation, (name, _python_implementation)) in (
+            IMPLEMENTATIONS.items()):
+        if lowered in (abbreviation, name):
+            return abbreviation
+    raise ValueError(
+        'Unknown Python implementation: {}'.format(implementation))
+
+
+def _get_platform_markers(platform, python_major_version):
+    match = _PLATFORM_RX.match(platform)
+    if platform == 'win32':
+        (sys_platform, system, os_name, machine) = (
+            'win32', 'Windows', 'nt', 'x86')
+    elif not match:
+        raise ValueError('Unknown platform: {}'.format(platform))
+    elif match.group('linux'):
+        (sys_platform, system, os_name, machine) = (
+            'linux', 'Linux', 'posix', match.group('machine'))
+    elif match.group('macosx'):
+        (sys_platform, system, os_name, machine) = (
+            'darwin', 'Darwin', 'posix', match.group('machine'))
+    else:
+        machine = match.group('machine')
+        machine = {'amd64': 'AMD64', 'arm64': 'ARM64'}.get(machine, machine)
+        (sys_platform, system, os_name) = ('win32', 'Windows', 'nt')
+    if sys_platform == 'linux' and python_major_version == 2:
+        sys_platform = 'linux2'
+    return {
+        'sys_platform': sys_platform,
+        'platform_system': system,
+        'os_name': os_name,
+        'platform_machine': machine,
+        'platform_release': '',
+        'platform_version': '',
+    }
+
+
+def _get_current_implementation():
+    name = getattr(sys, 'implementation', None)
+    name = name.name if name else 'cpython'
+    for (abbreviation, (implementation_name, _)) in IMPLEMENTATIONS.items():
+        if implementation_name == name:
+            return abbreviation
+    return name
@@ -0,0 +1,99 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer(object):
+    """
+    Recorder of a timeline in the Chrome trace event format.
+
+    The recorded timeline can be written to a JSON file, which can be
+    viewed e.g. with the chrome://tracing page of Chrome or Chromium.
+    Nothing is recorded unless the tracer is started.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+
+    def start(self):
+        self.enabled = True
+        self.events = []
+
+    def stop(self):
+        self.enabled = False
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """
+        Record the time spent in the block as a span.
+
+        :param args: Tags of the span, e.g. package and version
+        """
+        if not self.enabled:
+            yield
+            return
+        start = _get_timestamp()
+        try:
+            yield
+        finally:
+            self.add_span(name, category, start, _get_timestamp() - start, args)
+
+    def add_span(self, name, category, start, duration, args):
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start,
+            'dur': duration,
+            'pid': os.getpid(),
+            'tid': threading.current_thread().ident,
+            'args': {key: value for (key, value) in args.items()
+                     if value is not None},
+        })
+
+    def write(self, path):
+        content = json.dumps({
+            'traceEvents': sorted(self.events, key=lambda x: x['ts']),
+            'displayTimeUnit': 'ms',
+        }, indent=1, sort_keys=True)
+        with io.open(path, 'wt', encoding='utf-8') as fp:
+            fp.write(content + '\n')
+
+
+def _get_timestamp():
+    """
+    Get current time in microseconds.
+
+    Wall clock time is used, since the timestamps of the worker
+    processes must be comparable with the main process.
+    """
+    return int(time.time() * 1000000)
+
+
+def trace_to_file(ctx, path):
+    """
+    Start tracing and write the trace to a file when a context closes.
+
+    Does nothing, if tracing was already started by an outer command.
+
+    :type ctx: click.Context
+    """
+    if not path or tracer.enabled:
+        return
+    tracer.start()
+
+    def write_trace():
+        tracer.stop()
+        tracer.write(path)
+
+    ctx.call_on_close(write_trace)
+
+
+tracer = Tracer()
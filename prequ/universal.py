@@ -0,0 +1,189 @@
+# coding: utf-8
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals)
+
+from .exceptions import PrequError
+from .utils import get_pinned_version, is_pinned_requirement, key_from_ireq
+
+#: Marker variables for telling the target environments apart, in the
+#: order of preference
+DISTINGUISHING_MARKERS = (
+    'python_version',
+    'sys_platform',
+    'platform_machine',
+    'platform_python_implementation',
+    'python_full_version',
+)
+
+
+class IndistinguishableTargets(PrequError):
+    def __init__(self, targets):
+        self.targets = targets
+
+    def __str__(self):
+        return (
+            'The target environments {} cannot be told apart by '
+            'environment markers').format(
+                ', '.join(x.cache_tag for x in self.targets))
+
+
+def get_target_markers(targets):
+    """
+    Get environment markers which tell the target environments apart.
+
+    Uses as few of the DISTINGUISHING_MARKERS as possible, e.g. just
+    the Python version for targets which differ only by it.
+
+    :type targets: list[prequ.target.TargetEnvironment]
+    :return: Marker of each target, empty if there is only one target
+    :rtype: dict[prequ.target.TargetEnvironment,str]
+    :raises IndistinguishableTargets:
+      if some targets have the same values for all of the markers
+    """
+    environments = [target.environment for target in targets]
+
+    def count_distinct(names):
+        return len({tuple(env[name] for name in names)
+                    for env in environments})
+
+    names = []
+    for name in DISTINGUISHING_MARKERS:
+        if count_distinct(names + [name]) > count_distinct(names):
+            names.append(name)
+    if count_distinct(names) < len(targets):
+        raise IndistinguishableTargets(targets)
+    return {
+        target: ' and '.join(
+            '{} == "{}"'.format(name, env[name]) for name in names)
+        for (target, env) in zip(targets, environments)}
+
+
+def resolve_universal(sessions, constraints, existing_pins=None, **kwargs):
+    """
+    Resolve a set of constraints for several target environments.
+
+    Each session resolves for its target environment, see
+    ResolutionSession.target.  The constraints and the existing pins
+    with environment markers apply only to the targets for which their
+    markers evaluate true.  The sessions may share a MetadataStore in
+    their repositories, so that the dependencies of a package version
+    are prepared only once.
+
+    :type sessions: list[prequ.session.ResolutionSession]
+    :type constraints: list[InstallRequirement]
+    :param existing_pins:
+      Pinned requirements to prefer, e.g. from an existing requirements
+      file.  There may be several pins of a package with different
+      markers.
+    :type existing_pins: list[InstallRequirement]|None
+    :param kwargs: Other arguments of ResolutionSession.resolve
+    :rtype: UniversalResolution
+    """
+    targets = [session.target for session in sessions]
+    target_markers = get_target_markers(targets)
+    resolutions = []
+    for (session, target) in zip(sessions, targets):
+        target_pins = None
+        if existing_pins is not None:
+            target_pins = {
+                key_from_ireq(ireq): ireq for ireq in existing_pins
+                if _applies_to(ireq, target)}
+        resolutions.append(session.resolve(
+            [ireq for ireq in constraints if _applies_to(ireq, target)],
+            existing_pins=target_pins, **kwargs))
+    return UniversalResolution(targets, target_markers, resolutions)
+
+
+def _applies_to(ireq, target):
+    return ireq.markers is None or target.evaluate(ireq.markers)
+
+
+class UniversalResolution(object):
+    """
+    Merged results of resolving for several target environments.
+
+    A requirement pinned to the same version for all the targets is
+    listed once without a marker.  Otherwise each version is listed
+    with a marker of the targets it is pinned for.
+    """
+    def __init__(self, targets, target_markers, resolutions):
+        self.targets = targets
+        self.resolutions = resolutions
+        #: The pinned requirements of all the targets
+        self.results = []
+        #: Environment markers of the results and the unsafe constraints
+        #: which are not needed for all the targets
+        self.markers = {}
+        #: The resolution which each result is taken from
+        self._owners = {}
+        for (ireq, owner, marker) in self._merge(
+                [r.results for r in resolutions], target_markers,
+                key=_get_pin_key):
+            self.results.append(ireq)
+            self._owners[ireq] = owner
+            if marker:
+                self.markers[ireq] = marker
+        self.unsafe_constraints = set()
+        for (ireq, _owner, marker) in self._merge(
+                [r.unsafe_constraints for r in resolutions], target_markers,
+                key=lambda ireq: str(ireq.req)):
+            self.unsafe_constraints.add(ireq)
+            if marker:
+                self.markers[ireq] = marker
+
+    def _merge(self, ireq_lists, target_markers, key):
+        groups = {}
+        order = []
+        for (target, resolution, ireqs) in zip(
+                self.targets, self.resolutions, ireq_lists):
+            for ireq in ireqs:
+                group_key = key(ireq)
+                if group_key not in groups:
+                    groups[group_key] = (ireq, resolution, [])
+                    order.append(group_key)
+                groups[group_key][2].append(target)
+        for group_key in order:
+            (ireq, resolution, targets) = groups[group_key]
+            marker = None
+            if len(targets) < len(self.targets):
+                marker = _join_markers(
+                    [target_markers[target] for target in targets])
+            yield (ireq, resolution, marker)
+
+    def get_hashes(self):
+        """
+        Get hashes of the pinned requirements.
+
+        :rtype: dict[InstallRequirement,set[str]]
+        """
+        hashes = {}
+        for ireq in self.results:
+            hashes.update(self._owners[ireq].resolver.resolve_hashes([ireq]))
+        return hashes
+
+    def get_reverse_dependencies(self):
+        """
+        Get reverse dependencies of the pinned requirements of all the
+        targets.
+
+        :rtype: dict[str,set[str]]
+        """
+        reverse_dependencies = {}
+        for resolution in self.resolutions:
+            for (key, names) in resolution.get_reverse_dependencies().items():
+                reverse_dependencies.setdefault(key, set()).update(names)
+        return reverse_dependencies
+
+
+def _get_pin_key(ireq):
+    if ireq.editable or not is_pinned_requirement(ireq):
+        return (key_from_ireq(ireq), str(ireq.link or ireq.req))
+    return (key_from_ireq(ireq), get_pinned_version(ireq))
+
+
+def _join_markers(markers):
+    if len(markers) == 1:
+        return markers[0]
+    return ' or '.join(
+        '({})'.format(marker) if ' and ' in marker else marker
+        for marker in markers)
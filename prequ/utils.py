@@ -5,13 +5,14 @@ from __future__ import (
 import os
 import re
 import sys
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from itertools import chain, groupby
 
 from click import style
 
 from ._pip_compat import (
-    InstallRequirement, install_req_from_line, path_to_url, url_to_path)
+    InstallRequirement, install_req_from_editable, install_req_from_line,
+    path_to_url, url_to_path)
 
 
 def first(iterable):
@@ -140,6 +141,42 @@ def make_install_requirement(name, version, extras, constraint=False):
         constraint=constraint)
 
 
+#: Parsed form of a dependency string, see parse_dependency
+ParsedDependency = namedtuple('ParsedDependency', ['key', 'ireq'])
+
+#: Maximum number of parsed dependency strings memoized by
+#: parse_dependency.  The least recently used ones are dropped first.
+MAX_PARSED_DEPENDENCIES = 20000
+
+_parsed_dependencies = OrderedDict()
+
+
+def parse_dependency(line, constraint=False):
+    """
+    Parse a dependency string, like "Jinja2>=2.4", with memoization.
+
+    The parsed forms are memoized by the string and the constraint
+    flag, so a dependency string is parsed only once, as long as it is
+    among the MAX_PARSED_DEPENDENCIES most recently used ones.  The
+    returned InstallRequirement is shared by all the callers and must
+    not be modified.
+
+    :type line: str
+    :type constraint: bool
+    :rtype: ParsedDependency
+    """
+    memo_key = (line, constraint)
+    parsed = _parsed_dependencies.pop(memo_key, None)
+    if parsed is None:
+        ireq = install_req_from_line(line, constraint=constraint)
+        parsed = ParsedDependency(key_from_ireq(ireq), ireq)
+        while len(_parsed_dependencies) >= MAX_PARSED_DEPENDENCIES:
+            _parsed_dependencies.popitem(last=False)
+    # The most recently used are kept last
+    _parsed_dependencies[memo_key] = parsed
+    return parsed
+
+
 def is_subdirectory(base, directory):
     """
     Return True if directory is a child directory of base
@@ -172,6 +209,8 @@ def format_requirement(ireq, marker='', hashes=None,
             line = '-e {}'.format(url_or_path)
         elif ireq.link.scheme == 'file':
             line = '{}'.format(url_or_path)
+        elif ireq.link.egg_fragment:
+            line = url_or_path
         else:
             line = '{}#egg={}'.format(url_or_path, ireq.req)
     else:
@@ -187,6 +226,39 @@ def format_requirement(ireq, marker='', hashes=None,
     return line
 
 
+def format_requirement_line(ireq):
+    """
+    Format a requirement as a line that can be parsed back.
+
+    Editable requirements are formatted as "-e" lines and the other
+    link requirements with the project name as the egg fragment, so
+    that parse_requirement_line restores the same requirement, e.g.
+    for saving it to a checkpoint or passing it to another process.
+
+    :type ireq: InstallRequirement
+    :rtype: str
+    """
+    line = format_requirement(ireq)
+    if ireq.link and not ireq.editable and '#egg=' not in line:
+        # Local paths are formatted without the project name
+        line = '{}#egg={}'.format(line, ireq.name)
+    return line
+
+
+def parse_requirement_line(line, constraint=False):
+    """
+    Parse a requirement line formatted by format_requirement_line.
+
+    :type line: str
+    :type constraint: bool
+    :rtype: InstallRequirement
+    """
+    if line.startswith('-e '):
+        return install_req_from_editable(
+            line[len('-e '):], constraint=constraint)
+    return parse_dependency(line, constraint=constraint).ireq
+
+
 def formatted_as(ireq, find_links_dirs=None):
     from_findlink_dir = _find_local_source(ireq, find_links_dirs or [])
     if ireq.link and not ireq.link.comes_from and not from_findlink_dir:
@@ -291,14 +363,25 @@ def get_ireq_version(ireq):
 
     :type ireq: InstallRequirement|str
     """
-    if not ireq.req or not ireq.specifier or not ireq.specifier._specs:
+    if not ireq.req:
+        return None
+    return get_specifier_version(ireq.specifier)
+
+
+def get_specifier_version(specifier):
+    """
+    Get the version pinned by a specifier set, if it pins one.
+
+    :type specifier: packaging.specifiers.SpecifierSet
+    """
+    if not specifier or not specifier._specs:
         return None
 
-    specs = (x._spec for x in ireq.specifier._specs)
+    specs = (x._spec for x in specifier._specs)
     versions = set(
         version for (op, version) in specs
         if (op == '==' or op == '===') and not version.endswith('.*'))
-    good_versions = ireq.specifier.filter(versions, prereleases=True)
+    good_versions = specifier.filter(versions, prereleases=True)
     return next(iter(good_versions), None)
 
 
@@ -35,7 +35,7 @@ class OutputWriter(object):
     def _sort_key(self, ireq):
         line_format = formatted_as(ireq, self.find_links)
         section_num = {'path': 0}.get(line_format, 9)
-        return (section_num, key_from_ireq(ireq))
+        return (section_num, key_from_ireq(ireq), str(ireq.req))
 
     def write_header(self):
         if self.emit_header:
@@ -101,7 +101,7 @@ class OutputWriter(object):
         for ireq in packages:
             line = self._format_requirement(
                 ireq, reverse_dependencies, primary_packages,
-                markers.get(key_from_ireq(ireq)), hashes=hashes)
+                _get_marker(markers, ireq), hashes=hashes)
             yield line
 
         if unsafe_requirements:
@@ -113,7 +113,7 @@ class OutputWriter(object):
                 req = self._format_requirement(ireq,
                                                reverse_dependencies,
                                                primary_packages,
-                                               marker=markers.get(key_from_ireq(ireq)),
+                                               marker=_get_marker(markers, ireq),
                                                hashes=hashes)
                 if not self.allow_unsafe:
                     yield comment('# {}'.format(req))
@@ -158,3 +158,14 @@ class OutputWriter(object):
                 " \\\n    " if ireq_hashes else "  ",
                 comment("# via " + annotation))
         return line
+
+
+def _get_marker(markers, ireq):
+    """
+    Get marker of a requirement by the requirement or by its key.
+
+    The markers are looked up by the requirement first, since there may
+    be several requirements of the same package with different markers.
+    """
+    marker = markers.get(ireq)
+    return marker if marker is not None else markers.get(key_from_ireq(ireq))
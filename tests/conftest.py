@@ -12,6 +12,8 @@ from pytest import fixture
 from prequ._pip_compat import install_req_from_editable, install_req_from_line
 from prequ.cache import DependencyCache
 from prequ.exceptions import NoCandidateFound
+from prequ.incremental import IncrementalResolver
+from prequ.pubgrub import PubGrubResolver
 from prequ.repositories.base import BaseRepository
 from prequ.resolver import Resolver
 from prequ.utils import (
@@ -95,12 +97,10 @@ def depcache(tmpdir):
     return DependencyCache(str(tmpdir))
 
 
-@fixture
-def resolver(depcache, repository):
-    # TODO: It'd be nicer if Resolver instance could be set up and then
-    #       use .resolve(...) on the specset, instead of passing it to
-    #       the constructor like this (it's not reusable)
-    return partial(Resolver, repository=repository, cache=depcache)
+@fixture(params=[Resolver, IncrementalResolver, PubGrubResolver],
+         ids=['rounds', 'incremental', 'pubgrub'])
+def resolver(request, depcache, repository):
+    return partial(request.param, repository=repository, cache=depcache)
 
 
 @fixture
@@ -133,6 +133,11 @@ def minimal_wheels_dir():
     return os.path.join(os.path.split(__file__)[0], 'test_data', 'minimal_wheels')
 
 
+@fixture
+def marker_wheels_dir():
+    return os.path.join(os.path.split(__file__)[0], 'test_data', 'marker_wheels')
+
+
 @pytest.yield_fixture
 def pip_conf(tmpdir):
     with get_temporary_pip_conf(tmpdir) as path:
@@ -3,9 +3,10 @@ from os import remove
 from shutil import rmtree
 from tempfile import NamedTemporaryFile
 
-from pytest import raises
+from pytest import mark, raises
 
-from prequ.cache import CorruptCacheError, DependencyCache, read_cache_file
+from prequ.cache import (
+    ClosureCache, CorruptCacheError, DependencyCache, read_cache_file)
 
 
 @contextmanager
@@ -96,3 +97,35 @@ def test_reverse_dependencies(from_line, tmpdir):
 
     # Clean up our temp directory
     rmtree(tmp_dir_path)
+
+
+def test_closure_cache_persists_closures(tmpdir, from_line):
+    closures = {from_line('ipython[notebook,nbconvert]==2.1.0'): ['pyzmq==2.1.12']}
+    ClosureCache(str(tmpdir)).update(closures)
+
+    cache = ClosureCache(str(tmpdir))
+    assert cache.get(from_line('ipython[nbconvert,notebook]==2.1.0')) == [
+        'pyzmq==2.1.12']
+    assert cache.get(from_line('ipython==2.1.0')) is None
+    cache.clear()
+    assert ClosureCache(str(tmpdir)).cache == {}
+
+
+def test_cache_files_are_named_by_environment_tag(tmpdir, from_line):
+    cache = DependencyCache(str(tmpdir), environment_tag='py3.6-win_amd64')
+    cache[from_line('six==1.10.0')] = []
+    ClosureCache(str(tmpdir), environment_tag='py3.6-win_amd64').update(
+        {from_line('six==1.10.0'): []})
+
+    assert sorted(x.basename for x in tmpdir.listdir()) == [
+        'closures-py3.6-win_amd64.json', 'depcache-py3.6-win_amd64.json']
+
+
+@mark.parametrize('cache_cls', [DependencyCache, ClosureCache])
+def test_corrupt_cache_file(tmpdir, cache_cls):
+    cache = cache_cls(str(tmpdir), environment_tag='py3.6')
+    tmpdir.join('{}-py3.6.json'.format(cache_cls.filename_prefix)).write(
+        'not json')
+
+    with raises(CorruptCacheError):
+        cache.read_cache()
@@ -0,0 +1,33 @@
+from prequ.checkpoint import ResolverCheckpoint, get_input_digest
+
+
+def test_input_digest_ignores_order_and_origin(from_line):
+    flask = from_line('Flask', comes_from='-r requirements.in (line 1)')
+    digest = get_input_digest([flask, from_line('six<2', constraint=True)])
+
+    assert digest == get_input_digest(
+        [from_line('six<2', constraint=True), from_line('Flask')])
+    assert digest != get_input_digest([from_line('Flask'), from_line('six<2')])
+    assert digest != get_input_digest(
+        [from_line('Flask'), from_line('six<2', constraint=True)],
+        resolver='rounds')
+
+
+def test_checkpoint_save_load_and_remove(tmpdir):
+    checkpoint = ResolverCheckpoint('abc', str(tmpdir.join('checkpoints')))
+    state = {'round': 2, 'constraints': ['jinja2>=2.4'], 'unsafe': [],
+             'warm_start': False}
+
+    assert checkpoint.load() is None
+    checkpoint.save(state)
+    assert ResolverCheckpoint('abc', str(tmpdir.join('checkpoints'))).load() == state
+    assert ResolverCheckpoint('abd', str(tmpdir.join('checkpoints'))).load() is None
+    checkpoint.remove()
+    assert checkpoint.load() is None
+
+
+def test_corrupt_checkpoint_is_ignored(tmpdir):
+    checkpoint = ResolverCheckpoint('abc', str(tmpdir))
+    tmpdir.join('checkpoint-abc.json').write('{')
+
+    assert checkpoint.load() is None
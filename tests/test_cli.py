@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import subprocess
@@ -9,8 +10,9 @@ import pytest
 from click.testing import CliRunner
 
 from prequ._pip_compat import PIP_9_OR_NEWER, path_to_url
+from prequ.checkpoint import ResolverCheckpoint
 from prequ.repositories.pypi import PyPIRepository
-from prequ.scripts.compile_in import cli
+from prequ.scripts.compile_in import cli, read_dependents
 from prequ.scripts.sync import cli as sync_cli
 
 from .utils import check_successful_exit
@@ -292,6 +294,7 @@ def test_editable_package(small_fake_package_dir):
         assert small_fake_package_url in out.output
         assert '-e ' + small_fake_package_url in out.output
         assert 'six==1.10.0' in out.output
+        assert '# via small-fake-with-deps' in out.output
 
 
 def test_editable_package_vcs(tmpdir):
@@ -491,11 +494,73 @@ def test_filter_pip_markes():
         assert 'unknown_package' not in out.output
 
 
+def test_target_environment_options(minimal_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write(
+                'small-fake-a; python_version < "3"\n'
+                'small-fake-b; sys_platform == "win32"\n'
+                'tiny-depender; platform_python_implementation == "PyPy"\n')
+        options = ['-n', '--no-index', '-f', minimal_wheels_dir]
+
+        current = runner.invoke(cli, options)
+        target = runner.invoke(cli, options + [
+            '--python-version', '2.7', '--platform', 'win_amd64'])
+        invalid = runner.invoke(cli, options + ['--platform', 'amiga'])
+
+        check_successful_exit(current)
+        assert 'small-fake' not in current.output
+        check_successful_exit(target)
+        assert 'small-fake-a==0.2' in target.output
+        assert 'small-fake-b==0.3' in target.output
+        assert 'tiny-depender' not in target.output
+        assert invalid.exit_code == 2
+        assert 'Unknown platform: amiga' in invalid.output
+
+
+def test_target_environment_unsupported_by_pip(monkeypatch):
+    monkeypatch.setattr('prequ.target.PIP_192_OR_NEWER', False)
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        open('requirements.in', 'w').close()
+
+        out = runner.invoke(cli, ['-n', '--python-version', '2.7'])
+
+        assert out.exit_code == 2
+        assert 'Cannot resolve for py2.7: pip 19.2 or newer' in out.output
+
+
+def test_target_option_writes_universal_lock(marker_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('marker-app\n')
+        options = ['--no-index', '-f', marker_wheels_dir, '--no-header',
+                   '--target', 'py2.7', '--target', 'py3.11']
+
+        out = runner.invoke(cli, options)
+
+        check_successful_exit(out)
+        with open('requirements.txt') as fp:
+            assert fp.read().splitlines() == [
+                'marker-app==1.0',
+                'marker-dep==1.0 ; python_version == "2.7"  # via marker-app',
+                'marker-lib==1.0 ; python_version == "2.7"  # via marker-app',
+                'marker-lib==2.0 ; python_version == "3.11"  # via marker-app',
+            ]
+
+        out = runner.invoke(cli, options + ['--platform', 'win32'])
+
+        assert out.exit_code == 2
+        assert '--target cannot be used with' in out.output
+
+
 def test_no_candidates():
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('requirements', 'w') as req_in:
-            req_in.write('six>1.0b0,<1.0b0')
+            req_in.write('six>1.0b0,<1.0b1')
 
         out = runner.invoke(cli, ['-n', 'requirements'])
 
@@ -503,13 +568,157 @@ def test_no_candidates():
         assert 'Skipped pre-versions:' in out.output
 
 
+def test_sessions_are_closed_when_compile_fails(minimal_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('small-fake-a>5')
+
+        with mock.patch('prequ.session.ResolutionSession.close') as close:
+            out = runner.invoke(cli, [
+                '-n', '--no-index', '-f', minimal_wheels_dir, '-j', '2'])
+
+        assert out.exit_code == 2
+        assert close.call_count == 1
+
+
 def test_no_candidates_pre():
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('requirements', 'w') as req_in:
-            req_in.write('six>1.0b0,<1.0b0')
+            req_in.write('six>1.0b0,<1.0b1')
 
         out = runner.invoke(cli, ['-n', 'requirements', '--pre'])
 
         assert out.exit_code == 2
         assert 'Tried pre-versions:' in out.output
+
+
+def test_conflicting_constraints():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements', 'w') as req_in:
+            req_in.write('six>=2\nsix<1')
+
+        out = runner.invoke(cli, ['-n', 'requirements'])
+
+        assert out.exit_code == 2
+        assert 'The version constraints are conflicting.' in out.output
+
+
+def test_warm_start_option(minimal_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('tiny-depender\nsmall-fake-a')
+        options = ['--no-index', '-f', minimal_wheels_dir, '--no-header']
+
+        check_successful_exit(runner.invoke(cli, options))
+        with open('requirements.txt') as fp:
+            cold_output = fp.read()
+        out = runner.invoke(cli, options + ['--warm-start'])
+
+        check_successful_exit(out)
+        assert read_dependents('requirements.txt') == {
+            'tiny-dependee': {'tiny-depender'}}
+        with open('requirements.txt') as fp:
+            assert fp.read() == cold_output
+
+
+@pytest.mark.parametrize('options', [[], ['--resume']])
+def test_checkpoints_are_saved_only_with_resume_option(
+        minimal_wheels_dir, tmpdir, options):
+    checkpoint_dir = tmpdir.join('checkpoints')
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('tiny-depender\nsmall-fake-a')
+        with mock.patch('prequ.scripts.compile_in.CHECKPOINT_DIR',
+                        str(checkpoint_dir)):
+            with mock.patch.object(ResolverCheckpoint, 'save', autospec=True,
+                                   side_effect=ResolverCheckpoint.save) as save:
+                out = runner.invoke(
+                    cli, ['--no-index', '-f', minimal_wheels_dir] + options)
+
+        check_successful_exit(out)
+        assert save.called == bool(options)
+        assert checkpoint_dir.check() == bool(options)
+        if options:
+            # The checkpoint is removed when the resolve succeeds
+            assert checkpoint_dir.listdir() == []
+
+
+def test_what_if_option(minimal_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('small-fake-a\nsmall-fake-b\ntiny-depender')
+        with open('requirements.txt', 'w') as req_txt:
+            req_txt.write('small-fake-a==0.1\nsmall-fake-b==0.3\n'
+                          'tiny-dependee==1.0  # via tiny-depender\n'
+                          'tiny-depender==1.1\n')
+        options = ['--no-index', '-f', minimal_wheels_dir, '--what-if']
+
+        out = runner.invoke(cli, options)
+
+        check_successful_exit(out)
+        assert out.output.splitlines() == [
+            'Upgrades of requirements.txt:',
+            '  small-fake-a 0.1 -> 0.2: ok, no other changes',
+            '  small-fake-b 0.3: up-to-date',
+            '  tiny-dependee 1.0: up-to-date',
+            '  tiny-depender 1.1: up-to-date',
+        ]
+        with open('requirements.txt') as fp:
+            assert fp.read().startswith('small-fake-a==0.1\n')
+
+        out = runner.invoke(cli, options + ['-P', 'small-fake-b'])
+
+        check_successful_exit(out)
+        assert out.output.splitlines() == [
+            'Upgrades of requirements.txt:',
+            '  small-fake-b 0.3: up-to-date',
+        ]
+
+
+def test_read_dependents(tmpdir):
+    path = tmpdir.join('requirements.txt')
+    path.write(dedent("""\
+        --index-url https://example.com/simple
+        -e git+https://example.com/repo.git#egg=Some_Thing  # via other
+        other==1.0
+        six==1.10.0 \\
+            --hash=sha256:0ff78c403d9bccf5a425a6d31a12aa6b47f1c21ca4dc2573a7e2f32a97335eb1 \\
+            # via other, Some_Thing
+        tiny==1.0 ; python_version < "3.8"  # via six
+    """))
+
+    assert read_dependents(str(path)) == {
+        'some-thing': {'other'},
+        'six': {'other', 'some-thing'},
+        'tiny': {'six'},
+    }
+
+
+def test_trace_option(minimal_wheels_dir):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('requirements.in', 'w') as req_in:
+            req_in.write('small-fake-a\nsmall-fake-b')
+
+        out = runner.invoke(cli, [
+            '--rebuild', '--no-index', '-f', minimal_wheels_dir,
+            '--generate-hashes', '--trace', 'trace.json',
+        ])
+
+        check_successful_exit(out)
+        with open('trace.json') as fp:
+            events = json.load(fp)['traceEvents']
+        spans = {(event['name'], event['args'].get('package'))
+                 for event in events}
+        assert ('round 1', None) in spans
+        assert ('find_all_candidates', 'small-fake-a') in spans
+        assert ('get_dependencies', 'small-fake-b') in spans
+        assert ('get_hashes', 'small-fake-a') in spans
+        assert ('write', None) in spans
+        assert all(event['ph'] == 'X' for event in events)
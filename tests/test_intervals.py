@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+
+import pytest
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.version import parse
+
+from prequ.intervals import get_interval, simplify_specifier
+
+VERSIONS = sorted(parse(x) for x in [
+    '0.9', '1.0.dev1', '1.0a1', '1.0', '1.0+local', '1.0.post1', '1.2',
+    '1.2b1', '1.2.post1', '1.5', '1.9', '2.0.dev0', '2.0b1', '2.0', '2+x',
+    '2.0.post0', '2.5', '3', '1!1.0', 'weird-legacy',
+])
+
+
+@pytest.mark.parametrize(('specifier', 'expected'), [
+    ('>=1.0,>=1.2,<3,<2.5,!=0.9,!=2.1', '!=2.1,<2.5,>=1.2'),
+    ('<1.9,>=1.4.2,~=1.5', '<1.9,~=1.5'),
+    ('>=1.0,>1.0', '>1.0'),
+    ('<=2.0,<2.0', '<2.0'),
+    ('>=1.0,==1.2.*', '==1.2.*'),
+    ('!=1.0,!=2.0,>1.0', '!=2.0,>1.0'),
+    # The > operator excludes the post-releases of its version
+    ('>1.0,>1.0.post1', '>1.0,>1.0.post1'),
+    # The < operator excludes the pre-releases of its version
+    ('<2.0,<=2.0b1', '<2.0,<=2.0b1'),
+    # Dropping >=1.0b1 would disallow pre-releases by default
+    ('>=1.0b1,>=1.2', '>=1.0b1,>=1.2'),
+    ('!=1.0,!=2.0', '!=1.0,!=2.0'),
+])
+def test_simplify_specifier(specifier, expected):
+    specset = SpecifierSet(specifier)
+
+    result = simplify_specifier(specset)
+
+    assert str(result) == expected
+    assert result.prereleases == specset.prereleases
+    for version in VERSIONS:
+        assert (result.contains(version, prereleases=True) ==
+                specset.contains(version, prereleases=True))
+
+
+@pytest.mark.parametrize(('specifier', 'empty'), [
+    ('>=2,<1', True),
+    ('>1.0,<1.0', True),
+    ('>=1.0,<=1.0', False),
+    ('==1.0,==2.0', True),
+    ('==1.0,>=1.0+local', False),
+    ('~=1.5,>=2', True),
+    ('==1.*,<2', False),
+    ('>1.0b0,<1.0b0', True),
+    ('!=1.0,<1.0', False),
+])
+def test_interval_is_empty(specifier, empty):
+    specset = SpecifierSet(specifier)
+
+    assert get_interval(specset).is_empty() == empty
+    if empty:
+        assert not list(specset.filter(VERSIONS, prereleases=True))
+
+
+@pytest.mark.parametrize('specifier', [
+    '', '>=1.0', '>1.0', '<2', '<=2', '==2.0', '==2', '!=1.0', '==1.*',
+    '~=1.2', '>=1.0,<2.0', '===1.0', '>=1!0',
+])
+def test_interval_get_range(specifier):
+    specset = SpecifierSet(specifier)
+
+    (start, end) = get_interval(specset).get_range(VERSIONS)
+
+    matching = [x for x in VERSIONS if specset.contains(x, prereleases=True)]
+    assert set(matching) <= set(VERSIONS[start:end])
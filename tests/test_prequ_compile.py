@@ -0,0 +1,121 @@
+from __future__ import unicode_literals
+
+import contextlib
+import io
+
+import mock
+import pytest
+
+from prequ.scripts.compile import main as compile_main
+from prequ.session import RESOLVERS
+
+from .dirs import FAKE_PYPI_WHEELS_DIR
+from .utils import check_successful_exit, make_cli_runner
+
+
+@pytest.mark.parametrize('session_mode', [
+    '--single-session', '--session-per-file'])
+def test_session_modes_produce_same_files(pip_conf, session_mode):
+    run_check = make_cli_runner(compile_main, [session_mode])
+    conf = {
+        'options': {'wheel_dir': FAKE_PYPI_WHEELS_DIR},
+        'requirements': {
+            'base': ['tiny-depender'],
+            'dev': ['tiny-dependee', 'small-fake-a'],
+            'test': ['small-fake-b'],
+        },
+    }
+    txt_prelude = '--trusted-host localhost\n\n'
+    with run_check(pip_conf, **conf) as result:
+        check_successful_exit(result)
+        assert _read_text_file('requirements.txt').endswith(
+            txt_prelude +
+            'tiny-dependee==1.0\n'
+            'tiny-depender==1.1\n')
+        assert _read_text_file('requirements-dev.txt').endswith(
+            txt_prelude + 'small-fake-a==0.2\ntiny-dependee==1.0\n')
+        assert _read_text_file('requirements-test.txt').endswith(
+            txt_prelude + 'small-fake-b==0.3\n')
+
+
+def test_session_per_file_is_the_default(pip_conf):
+    run_check = make_cli_runner(compile_main, [])
+    conf = {
+        'options': {'wheel_dir': FAKE_PYPI_WHEELS_DIR},
+        'requirements': ['small-fake-a'],
+    }
+    with mock.patch('prequ.scripts.compile_in.SharedSession') as shared:
+        with run_check(pip_conf, **conf) as result:
+            check_successful_exit(result)
+    assert not shared.called
+
+
+def test_shared_session_is_closed_when_compile_fails(pip_conf):
+    run_check = make_cli_runner(compile_main, ['--single-session'])
+    conf = {
+        'options': {'wheel_dir': FAKE_PYPI_WHEELS_DIR},
+        'requirements': {'base': ['small-fake-a>5']},
+    }
+    with mock.patch('prequ.scripts.compile_in.SharedSession.close') as close:
+        with run_check(pip_conf, **conf) as result:
+            assert result.exit_code != 0
+    assert close.call_count == 1
+
+
+def test_resolver_is_chosen_by_compile_in(pip_conf):
+    run_check = make_cli_runner(compile_main, [])
+    conf = {
+        'options': {'wheel_dir': FAKE_PYPI_WHEELS_DIR},
+        'requirements': ['small-fake-a'],
+    }
+    with mock.patch('prequ.scripts.compile_in.cli') as compile_in_cli:
+        with run_check(pip_conf, **conf) as result:
+            check_successful_exit(result)
+    assert compile_in_cli.call_args[1]['resolver_name'] is None
+
+
+@pytest.mark.parametrize('options,expected_resolver', [
+    ([], 'incremental'),
+    (['--resolver', 'rounds'], 'rounds'),
+])
+def test_what_if_resolver(pip_conf, options, expected_resolver):
+    run_check = make_cli_runner(compile_main, ['--what-if'] + options)
+    conf = {
+        'options': {'wheel_dir': FAKE_PYPI_WHEELS_DIR},
+        'requirements': ['small-fake-a', 'tiny-depender'],
+        'existing_out_files': {
+            'requirements.txt': (
+                'small-fake-a==0.1\n'
+                'tiny-dependee==1.0  # via tiny-depender\n'
+                'tiny-depender==1.1\n'),
+        },
+    }
+    with _record_used_resolvers() as used_resolvers:
+        with run_check(pip_conf, **conf) as result:
+            check_successful_exit(result)
+            assert 'small-fake-a 0.1 -> 0.2: ok' in result.output
+    assert used_resolvers
+    assert set(used_resolvers) == {expected_resolver}
+
+
+@contextlib.contextmanager
+def _record_used_resolvers():
+    used = []
+
+    def make_recording_class(name, resolver_cls):
+        class RecordingResolver(resolver_cls):
+            def __init__(self, *args, **kwargs):
+                used.append(name)
+                super(RecordingResolver, self).__init__(*args, **kwargs)
+        return RecordingResolver
+
+    recording_resolvers = {
+        name: make_recording_class(name, resolver_cls)
+        for (name, resolver_cls) in RESOLVERS.items()}
+    with mock.patch.dict(RESOLVERS, recording_resolvers):
+        yield used
+
+
+def _read_text_file(filename):
+    with io.open(filename, 'rt', encoding='utf-8') as fp:
+        return fp.read()
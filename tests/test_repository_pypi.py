@@ -1,12 +1,18 @@
 import os
+import sys
+from multiprocessing.pool import MaybeEncodingError
 
 import mock
 import pytest
 
 from prequ._pip_compat import PIP_10_OR_NEWER, PIP_192_OR_NEWER, path_to_url
-from prequ.exceptions import DependencyResolutionFailed
-from prequ.repositories.pypi import PyPIRepository
+from prequ.exceptions import (
+    DependencyResolutionFailed, UnsupportedTargetEnvironment)
+from prequ.logging import log
+from prequ.repositories.metadata import MetadataStore
+from prequ.repositories.pypi import PyPIRepository, _get_result_lines
 from prequ.scripts._repo import get_pip_command
+from prequ.target import TargetEnvironment
 
 PY27_LINUX64_TAGS = [
     ('cp27', 'cp27mu', 'manylinux1_x86_64'),
@@ -179,3 +185,230 @@ def test_get_hashes_editable_empty_set(from_editable):
     repository = PyPIRepository(pip_options, session)
     ireq = from_editable('git+https://github.com/django/django.git#egg=django')
     assert repository.get_hashes(ireq) == set()
+
+
+def test_prefetch_candidates_matches_serial_lookup(from_line, minimal_wheels_dir):
+    ireqs = [from_line('small-fake-a'), from_line('small-fake-b'),
+             from_line('small-fake-a==0.1')]
+    serial = get_local_repository(minimal_wheels_dir)
+    concurrent = get_local_repository(minimal_wheels_dir, jobs=4)
+
+    concurrent.prefetch_candidates(ireqs)
+
+    assert set(concurrent._available_candidates_cache) == {
+        'small-fake-a', 'small-fake-b'}
+    for ireq in ireqs:
+        assert (
+            str(concurrent.find_best_match(ireq)) ==
+            str(serial.find_best_match(ireq)))
+
+
+def get_local_repository(find_links_dir, jobs=1, **kwargs):
+    pip_command = get_pip_command()
+    pip_options, _ = pip_command.parse_args([
+        '--no-index', '--find-links', find_links_dir
+    ])
+    session = pip_command._build_session(pip_options)
+    return PyPIRepository(pip_options, session, jobs=jobs, **kwargs)
+
+
+@pytest.mark.parametrize('can_skip', [False, True])
+def test_target_kwargs_of_pip_without_wheel_check_option(
+        monkeypatch, minimal_wheels_dir, can_skip):
+    monkeypatch.setattr(
+        'prequ.repositories.pypi.CAN_SKIP_WHEEL_CHECK', can_skip)
+    repository = get_local_repository(
+        minimal_wheels_dir, target=TargetEnvironment('{}.{}'.format(
+            *sys.version_info)))
+
+    (reqset_kwargs, _resolver_kwargs) = repository._get_target_kwargs()
+
+    assert reqset_kwargs == ({'check_supported_wheels': False}
+                             if can_skip else {})
+
+
+def test_unsupported_target_is_not_resolved_for_host(
+        monkeypatch, minimal_wheels_dir):
+    monkeypatch.setattr('prequ.target.RequirementPreparer', None)
+
+    with pytest.raises(UnsupportedTargetEnvironment):
+        get_local_repository(
+            minimal_wheels_dir, target=TargetEnvironment('2.7'))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_targets_share_metadata_store(from_line, marker_wheels_dir, jobs):
+    store = MetadataStore()
+    (py2, py3) = [
+        get_local_repository(
+            marker_wheels_dir, jobs=jobs, metadata_store=store,
+            target=TargetEnvironment(python_version))
+        for python_version in ['2.7', '3.11']]
+
+    def get_ireqs():
+        return [from_line('marker-app==1.0'), from_line('marker-lib==1.0')]
+
+    py2_dependencies = py2.get_many_dependencies(get_ireqs())
+    with mock.patch.object(
+            PyPIRepository, '_get_dependencies_with_logs') as prepare:
+        py3_dependencies = py3.get_many_dependencies(get_ireqs())
+
+    assert not prepare.called
+    assert [sorted(x.name for x in deps) for deps in py2_dependencies] == [
+        ['marker-dep', 'marker-lib'], []]
+    assert [sorted(x.name for x in deps) for deps in py3_dependencies] == [
+        ['marker-lib'], []]
+    assert str(py2.find_best_match(from_line('marker-lib'))) == (
+        'marker-lib==1.0')
+    assert str(py3.find_best_match(from_line('marker-lib'))) == (
+        'marker-lib==2.0')
+
+
+def test_get_many_dependencies_in_worker_processes(from_line, minimal_wheels_dir):
+    ireqs = [from_line('tiny-depender==1.1'), from_line('small-fake-a==0.1'),
+             from_line('small-fake-b==0.3')]
+    serial = get_local_repository(minimal_wheels_dir)
+    concurrent = get_local_repository(minimal_wheels_dir, jobs=2)
+
+    result = concurrent.get_many_dependencies(ireqs)
+
+    assert [{str(dep.req) for dep in deps} for deps in result] == [
+        {str(dep.req) for dep in serial.get_dependencies(ireq)}
+        for ireq in ireqs]
+    assert [{str(dep.req) for dep in deps} for deps in result] == [
+        {'tiny-dependee'}, set(), set()]
+
+
+def test_workers_use_finder_urls_added_later(
+        from_line, marker_wheels_dir, minimal_wheels_dir):
+    repository = get_local_repository(marker_wheels_dir, jobs=2)
+    repository.finder.find_links.append(minimal_wheels_dir)
+    repository.get_dependencies = mock.Mock(
+        side_effect=AssertionError('Prepared in the main process'))
+    ireqs = [from_line('tiny-depender==1.1'), from_line('small-fake-a==0.1')]
+
+    try:
+        result = repository.get_many_dependencies(ireqs)
+    finally:
+        repository.close()
+
+    assert [{str(dep.req) for dep in deps} for deps in result] == [
+        {'tiny-dependee'}, set()]
+
+
+def test_candidate_caches_are_cleared_when_finder_urls_change(
+        from_line, marker_wheels_dir, minimal_wheels_dir):
+    repository = get_local_repository(minimal_wheels_dir)
+    ireq = from_line('small-fake-a')
+    assert str(repository.find_best_match(ireq).req) == 'small-fake-a==0.2'
+    assert repository.get_likely_match(ireq) is not None
+
+    repository.finder.find_links[:] = [marker_wheels_dir]
+
+    assert repository.get_likely_match(ireq) is None
+    assert repository.find_all_candidates('small-fake-a') == []
+    assert repository.get_version_index('small-fake-a').versions == []
+
+
+def test_worker_pool_is_sized_by_jobs(from_line, minimal_wheels_dir):
+    repository = get_local_repository(minimal_wheels_dir, jobs=3)
+    try:
+        repository.get_many_dependencies(
+            [from_line('small-fake-a==0.1'), from_line('small-fake-b==0.3')])
+        repository.get_many_dependencies(
+            [from_line('small-fake-a==0.2'), from_line('small-fake-b==0.2'),
+             from_line('tiny-depender==1.1'), from_line('tiny-dependee==1.0')])
+        workers = repository._dependency_workers
+        assert len(workers._pool) == 3
+    finally:
+        repository.close()
+
+
+def test_close_stops_worker_processes(from_line, minimal_wheels_dir):
+    repository = get_local_repository(minimal_wheels_dir, jobs=2)
+    repository.get_many_dependencies(
+        [from_line('small-fake-a==0.1'), from_line('small-fake-b==0.3')])
+    workers = repository._dependency_workers
+
+    repository.close()
+
+    assert repository._dependency_workers is None
+    assert not any(process.is_alive() for process in workers._pool)
+    repository.close()
+
+
+def test_close_cancels_unconsumed_prefetches(from_line, minimal_wheels_dir):
+    repository = get_local_repository(minimal_wheels_dir, jobs=2)
+    repository.prefetch_budget = 2
+    repository.prefetch_dependencies(
+        [from_line('tiny-depender==1.1'), from_line('small-fake-a==0.1')])
+    workers = repository._dependency_workers
+
+    with mock.patch.object(workers, 'terminate',
+                           wraps=workers.terminate) as terminate:
+        pending = any(not x.ready() for x in repository._prefetched.values())
+        repository.close()
+
+    assert repository._prefetched == {}
+    assert terminate.called == pending
+    assert not any(process.is_alive() for process in workers._pool)
+
+
+class FailedResult(object):
+    def __init__(self, error):
+        self.error = error
+
+    def get(self):
+        raise self.error
+
+
+@pytest.mark.parametrize('error', [
+    DependencyResolutionFailed(None, 'Broken setup.py'),
+    MaybeEncodingError(ValueError('unpicklable'), None),
+])
+def test_failed_worker_result_is_prepared_again(capsys, error):
+    log.verbose = True
+    try:
+        result = _get_result_lines('foo==1.0', FailedResult(error))
+    finally:
+        log.verbose = False
+
+    assert result is None
+    (out, err) = capsys.readouterr()
+    assert 'foo==1.0' in out + err
+
+
+def test_unexpected_worker_error_is_raised():
+    with pytest.raises(KeyError):
+        _get_result_lines('foo==1.0', FailedResult(KeyError('bug')))
+
+
+def test_prefetch_dependencies_in_worker_processes(from_line, minimal_wheels_dir):
+    repository = get_local_repository(minimal_wheels_dir, jobs=2)
+    repository.prefetch_budget = 2
+    ireqs = [from_line('tiny-depender==1.1'), from_line('small-fake-a==0.1'),
+             from_line('small-fake-b==0.3')]
+
+    repository.prefetch_dependencies(ireqs)
+
+    assert sorted(repository._prefetched) == [
+        'small-fake-a==0.1', 'tiny-depender==1.1']
+    assert repository.prefetch_budget == 0
+    repository._prefetched['small-fake-a==0.1'].wait()
+    prefetched = {str(ireq.req): {str(dep.req) for dep in deps}
+                  for (ireq, deps) in repository.pop_prefetched_dependencies()}
+    assert prefetched['small-fake-a==0.1'] == set()
+    result = repository.get_many_dependencies(ireqs)
+    assert [{str(dep.req) for dep in deps} for deps in result] == [
+        {'tiny-dependee'}, set(), set()]
+    assert repository._prefetched == {}
+
+
+def test_iter_prefetch_candidates_yields_in_order(from_line, minimal_wheels_dir):
+    ireqs = [from_line('small-fake-a'), from_line('small-fake-b'),
+             from_line('small-fake-a==0.1')]
+    repository = get_local_repository(minimal_wheels_dir, jobs=2)
+
+    for (ireq, yielded) in zip(ireqs, repository.iter_prefetch_candidates(ireqs)):
+        assert yielded is ireq
+        assert ireq.name in repository._available_candidates_cache
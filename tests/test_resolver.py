@@ -1,5 +1,18 @@
+from itertools import chain
+
+import mock
 import pytest
 
+from prequ.cache import ClosureCache, DependencyCache
+from prequ.checkpoint import ResolverCheckpoint
+from prequ.exceptions import NoCandidateFound, OscillatingConstraints
+from prequ.incremental import IncrementalResolver
+from prequ.pubgrub import PubGrubResolver
+from prequ.repositories import LocalRequirementsRepository
+from prequ.resolver import Constraint, RequirementSummary, Resolver
+from prequ.utils import (
+    format_requirement_line, key_from_ireq, parse_requirement_line)
+
 
 @pytest.mark.parametrize(
     ('input', 'expected', 'prereleases'),
@@ -157,3 +170,372 @@ def test_resolver__allows_unsafe_deps(resolver, from_line, input, expected, prer
     output = resolver(input, prereleases=prereleases, allow_unsafe=True).resolve()
     output = {str(line) for line in output}
     assert output == {str(line) for line in expected}
+
+
+def test_pubgrub_resolver_backtracks(repository, depcache, from_line):
+    repository.index.update({
+        'top-a': {
+            '1.0': {'': ['shared<2']},
+            '2.0': {'': ['shared>=3']},
+        },
+        'top-b': {'1.0': {'': ['shared<2']}},
+        'shared': {'1.0': {'': []}, '3.0': {'': []}},
+    })
+    resolver = PubGrubResolver(
+        [from_line('top-a'), from_line('top-b')], repository, cache=depcache)
+
+    result = resolver.resolve()
+
+    assert {str(x) for x in result} == {
+        'top-a==1.0', 'top-b==1.0', 'shared==1.0'}
+
+
+def test_pubgrub_resolver_reports_unsatisfiable(repository, depcache, from_line):
+    repository.index.update({
+        'top-a': {'1.0': {'': ['shared>=3']}},
+        'top-b': {'1.0': {'': ['shared<2']}},
+        'shared': {'1.0': {'': []}, '3.0': {'': []}},
+    })
+    resolver = PubGrubResolver(
+        [from_line('top-a'), from_line('top-b')], repository, cache=depcache)
+
+    with pytest.raises(NoCandidateFound):
+        resolver.resolve()
+
+
+def test_pubgrub_resolver_does_less_work_on_conflicts(
+        repository, tmpdir, from_line):
+    # The newest shared conflicts with the requirement of inner.  The
+    # rounds resolver looks up every package again in each round and
+    # fetches the dependencies of zz-extra before dropping it, while
+    # the PubGrub resolver backjumps before deciding zz-extra.
+    repository.index.update({
+        'top-a': {'1.0': {'': ['shared']}},
+        'top-b': {'1.0': {'': ['inner']}},
+        'inner': {'1.0': {'': ['shared<2']}},
+        'shared': {'1.0': {'': []}, '3.0': {'': ['zz-extra']}},
+        'zz-extra': {'1.0': {'': []}},
+    })
+    constraints = [from_line('top-a'), from_line('top-b')]
+    results = {}
+    counts = {}
+    for resolver_cls in [Resolver, PubGrubResolver]:
+        resolver = resolver_cls(
+            constraints, repository,
+            cache=DependencyCache(str(tmpdir.join(resolver_cls.__name__))))
+        with mock.patch.object(
+                repository, 'find_best_match',
+                wraps=repository.find_best_match) as find_best_match:
+            with mock.patch.object(
+                    repository, 'get_dependencies',
+                    wraps=repository.get_dependencies) as get_dependencies:
+                results[resolver_cls] = {str(x) for x in resolver.resolve()}
+        counts[resolver_cls] = (
+            find_best_match.call_count, get_dependencies.call_count)
+
+    assert results[Resolver] == results[PubGrubResolver] == {
+        'top-a==1.0', 'top-b==1.0', 'inner==1.0', 'shared==1.0'}
+    (pubgrub_visits, pubgrub_fetches) = counts[PubGrubResolver]
+    (rounds_visits, rounds_fetches) = counts[Resolver]
+    assert pubgrub_visits < rounds_visits
+    assert pubgrub_fetches < rounds_fetches
+    assert resolver._metadata_fetch_count == pubgrub_fetches
+    assert resolver._conflict_count > 0
+
+
+def test_requirement_summary_identity(from_line):
+    summary = RequirementSummary(from_line('Django[b,a]>=1.4,<1.9'))
+
+    assert summary == RequirementSummary(from_line('django[a,b]<1.9,>=1.4'))
+    assert hash(summary) == hash(
+        RequirementSummary(from_line('django[a,b]<1.9,>=1.4')))
+    assert summary != RequirementSummary(from_line('django[a]<1.9,>=1.4'))
+    assert summary != RequirementSummary(from_line('django[a,b]<1.9'))
+    assert str(summary) == str(['django', '<1.9,>=1.4', "['a', 'b']"])
+
+
+def test_group_constraints_does_not_modify_ireqs(base_resolver, repository, from_line):
+    ireqs = [
+        from_line('Django[a]<1.9,>=1.4.2'),
+        from_line('django[b]~=1.5'),
+        from_line('flask~=0.7', constraint=True),
+    ]
+    resolver = base_resolver([], repository=repository)
+
+    (django, flask) = resolver._group_constraints(ireqs)
+
+    assert [str(ireq) for ireq in ireqs] == [
+        'Django[a]<1.9,>=1.4.2', 'django[b]~=1.5', 'flask~=0.7']
+    assert (django.key, str(django.specifier), django.extras) == (
+        'django', '<1.9,~=1.5', ('a', 'b'))
+    assert not django.constraint
+    assert flask.constraint
+    combined_ireq = django.to_ireq()
+    assert str(combined_ireq) == 'Django[a,b]<1.9,~=1.5'
+    assert combined_ireq.extras == ('a', 'b')
+    assert django.to_ireq() is combined_ireq
+
+
+def test_reverse_dependencies(resolver, from_line):
+    resolver = resolver([from_line('Flask'), from_line('ipython[notebook]')])
+    results = resolver.resolve()
+
+    assert resolver.reverse_dependencies(results) == {
+        'gnureadline': {'ipython'},
+        'itsdangerous': {'flask'},
+        'jinja2': {'flask', 'ipython'},
+        'markupsafe': {'jinja2'},
+        'pyzmq': {'ipython'},
+        'tornado': {'ipython'},
+        'werkzeug': {'flask'},
+    }
+
+
+def test_resolver_detects_oscillation(base_resolver, repository, from_line):
+    repository.index.update({
+        'osc-a': {'1.0': {'': ['osc-b']}},
+        'osc-b': {'1.0': {'': ['osc-c<2']}, '2.0': {'': ['osc-c>=2']}},
+        'osc-c': {'1.0': {'': ['osc-b>=2']}, '2.0': {'': ['osc-b<2']}},
+    })
+    resolver = base_resolver([from_line('osc-a')], repository=repository)
+
+    with pytest.raises(OscillatingConstraints) as excinfo:
+        resolver.resolve(max_rounds=20)
+
+    error = excinfo.value
+    assert (error.first_round, error.repeat_round) == (3, 7)
+    assert sorted(error.constraints) == ['osc-b', 'osc-c']
+    assert str(error).splitlines()[-2:] == [
+        '  osc-b: <2 -> <2 -> >=2 -> >=2',
+        '  osc-c: >=2 -> <2 -> <2 -> >=2',
+    ]
+
+
+def test_resolver_applies_only_relevant_limiters(resolver, from_line):
+    limiters = [from_line('psycopg2<2.6', constraint=True)] + [
+        from_line('unused-{}==1.0'.format(n), constraint=True)
+        for n in range(500)]
+    resolver = resolver([from_line('psycopg2')] + limiters)
+    resolver.limiters_by_key = KeyRecordingDict(resolver.limiters_by_key)
+
+    results = resolver.resolve()
+
+    assert [str(x) for x in results] == ['psycopg2==2.5.4']
+    # Only the limiters of the required packages were looked up
+    assert set(resolver.limiters_by_key.looked_up_keys) == {'psycopg2'}
+
+
+class KeyRecordingDict(dict):
+    def __init__(self, *args, **kwargs):
+        super(KeyRecordingDict, self).__init__(*args, **kwargs)
+        self.looked_up_keys = []
+
+    def get(self, key, default=None):
+        self.looked_up_keys.append(key)
+        return super(KeyRecordingDict, self).get(key, default)
+
+    def __getitem__(self, key):
+        self.looked_up_keys.append(key)
+        return super(KeyRecordingDict, self).__getitem__(key)
+
+
+def test_resolver_warm_start_confirms_in_one_round(base_resolver, repository,
+                                                   from_line):
+    constraints = [from_line('Flask'), from_line('ipython[notebook]')]
+    cold = base_resolver(constraints, repository=repository)
+    cold_results = cold.resolve()
+    pins = {key_from_ireq(ireq): ireq for ireq in cold_results}
+    dependents = cold.reverse_dependencies(cold_results)
+
+    warm = base_resolver(constraints, repository=repository)
+    warm.warm_start(pins, dependents)
+    with mock.patch.object(warm, '_resolve_one_round',
+                           wraps=warm._resolve_one_round) as resolve_round:
+        warm_results = warm.resolve()
+
+    assert resolve_round.call_count == 1
+    assert (sorted(str(x) for x in warm_results) ==
+            sorted(str(x) for x in cold_results))
+    assert (warm.reverse_dependencies(warm_results) ==
+            cold.reverse_dependencies(cold_results))
+
+
+def test_resolver_warm_start_drops_stale_pins(base_resolver, repository,
+                                              from_line):
+    repository.index.update({
+        'cycle-a': {'1.0': {'': ['cycle-b']}},
+        'cycle-b': {'1.0': {'': ['cycle-a']}},
+    })
+    constraints = [from_line('Flask')]
+    cold = base_resolver(constraints, repository=repository)
+    cold_results = cold.resolve()
+    stale = [from_line('cycle-a==1.0'), from_line('cycle-b==1.0')]
+    base_resolver(stale, repository=repository).resolve()
+    pins = {key_from_ireq(ireq): ireq for ireq in chain(cold_results, stale)}
+    # Flask used to depend on cycle-a, which keeps itself required
+    # through cycle-b
+    dependents = dict(cold.reverse_dependencies(cold_results),
+                      **{'cycle-a': {'flask', 'cycle-b'},
+                         'cycle-b': {'cycle-a'}})
+
+    warm = base_resolver(constraints, repository=repository)
+    warm.warm_start(pins, dependents)
+    warm_results = warm.resolve()
+
+    assert (sorted(str(x) for x in warm_results) ==
+            sorted(str(x) for x in cold_results))
+
+
+def test_incremental_resolver_warm_start_evaluates_upgraded_subgraph(
+        repository, depcache, from_line):
+    old = IncrementalResolver(
+        [from_line('celery<4'), from_line('Flask')],
+        repository=repository, cache=depcache)
+    old_results = old.resolve()
+    pins = {key_from_ireq(ireq): ireq for ireq in old_results
+            if key_from_ireq(ireq) != 'celery'}
+    dependents = old.reverse_dependencies(old_results)
+    constraints = [from_line('celery'), from_line('Flask')]
+
+    def get_resolver():
+        local_repository = LocalRequirementsRepository(pins, repository)
+        return IncrementalResolver(
+            constraints, repository=local_repository, cache=depcache)
+
+    cold = get_resolver()
+    cold_results = cold.resolve()
+    warm = get_resolver()
+    warm.warm_start(pins, dependents)
+    warm_results = warm.resolve()
+
+    assert (sorted(str(x) for x in warm_results) ==
+            sorted(str(x) for x in cold_results))
+    assert 'celery==4.0.2' in {str(x) for x in warm_results}
+    assert sorted(warm._evaluations) == [
+        'amqp', 'anyjson', 'billiard', 'celery', 'kombu', 'pytz', 'vine']
+
+
+def test_resolver_prefetches_dependencies_of_likely_matches(
+        base_resolver, repository, depcache, from_line):
+    prefetched = []
+    repository.prefetch_dependencies = prefetched.extend
+    repository.pop_prefetched_dependencies = lambda: [
+        (ireq, repository.get_dependencies(ireq)) for ireq in prefetched]
+    pins = {'jinja2': from_line('jinja2==2.7.3'),
+            'werkzeug': from_line('werkzeug==0.10')}
+    local_repository = LocalRequirementsRepository(pins, repository)
+    resolver = base_resolver([from_line('Flask')], repository=local_repository)
+
+    results = resolver.resolve()
+
+    assert sorted(str(x) for x in prefetched) == [
+        'jinja2==2.7.3', 'werkzeug==0.10']
+    assert sorted(str(x) for x in results) == [
+        'flask==0.10.1', 'itsdangerous==0.24', 'jinja2==2.7.3',
+        'markupsafe==0.23', 'werkzeug==0.10']
+    assert all(ireq in depcache for ireq in prefetched)
+
+
+def test_resolver_starts_getting_dependencies_of_each_best_match(
+        base_resolver, repository, from_line):
+    events = []
+    find_best_match = repository.find_best_match
+
+    def record_find_best_match(ireq, prereleases=False):
+        events.append(('find', ireq.name))
+        return find_best_match(ireq, prereleases)
+
+    repository.find_best_match = record_find_best_match
+    repository.start_getting_dependencies = lambda ireqs: events.extend(
+        ('start', str(ireq)) for ireq in ireqs)
+    resolver = base_resolver([from_line('Django'), from_line('Flask')],
+                             repository=repository)
+
+    resolver.resolve()
+
+    assert events[:4] == [
+        ('find', 'Django'), ('start', 'django==1.8'),
+        ('find', 'Flask'), ('start', 'flask==0.10.1')]
+
+
+def test_resolver_resumes_from_checkpoint(base_resolver, repository, tmpdir,
+                                          from_line):
+    checkpoint = ResolverCheckpoint('flask', str(tmpdir))
+    constraints = [from_line('Flask'), from_line('ipython[notebook]')]
+    expected = sorted(
+        str(x) for x in base_resolver(constraints, repository=repository).resolve())
+    interrupted = base_resolver(constraints, repository=repository)
+    interrupted.checkpoint = checkpoint
+    resolve_one_round = interrupted._resolve_one_round
+    rounds = []
+
+    def interrupt_second_round():
+        rounds.append(None)
+        if len(rounds) == 2:
+            raise KeyboardInterrupt
+        return resolve_one_round()
+
+    interrupted._resolve_one_round = interrupt_second_round
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.resolve()
+
+    assert checkpoint.load()['round'] == 1
+    resumed = base_resolver(constraints, repository=repository)
+    resumed.checkpoint = checkpoint
+    assert resumed.resume(checkpoint)
+    with mock.patch.object(resumed, '_resolve_one_round',
+                           wraps=resumed._resolve_one_round) as resolve_round:
+        results = resumed.resolve()
+
+    assert sorted(str(x) for x in results) == expected
+    assert resolve_round.call_count == 2
+    assert checkpoint.load() is None
+
+
+@pytest.mark.parametrize('line,editable', [
+    ('Flask[dotenv]>=0.10', False),
+    ('https://example.com/Flask-0.10.1.zip#egg=Flask', False),
+    ('file:///tmp/flask#egg=Flask', False),
+    ('git+https://example.com/flask.git#egg=Flask', True),
+])
+def test_checkpoint_lines_keep_links(from_line, from_editable, line,
+                                     editable):
+    ireq = from_editable(line) if editable else from_line(line)
+    constraint = Constraint.from_ireq(ireq)
+
+    restored = Constraint.from_ireq(
+        parse_requirement_line(format_requirement_line(constraint.to_ireq())))
+
+    assert restored.key == constraint.key
+    assert restored.editable == editable
+    assert restored.link == ireq.link
+    assert restored.specifier == constraint.specifier
+    assert restored.extras == constraint.extras
+
+
+def test_resolver_grafts_cached_closures(base_resolver, repository, tmpdir,
+                                         from_line):
+    closure_cache = ClosureCache(str(tmpdir))
+    constraints = [from_line('fake-prequ-test-with-pinned-deps'),
+                   from_line('Flask')]
+
+    def resolve(constraints):
+        resolver = base_resolver(constraints, repository=repository)
+        resolver.closure_cache = closure_cache
+        with mock.patch.object(resolver, '_resolve_one_round',
+                               wraps=resolver._resolve_one_round) as rounds:
+            results = resolver.resolve()
+        return (sorted(str(x) for x in results), rounds.call_count)
+
+    (cold_results, cold_rounds) = resolve(constraints)
+    (results, rounds) = resolve(constraints)
+
+    assert closure_cache.get(from_line('celery==3.1.18')) == [
+        'amqp==1.4.9', 'anyjson==0.3.3', 'billiard==3.3.0.23',
+        'kombu==3.0.35', 'pytz==2016.4']
+    assert results == cold_results
+    assert rounds < cold_rounds
+
+    # A limiter on a package of a closure prevents the grafting
+    limited = constraints + [from_line('amqp<2', constraint=True)]
+    assert resolve(limited) == (cold_results, cold_rounds)
@@ -0,0 +1,128 @@
+import multiprocessing
+
+import mock
+import pytest
+
+from prequ.cache import DependencyCache
+from prequ.session import ResolutionSession, _init_upgrade_worker
+from prequ.utils import key_from_ireq
+
+
+@pytest.fixture(params=['rounds', 'incremental', 'pubgrub'])
+def resolver_name(request):
+    return request.param
+
+
+def test_resolve_many_inputs(repository, depcache, from_line, resolver_name):
+    session = ResolutionSession(repository, cache=depcache)
+
+    flask = session.resolve([from_line('Flask')], resolver=resolver_name)
+    django = session.resolve([from_line('Django')], resolver=resolver_name)
+
+    assert sorted(str(x) for x in flask.results) == [
+        'flask==0.10.1', 'itsdangerous==0.24', 'jinja2==2.7.3',
+        'markupsafe==0.23', 'werkzeug==0.10.4']
+    assert [str(x) for x in django.results] == ['django==1.8']
+    assert flask.get_reverse_dependencies()['jinja2'] == {'flask'}
+
+
+def test_resolve_shares_warm_state(repository, depcache, from_line):
+    session = ResolutionSession(repository, cache=depcache)
+    session.resolve([from_line('Flask')])
+
+    with mock.patch.object(repository, '_get_dependencies') as get_deps:
+        result = session.resolve([from_line('Flask')])
+
+    assert not get_deps.called
+    assert len(result.results) == 5
+
+
+def test_resolve_with_existing_pins(repository, depcache, from_line):
+    session = ResolutionSession(repository, cache=depcache)
+    pins = {'psycopg2': from_line('psycopg2==2.5.4')}
+
+    pinned = session.resolve([from_line('psycopg2')], existing_pins=pins)
+    latest = session.resolve([from_line('psycopg2')])
+
+    assert [str(x) for x in pinned.results] == ['psycopg2==2.5.4']
+    assert [str(x) for x in latest.results] == ['psycopg2==2.6']
+
+
+@pytest.mark.parametrize('with_dependents', [False, True])
+def test_evaluate_upgrades(repository, depcache, from_line, with_dependents):
+    session = ResolutionSession(repository, cache=depcache)
+    old = session.resolve([
+        from_line('celery<4'), from_line('Flask'), from_line('psycopg2<2.6')])
+    pins = {key_from_ireq(ireq): ireq for ireq in old.results}
+    dependents = (
+        old.resolver.reverse_dependencies(old.results)
+        if with_dependents else None)
+    constraints = [from_line('celery'), from_line('Flask'),
+                   from_line('psycopg2')]
+
+    scenarios = session.evaluate_upgrades(
+        constraints, pins, keys=['celery', 'flask', 'psycopg2'],
+        existing_dependents=dependents)
+
+    (celery, flask, psycopg2) = scenarios
+    assert (celery.old_version, celery.new_version) == ('3.1.23', '4.0.2')
+    assert celery.is_upgrade
+    assert celery.changes == {
+        'amqp': ('1.4.9', '2.1.4'), 'anyjson': ('0.3.3', None),
+        'kombu': ('3.0.35', '4.0.2'),
+        'vine': (None, '1.1.3')}
+    assert (flask.old_version, flask.new_version) == ('0.10.1', '0.10.1')
+    assert not flask.is_upgrade
+    assert (psycopg2.old_version, psycopg2.new_version) == ('2.5.4', '2.6')
+    assert psycopg2.changes == {}
+    assert all(x.resolved for x in scenarios)
+
+
+def test_evaluate_upgrades_respects_constraints(repository, depcache, from_line):
+    session = ResolutionSession(repository, cache=depcache)
+    constraints = [from_line('celery<4')]
+    pins = {'celery': from_line('celery==3.1.18')}
+    old = session.resolve(constraints, existing_pins=pins)
+    pins = {key_from_ireq(ireq): ireq for ireq in old.results}
+
+    (celery,) = session.evaluate_upgrades(constraints, pins, keys=['celery'])
+
+    assert (celery.old_version, celery.new_version) == ('3.1.18', '3.1.23')
+    assert celery.is_upgrade
+    assert celery.changes == {}
+
+
+def test_evaluate_upgrades_in_worker_processes(
+        tmpdir, from_line, minimal_wheels_dir):
+    constraints = [from_line('small-fake-a'), from_line('small-fake-b'),
+                   from_line('tiny-depender')]
+    pins = {
+        'small-fake-a': from_line('small-fake-a==0.1'),
+        'small-fake-b': from_line('small-fake-b==0.1'),
+        'tiny-depender': from_line('tiny-depender==1.1'),
+        'tiny-dependee': from_line('tiny-dependee==1.0'),
+    }
+
+    def evaluate(jobs):
+        session = ResolutionSession.create(
+            cache=DependencyCache(str(tmpdir.join(str(jobs)))),
+            no_index=True, find_links=[minimal_wheels_dir], jobs=jobs)
+        try:
+            return [
+                (x.key, x.old_version, x.new_version, x.changes, x.resolved)
+                for x in session.evaluate_upgrades(constraints, pins)]
+        finally:
+            session.close()
+
+    serial = evaluate(jobs=1)
+    with mock.patch('multiprocessing.Pool', wraps=multiprocessing.Pool) as pool:
+        parallel = evaluate(jobs=2)
+
+    assert pool.call_args == mock.call(
+        2, initializer=_init_upgrade_worker, initargs=mock.ANY)
+    assert parallel == serial == [
+        ('small-fake-a', '0.1', '0.2', {}, True),
+        ('small-fake-b', '0.1', '0.3', {}, True),
+        ('tiny-dependee', '1.0', '1.0', {}, True),
+        ('tiny-depender', '1.1', '1.1', {}, True),
+    ]
@@ -0,0 +1,112 @@
+import sys
+
+import pytest
+
+from prequ import target as target_module
+from prequ._pip_compat import TargetPython, install_req_from_line
+from prequ.exceptions import UnsupportedTargetEnvironment
+from prequ.target import TargetEnvironment
+
+
+def test_markers_of_target():
+    target = TargetEnvironment('3.7', 'win_amd64', 'cpython')
+
+    assert target.markers == {
+        'python_version': '3.7',
+        'python_full_version': '3.7.0',
+        'implementation_version': '3.7.0',
+        'implementation_name': 'cpython',
+        'platform_python_implementation': 'CPython',
+        'sys_platform': 'win32',
+        'platform_system': 'Windows',
+        'os_name': 'nt',
+        'platform_machine': 'AMD64',
+        'platform_release': '',
+        'platform_version': '',
+    }
+    assert target.cache_tag == 'py3.7-win_amd64-cp'
+
+
+@pytest.mark.parametrize('platform,expected', [
+    ('manylinux1_x86_64', ('linux', 'Linux', 'x86_64')),
+    ('manylinux2014_aarch64', ('linux', 'Linux', 'aarch64')),
+    ('linux_x86_64', ('linux', 'Linux', 'x86_64')),
+    ('macosx_10_9_x86_64', ('darwin', 'Darwin', 'x86_64')),
+    ('win32', ('win32', 'Windows', 'x86')),
+])
+def test_platform_markers(platform, expected):
+    markers = TargetEnvironment(platform=platform).markers
+
+    assert (markers['sys_platform'], markers['platform_system'],
+            markers['platform_machine']) == expected
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'python_version': 'three'},
+    {'platform': 'amiga'},
+    {'implementation': 'brainfuck'},
+])
+def test_invalid_target(kwargs):
+    with pytest.raises(ValueError):
+        TargetEnvironment(**kwargs)
+
+
+def test_from_options():
+    assert TargetEnvironment.from_options() is None
+    assert TargetEnvironment.from_options('311') == TargetEnvironment('3.11')
+    assert TargetEnvironment('3.11').cache_tag == 'py3.11'
+
+
+def test_evaluate_and_patched_markers():
+    target = TargetEnvironment('2.7', 'win32')
+    ireq = install_req_from_line(
+        'six; python_version < "3" and sys_platform == "win32"')
+
+    assert target.evaluate(ireq.markers)
+    assert not ireq.markers.evaluate()
+    with target.patched_markers():
+        assert ireq.markers.evaluate()
+        assert ireq.match_markers()
+    assert not ireq.markers.evaluate()
+
+
+HOST_PYTHON = '{}.{}'.format(*sys.version_info)
+
+
+@pytest.mark.parametrize('features,kwargs,reason', [
+    ({'RequirementPreparer': None}, {'python_version': HOST_PYTHON},
+     'pip 10 or newer'),
+    ({'CAN_SKIP_WHEEL_CHECK': False}, {'platform': 'win_amd64'},
+     'cannot prepare wheels'),
+    ({'CAN_SKIP_WHEEL_CHECK': False}, {'python_version': '2.7'},
+     'cannot prepare wheels'),
+    ({'PIP_192_OR_NEWER': False}, {'python_version': '2.7'},
+     'pip 19.2 or newer'),
+    ({'CAN_SKIP_WHEEL_CHECK': False, 'PIP_192_OR_NEWER': False},
+     {'python_version': HOST_PYTHON}, None),
+    ({'PIP_192_OR_NEWER': False}, {'platform': 'win_amd64'}, None),
+])
+def test_check_support(monkeypatch, features, kwargs, reason):
+    for (name, value) in features.items():
+        monkeypatch.setattr(target_module, name, value)
+    target = TargetEnvironment(**kwargs)
+
+    if reason is None:
+        target.check_support()
+    else:
+        with pytest.raises(UnsupportedTargetEnvironment) as excinfo:
+            target.check_support()
+        assert reason in str(excinfo.value)
+        assert str(excinfo.value).startswith(
+            'Cannot resolve for {}: '.format(target.cache_tag))
+
+
+@pytest.mark.skipif(TargetPython is None, reason="needs pip 19.2 or newer")
+def test_finder_kwargs():
+    target = TargetEnvironment('3.6', 'manylinux1_x86_64', 'cp')
+
+    target_python = target.get_finder_kwargs()['target_python']
+
+    assert target_python.py_version_info == (3, 6, 0)
+    assert target_python.get_tags()[0] == (
+        'cp36', 'cp36m', 'manylinux1_x86_64')
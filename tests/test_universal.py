@@ -0,0 +1,59 @@
+import pytest
+
+from prequ.session import ResolutionSession
+from prequ.target import TargetEnvironment
+from prequ.universal import (
+    IndistinguishableTargets, get_target_markers, resolve_universal)
+
+
+@pytest.mark.parametrize('tags,expected', [
+    (['py3.7', 'py3.11'],
+     ['python_version == "3.7"', 'python_version == "3.11"']),
+    (['py3.11-win_amd64', 'py3.11-manylinux1_x86_64'],
+     ['sys_platform == "win32"', 'sys_platform == "linux"']),
+    (['py3.7-win32', 'py3.7-win_amd64', 'py3.8-win_amd64'],
+     ['python_version == "3.7" and platform_machine == "x86"',
+      'python_version == "3.7" and platform_machine == "AMD64"',
+      'python_version == "3.8" and platform_machine == "AMD64"']),
+])
+def test_get_target_markers(tags, expected):
+    targets = [TargetEnvironment.from_tag(x) for x in tags]
+
+    markers = get_target_markers(targets)
+
+    assert [markers[x] for x in targets] == expected
+
+
+def test_get_target_markers_of_indistinguishable_targets():
+    with pytest.raises(IndistinguishableTargets):
+        get_target_markers([
+            TargetEnvironment.from_tag('py3.7-manylinux1_x86_64'),
+            TargetEnvironment.from_tag('py3.7-manylinux2014_x86_64')])
+
+
+def test_resolve_universal(repository, depcache, from_line):
+    sessions = []
+    for tag in ['py3.7', 'py3.8', 'py3.11']:
+        session = ResolutionSession(repository, cache=depcache)
+        session.target = TargetEnvironment.from_tag(tag)
+        sessions.append(session)
+    constraints = [
+        from_line('psycopg2<2.6; python_version < "3.8"'),
+        from_line('psycopg2; python_version >= "3.8"'),
+        from_line('Flask'),
+    ]
+
+    resolution = resolve_universal(sessions, constraints)
+
+    assert sorted(
+        (str(x), resolution.markers.get(x)) for x in resolution.results) == [
+        ('flask==0.10.1', None),
+        ('itsdangerous==0.24', None),
+        ('jinja2==2.7.3', None),
+        ('markupsafe==0.23', None),
+        ('psycopg2==2.5.4', 'python_version == "3.7"'),
+        ('psycopg2==2.6',
+         'python_version == "3.8" or python_version == "3.11"'),
+        ('werkzeug==0.10.4', None),
+    ]
+    assert resolution.get_reverse_dependencies()['jinja2'] == {'flask'}
@@ -1,10 +1,12 @@
 import os
 import shutil
+from collections import OrderedDict
 
+from prequ import utils
 from prequ._pip_compat import path_to_url
 from prequ.utils import (
     as_tuple, dedup, flat_map, format_requirement, format_specifier,
-    get_hashes_from_ireq, is_subdirectory)
+    get_hashes_from_ireq, is_subdirectory, parse_dependency)
 
 
 def test_is_subdirectory():
@@ -40,6 +42,11 @@ def test_format_requirement_relative_editable(from_editable, small_fake_package_
         '-e ./tests/test_data/small_fake_package')
 
 
+def test_format_requirement_url(from_line):
+    ireq = from_line('https://example.com/y-1.0.zip#egg=y')
+    assert format_requirement(ireq) == 'https://example.com/y-1.0.zip#egg=y'
+
+
 def test_format_requirement_ireq_with_hashes(from_line):
     ireq = from_line('pytz==2017.2')
     ireq_hashes = [
@@ -114,3 +121,30 @@ def test_get_hashes_from_ireq(from_line):
         'sha256:f5c056e8f62d45ba8215e5cb8f50dfccb198b4b9fbea8500674f3443e4689589',
     ]
     assert get_hashes_from_ireq(ireq) == expected
+
+
+def test_parse_dependency():
+    parsed = parse_dependency('Jinja2>=2.4')
+    assert parsed.key == 'jinja2'
+    assert str(parsed.ireq.req) == 'Jinja2>=2.4'
+    assert not parsed.ireq.constraint
+
+    assert parse_dependency('Jinja2>=2.4') is parsed
+    constraint = parse_dependency('Jinja2>=2.4', constraint=True)
+    assert constraint is not parsed
+    assert constraint.ireq.constraint
+
+
+def test_parse_dependency_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(utils, 'MAX_PARSED_DEPENDENCIES', 2)
+    monkeypatch.setattr(utils, '_parsed_dependencies', OrderedDict())
+    jinja = parse_dependency('Jinja2>=2.4')
+    six = parse_dependency('six')
+
+    assert parse_dependency('Jinja2>=2.4') is jinja
+    parse_dependency('click')
+
+    assert len(utils._parsed_dependencies) == 2
+    # The least recently used one was dropped
+    assert parse_dependency('Jinja2>=2.4') is jinja
+    assert parse_dependency('six') is not six
@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import pytest
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.version import parse
+
+from prequ.repositories.version_index import VersionIndex
+
+VERSIONS = [
+    '0.9', '1.0.dev1', '1.0a1', '1.0rc1', '1.0', '1.0+local', '1.0.post1',
+    '1.0.1', '1.1b2', '1.4', '1.4.2', '1.4.9', '1.5.dev0', '1.5',
+    '2.0rc1', '2.0', '2.0.0.1', '3.0a1', '1!0.1', 'weird-legacy',
+    '1.0-1', '1.0.post0.dev1', '1.4.0', '1.4.2+ubuntu.1', '1.4.2.post1',
+    '2.0a1.post2.dev3', '3.0.0.0.0.1', '1!1.4.5', '1!1.4rc2',
+]
+
+SPECIFIERS = [
+    '', '>=1.0', '>1.0', '<1.0', '<=1.0', '==1.0', '!=1.0', '==1.0+local',
+    '===1.0', '==1.4.*', '!=1.4.*', '~=1.4.2', '~=1.4', '~=2.0rc1',
+    '>=1.0,<2.0', '>1.0,<=1.5', '<1.5,!=1.4.2', '>=1.0rc1,<1.1', '<2.0,!=1.0',
+    '>3.0', '<0.1', '>=2.0,<1.0', '==1!0.1', '>=1!0.1', '==1.4.*,<1.4.5',
+    '<1.0rc1', '>=0.9,<1.0',
+    '>1.0.post0', '<1.0.dev0', '<1.4.2', '>1.4.2', '<=1.4.2+ubuntu.1',
+    '==1.4.2+ubuntu.1', '==1.0.0', '!=1.4.2', '==1.4.2.*', '==1.0.0.0.0.*',
+    '==3.0.0.0.0.1.*', '!=2.0.*', '==2.0rc1.*', '==1!1.4.*', '==v1.4.*',
+    '==1.04.*', '~=1.0.post1', '~=2.0a1.dev3', '~=1!1.4', '~=v1.4',
+    '~=1.4.0', '===weird-legacy', '>=1.0,!=1.4.*,<3', '<=weird',
+]
+
+
+class FakeCandidate(object):
+    def __init__(self, version, position):
+        self.version = parse(version)
+        self.position = position
+
+
+@pytest.mark.parametrize('vectorize', [False, True])
+@pytest.mark.parametrize('prereleases', [None, False, True])
+@pytest.mark.parametrize('specifier', SPECIFIERS)
+def test_filter_matches_specifier_set_filter(
+        specifier, prereleases, vectorize):
+    if vectorize:
+        pytest.importorskip('numpy')
+    candidates = [FakeCandidate(version, n)
+                  for (n, version) in enumerate(VERSIONS + VERSIONS[:3])]
+    version_index = VersionIndex(candidates, vectorize=vectorize)
+    specset = SpecifierSet(specifier)
+
+    result = version_index.filter(specset, prereleases=prereleases)
+
+    expected = specset.filter(
+        (c.version for c in candidates), prereleases=prereleases)
+    assert sorted(set(result)) == sorted(set(expected))
+    assert list(result) == sorted(result)
+    assert version_index.filter(specset, prereleases=prereleases) is result
+
+
+def test_get_matching_candidates_returns_last_candidates():
+    candidates = [FakeCandidate(version, n)
+                  for (n, version) in enumerate(['1.0', '2.0', '1.0', '3.0'])]
+    version_index = VersionIndex(candidates)
+
+    result = version_index.get_matching_candidates(SpecifierSet('<3'))
+
+    assert [c.position for c in result] == [2, 1]
+    assert version_index.get_first_version(
+        version_index.filter(SpecifierSet('==1.0'))) == parse('1.0')
+
+
+@pytest.mark.parametrize('versions', [
+    ['0.9', '1.0a1', '1.0', '2.0b1'],
+    ['1.0a1', '2.0b1', 'weird-legacy'],
+    ['weird-legacy'],
+])
+@pytest.mark.parametrize('prereleases', [None, False, True])
+def test_vectorized_filter_of_empty_specifier_set(versions, prereleases):
+    pytest.importorskip('numpy')
+    candidates = [FakeCandidate(version, n)
+                  for (n, version) in enumerate(versions)]
+    version_index = VersionIndex(candidates, vectorize=True)
+
+    result = version_index.filter(SpecifierSet(''), prereleases=prereleases)
+
+    assert list(result) == list(SpecifierSet('').filter(
+        sorted(c.version for c in candidates), prereleases=prereleases))
+
+
+def test_vectorized_filter_falls_back_on_too_big_numbers():
+    pytest.importorskip('numpy')
+    candidates = [FakeCandidate(version, n) for (n, version) in enumerate(
+        ['1.0', '1.{}'.format(2 ** 64), '2.0'])]
+    version_index = VersionIndex(candidates, vectorize=True)
+
+    result = version_index.filter(SpecifierSet('>1.0'))
+
+    assert [str(x) for x in result] == ['1.{}'.format(2 ** 64), '2.0']